@@ -15,6 +15,9 @@ from modulos.nueva_campana import mostrar_nueva_campana
 from modulos.cargar_campana import mostrar_cargar_campana
 from modulos.gestor_personajes import mostrar_gestor_personajes
 from editores.editar_personaje import mostrar_editar_personaje
+from utils.cache_personajes import unir_jugadores
+from utils.indice_campanas import aplicar_cambios_sesion
+from utils.vigilante_archivos import obtener_vigilante
 
 class DnDApp:
     def __init__(self, root):
@@ -54,6 +57,11 @@ class DnDApp:
         # Panel de personajes (inicialmente oculto)
         self.personajes_panel = None
         
+        # Vigilar las carpetas de datos para que las cachés vean los cambios externos
+        # (por ejemplo, de otros DM que comparten la misma carpeta)
+        self.vigilante = obtener_vigilante()
+        self.vigilante.iniciar()
+        
         # Mostrar menú principal
         self.mostrar_menu_principal()
     
@@ -180,8 +188,8 @@ class DnDApp:
         self.lista_personajes_frame = ttk.Frame(self.personajes_panel, style="Panel.TFrame")
         self.lista_personajes_frame.pack_forget()  # Inicialmente oculto
         
-        # Añadir personajes al panel
-        for i, personaje in enumerate(self.campana_actual.get("jugadores", [])):
+        # Añadir personajes al panel (uniendo las referencias con sus archivos)
+        for i, personaje in enumerate(unir_jugadores(self.campana_actual.get("jugadores", []))):
             personaje_frame = ttk.Frame(self.lista_personajes_frame, style="Panel.TFrame")
             personaje_frame.pack(fill="x", pady=2)
             
@@ -238,15 +246,12 @@ class DnDApp:
         
         # Callback para cuando se termina la edición
         def callback_edicion():
-            # Recargar la campaña para reflejar los cambios
-            if self.ruta_campana_actual:
-                try:
-                    with open(self.ruta_campana_actual, 'r', encoding='utf-8') as f:
-                        self.campana_actual = json.load(f)
-                except Exception as e:
-                    messagebox.showerror("Error", f"Error al recargar la campaña: {str(e)}")
-            
-            # Actualizar panel de personajes
+            # La campaña sólo guarda referencias, así que no hace falta reescribirla:
+            # el panel vuelve a leer el personaje a través de la caché. Si el personaje
+            # cambió de archivo, el índice ya actualizó el archivo de la campaña y aquí
+            # sólo se corrige la copia en memoria
+            if self.campana_actual:
+                aplicar_cambios_sesion(self.campana_actual.get("jugadores", []))
             self.mostrar_panel_personajes()
             # Volver al menú principal
             self.mostrar_menu_principal()
@@ -8,11 +8,33 @@ y la funcionalidad para guardar/cargar los objetos.
 
 import json
 import os
-from typing import Dict, List, Any, Optional, Union
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.dados import parsear_dados
+from utils.motor_ca import calcular_ca_nucleo
+from utils.vigilante_archivos import REINICIADO, suscribir, vigilando
+
+# Bloqueo de archivos entre procesos (fcntl en Unix, msvcrt en Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
 
 # Directorio para almacenar los objetos
 DIRECTORIO_OBJETOS = "data/objetos"
 
+# Extensión de los catálogos empaquetados (un archivo JSON Lines por tipo de objeto)
+CATALOG_EXTENSION = ".jsonl"
+
 # Tipos de objetos disponibles
 ITEM_TYPES = {
     "armor": "Armadura",
@@ -57,6 +79,10 @@ WEAPON_PROPERTIES = [
 class Item:
     """Clase base para todos los objetos equipables"""
     
+    # Los valores de combate se decodifican una vez desde properties al construir el objeto
+    __slots__ = ("id", "name", "item_type", "rarity", "description", "magic",
+                 "_properties", "ac_bonus", "dex_bonus_limit", "ability_bonus")
+    
     def __init__(self, id: str, name: str, item_type: str, rarity: str, 
                  description: str, properties: Dict = None, magic: bool = False):
         """
@@ -76,8 +102,29 @@ class Item:
         self.item_type = item_type
         self.rarity = rarity
         self.description = description
-        self.properties = properties or {}
         self.magic = magic
+        self.properties = properties or {}
+    
+    @property
+    def properties(self) -> Dict:
+        """Propiedades específicas del tipo. Si se modifican en el sitio, llamar a refresh()"""
+        return self._properties
+    
+    @properties.setter
+    def properties(self, value: Dict) -> None:
+        self._properties = value
+        self.refresh()
+    
+    def refresh(self) -> None:
+        """Vuelve a decodificar los valores de combate a partir de properties"""
+        self.ac_bonus = 0
+        self.dex_bonus_limit = None
+        self.ability_bonus = self._properties.get("ability_bonus", {})
+        # Objeto genérico: mismas reglas que antes de existir las subclases
+        if self.item_type in ["armor", "helmet", "shield"]:
+            self.ac_bonus = _to_int(self._properties.get("base_ac", 0))
+        if self.item_type == "armor":
+            self.dex_bonus_limit = _to_optional_int(self._properties.get("dex_bonus_limit"))
     
     def to_dict(self) -> Dict:
         """
@@ -101,16 +148,20 @@ class Item:
         """
         Crea un objeto a partir de un diccionario
         
+        Llamado sobre Item, crea la subclase correspondiente al tipo del objeto.
+        
         Args:
             data (Dict): Diccionario con los datos del objeto
         
         Returns:
             Item: Objeto creado
         """
-        return cls(
+        item_type = data.get("type", "")
+        item_class = ITEM_CLASSES.get(item_type, Item) if cls is Item else cls
+        return item_class(
             id=data.get("id", ""),
             name=data.get("name", ""),
-            item_type=data.get("type", ""),
+            item_type=item_type,
             rarity=data.get("rarity", "Common"),
             description=data.get("description", ""),
             properties=data.get("properties", {}),
@@ -124,9 +175,7 @@ class Item:
         Returns:
             int: Bonificación a la CA (0 por defecto)
         """
-        if self.item_type in ["armor", "helmet", "shield"]:
-            return self.properties.get("base_ac", 0)
-        return 0
+        return self.ac_bonus
     
     def get_dex_bonus_limit(self) -> Optional[int]:
         """
@@ -135,11 +184,7 @@ class Item:
         Returns:
             Optional[int]: Límite de bonificación por destreza (None si no aplica)
         """
-        if self.item_type == "armor":
-            limit = self.properties.get("dex_bonus_limit")
-            if limit is not None:
-                return int(limit)
-        return None
+        return self.dex_bonus_limit
     
     def get_damage(self) -> str:
         """
@@ -148,11 +193,6 @@ class Item:
         Returns:
             str: Descripción del daño (vacío si no es un arma)
         """
-        if self.item_type == "weapon":
-            damage_dice = self.properties.get("damage_dice", "")
-            damage_type = self.properties.get("damage_type", "")
-            if damage_dice and damage_type:
-                return f"{damage_dice} {damage_type}"
         return ""
     
     def get_ability_bonus(self) -> Dict[str, int]:
@@ -162,7 +202,7 @@ class Item:
         Returns:
             Dict[str, int]: Diccionario con habilidades y sus bonificaciones
         """
-        return self.properties.get("ability_bonus", {})
+        return self.ability_bonus
     
     def __str__(self) -> str:
         """
@@ -185,9 +225,641 @@ class Item:
         return base_str
 
 
+def _to_int(value, default: int = 0) -> int:
+    """Convierte un valor de properties a entero"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_optional_int(value) -> Optional[int]:
+    """Convierte un valor de properties a entero, conservando None"""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Armor(Item):
+    """Armadura: CA base y límite del modificador de Destreza"""
+    
+    __slots__ = ()
+    
+    def refresh(self) -> None:
+        self.ac_bonus = _to_int(self._properties.get("base_ac", 0))
+        self.dex_bonus_limit = _to_optional_int(self._properties.get("dex_bonus_limit"))
+        self.ability_bonus = self._properties.get("ability_bonus", {})
+
+
+class ProtectiveItem(Item):
+    """Escudos, cascos, anillos y amuletos: bonificador plano a la CA"""
+    
+    __slots__ = ()
+    
+    def refresh(self) -> None:
+        self.ac_bonus = _to_int(self._properties.get("base_ac", 0))
+        self.dex_bonus_limit = None
+        self.ability_bonus = self._properties.get("ability_bonus", {})
+
+
+class Shield(ProtectiveItem):
+    """Escudo"""
+    
+    __slots__ = ()
+
+
+class Helmet(ProtectiveItem):
+    """Casco"""
+    
+    __slots__ = ()
+
+
+class Ring(ProtectiveItem):
+    """Anillo (p. ej. el anillo de protección suma su base_ac a la CA)"""
+    
+    __slots__ = ()
+
+
+class Amulet(ProtectiveItem):
+    """Amuleto"""
+    
+    __slots__ = ()
+
+
+class Weapon(Item):
+    """Arma: dados de daño ya analizados"""
+    
+    __slots__ = ("damage_dice", "damage_type", "dice", "_damage_str")
+    
+    def refresh(self) -> None:
+        super().refresh()
+        self.damage_dice = self._properties.get("damage_dice", "")
+        self.damage_type = self._properties.get("damage_type", "")
+        # (cantidad, caras, modificador) o None si el arma no tiene dados válidos
+        self.dice = parsear_dados(self.damage_dice)
+        self._damage_str = f"{self.damage_dice} {self.damage_type}" if self.damage_dice and self.damage_type else ""
+    
+    def get_damage(self) -> str:
+        return self._damage_str
+    
+    def average_damage(self) -> float:
+        """
+        Obtiene el daño medio de un golpe (sin modificadores de característica)
+        
+        Returns:
+            float: Daño medio (0 si el arma no tiene dados válidos)
+        """
+        if self.dice is None:
+            return 0.0
+        count, sides, modifier = self.dice
+        return count * (sides + 1) / 2 + modifier
+
+
+class Accessory(Item):
+    """Accesorio"""
+    
+    __slots__ = ()
+
+
+class Consumable(Item):
+    """Consumible"""
+    
+    __slots__ = ()
+
+
+# Clase que crea Item.from_dict para cada tipo de objeto
+ITEM_CLASSES = {
+    "armor": Armor,
+    "weapon": Weapon,
+    "helmet": Helmet,
+    "shield": Shield,
+    "ring": Ring,
+    "amulet": Amulet,
+    "accessory": Accessory,
+    "consumable": Consumable
+}
+
+# ----- Catálogo empaquetado -----
+
+# Prefijo que tienen todas las líneas escritas por el catálogo: permite leer el id sin decodificar la línea
+_ID_PREFIX = re.compile(rb'^\{"id": "((?:[^"\\]|\\.)*)"')
+# Final de las líneas que marcan un objeto eliminado
+_TOMBSTONE_SUFFIX = b', "_deleted": true}'
+# Líneas obsoletas (sobrescritas o eliminadas) toleradas antes de compactar el archivo
+_COMPACT_MIN_GARBAGE = 64
+
+
+class ItemCatalog:
+    """
+    Catálogo de todos los objetos de un tipo en un único archivo JSON Lines
+    
+    Cada línea es un objeto completo. Guardar añade una línea nueva y eliminar añade una
+    marca de borrado, así que la última línea de cada id es la vigente. El archivo se lee
+    de una vez para construir un índice id -> (posición, longitud) y cada objeto sólo se
+    decodifica cuando se pide. Cuando las líneas obsoletas superan a las vigentes, el
+    archivo se compacta.
+    """
+    
+    def __init__(self, item_type: str, directory: str = None):
+        """
+        Inicializa el catálogo (sin leerlo todavía)
+        
+        Args:
+            item_type (str): Tipo de objeto
+            directory (str, optional): Directorio base. Por defecto DIRECTORIO_OBJETOS
+        """
+        self.item_type = item_type
+        self.directory = directory or DIRECTORIO_OBJETOS
+        self.path = os.path.join(self.directory, item_type + CATALOG_EXTENSION)
+        self._buffer = bytearray()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._garbage = 0
+        self._signature = None
+        self._loaded = False
+        self._stale = False
+        # Aumenta con cada cambio del contenido, para que otras cachés sepan cuándo rehacerse
+        self.version = 0
+        # Protege el índice y el archivo frente a hilos que guardan a la vez
+        self._lock = threading.RLock()
+    
+    # ----- Lectura -----
+    
+    def _file_signature(self):
+        """Obtiene la firma (fecha de modificación y tamaño) del archivo o None si no existe"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _ensure_loaded(self, verify: bool = False) -> None:
+        """
+        Carga el índice si no está cargado o si el archivo cambió fuera de este catálogo
+        
+        Args:
+            verify (bool): Comprobar siempre la firma del archivo aunque el vigilante esté
+                en marcha (antes de escribir, para no trabajar con un índice obsoleto)
+        """
+        if self._loaded and not self._stale and not verify and vigilando(self.directory):
+            return
+        
+        with self._lock:
+            signature = self._file_signature()
+            if self._loaded and signature == self._signature:
+                self._stale = False
+                return
+            
+            self._load()
+    
+    def _load(self) -> None:
+        """Lee el archivo completo y reconstruye el índice"""
+        self._migrate_legacy()
+        
+        self._buffer = bytearray()
+        self._index = {}
+        self._garbage = 0
+        
+        try:
+            with open(self.path, 'rb') as f:
+                self._buffer = bytearray(f.read())
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error al leer el catálogo de objetos: {str(e)}")
+        
+        self._index_from(0)
+        
+        self._signature = self._file_signature()
+        self._loaded = True
+        self._stale = False
+        self.version += 1
+    
+    def _index_from(self, offset: int) -> None:
+        """Indexa las líneas del buffer a partir de una posición"""
+        size = len(self._buffer)
+        while offset < size:
+            end = self._buffer.find(b"\n", offset)
+            if end == -1:
+                end = size
+            line = bytes(self._buffer[offset:end])
+            if line.strip():
+                self._index_line(line, offset, end - offset)
+            offset = end + 1
+    
+    def _index_line(self, line: bytes, offset: int, length: int) -> None:
+        """Añade una línea al índice (la última línea de cada id es la vigente)"""
+        match = _ID_PREFIX.match(line)
+        if match:
+            raw_id = match.group(1)
+            item_id = json.loads(b'"' + raw_id + b'"') if b"\\" in raw_id else raw_id.decode("utf-8")
+            deleted = line.rstrip().endswith(_TOMBSTONE_SUFFIX)
+        else:
+            # Línea escrita a mano o por otra herramienta: decodificarla entera
+            try:
+                data = json.loads(line)
+            except ValueError:
+                self._garbage += 1
+                return
+            item_id = data.get("id", "")
+            deleted = bool(data.get("_deleted"))
+        
+        # La línea anterior del mismo id queda obsoleta, y también la propia marca de borrado
+        if item_id in self._index:
+            self._garbage += 1
+        if deleted:
+            self._index.pop(item_id, None)
+            self._garbage += 1
+        else:
+            self._index[item_id] = (offset, length)
+    
+    def invalidate(self) -> None:
+        """Marca el catálogo para comprobar el archivo en el siguiente acceso"""
+        self._stale = True
+    
+    def ids(self) -> List[str]:
+        """
+        Obtiene los ids de los objetos vigentes
+        
+        Returns:
+            List[str]: Ids en orden de inserción
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._index)
+    
+    def __contains__(self, item_id: str) -> bool:
+        self._ensure_loaded()
+        return item_id in self._index
+    
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._index)
+    
+    def get(self, item_id: str) -> Optional[Dict]:
+        """
+        Decodifica un objeto del catálogo
+        
+        Args:
+            item_id (str): ID del objeto
+        
+        Returns:
+            Optional[Dict]: Datos del objeto (diccionario nuevo en cada llamada) o None
+        """
+        with self._lock:
+            self._ensure_loaded()
+            position = self._index.get(item_id)
+            if position is None:
+                return None
+            offset, length = position
+            line = bytes(self._buffer[offset:offset + length])
+        return json.loads(line)
+    
+    # ----- Escritura -----
+    
+    @contextmanager
+    def _file_lock(self):
+        """
+        Bloquea el catálogo frente a otros procesos que escriben en el mismo directorio
+        
+        Se bloquea un archivo ".lock" aparte porque compactar sustituye el catálogo.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path + ".lock", 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    
+    def _catch_up(self, size: int) -> None:
+        """Incorpora lo que otro proceso haya escrito en el archivo desde la última lectura"""
+        start = len(self._buffer)
+        if size > start and (not self._buffer or self._buffer.endswith(b"\n")):
+            # Sólo se añadieron líneas: leer e indexar la cola
+            with open(self.path, 'rb') as f:
+                f.seek(start)
+                self._buffer += f.read(size - start)
+            self._index_from(start)
+            self.version += 1
+        else:
+            self._load()
+    
+    def _append(self, line: bytes) -> int:
+        """Añade una línea al final del archivo y devuelve su posición"""
+        with self._file_lock():
+            self._ensure_loaded(verify=True)
+            with open(self.path, 'ab') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() != len(self._buffer):
+                    self._catch_up(f.tell())
+                
+                # Si el archivo no acaba en salto de línea (editado a mano), añadirlo
+                prefix = b"\n" if self._buffer and not self._buffer.endswith(b"\n") else b""
+                offset = f.tell() + len(prefix)
+                f.write(prefix + line + b"\n")
+            
+            self._buffer += prefix + line + b"\n"
+            self._signature = self._file_signature()
+        return offset
+    
+    def put(self, data: Dict) -> None:
+        """
+        Guarda (o sustituye) un objeto
+        
+        Args:
+            data (Dict): Datos del objeto; debe tener "id"
+        """
+        # El id va siempre primero para poder indexar la línea sin decodificarla
+        record = {"id": data.get("id", "")}
+        record.update((key, value) for key, value in data.items() if key != "id")
+        line = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        
+        with self._lock:
+            offset = self._append(line)
+            if record["id"] in self._index:
+                self._garbage += 1
+            self._index[record["id"]] = (offset, len(line))
+            self.version += 1
+            self._maybe_compact()
+    
+    def remove(self, item_id: str) -> bool:
+        """
+        Elimina un objeto añadiendo una marca de borrado
+        
+        Args:
+            item_id (str): ID del objeto
+        
+        Returns:
+            bool: True si el objeto existía
+        """
+        line = json.dumps({"id": item_id}, ensure_ascii=False).encode("utf-8")[:-1] + _TOMBSTONE_SUFFIX
+        with self._lock:
+            self._ensure_loaded()
+            if item_id not in self._index:
+                return False
+            
+            self._append(line)
+            del self._index[item_id]
+            self._garbage += 2
+            self.version += 1
+            self._maybe_compact()
+            return True
+    
+    def _maybe_compact(self) -> None:
+        """Compacta el archivo si acumula demasiadas líneas obsoletas"""
+        if self._garbage >= _COMPACT_MIN_GARBAGE and self._garbage > len(self._index):
+            self.compact()
+    
+    def compact(self) -> None:
+        """Reescribe el archivo sólo con las líneas vigentes"""
+        with self._lock, self._file_lock():
+            self._ensure_loaded(verify=True)
+            buffer = bytearray()
+            index = {}
+            for item_id, (offset, length) in self._index.items():
+                index[item_id] = (len(buffer), length)
+                buffer += self._buffer[offset:offset + length] + b"\n"
+            
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(buffer)
+            os.replace(temp_path, self.path)
+            
+            self._buffer = buffer
+            self._index = index
+            self._garbage = 0
+            self._signature = self._file_signature()
+    
+    # ----- Migración -----
+    
+    def _migrate_legacy(self) -> None:
+        """Incorpora al catálogo los objetos guardados con el formato antiguo (un archivo por objeto)"""
+        legacy_dir = os.path.join(self.directory, self.item_type)
+        if not os.path.isdir(legacy_dir):
+            return
+        
+        lines = []
+        migrated = []
+        with os.scandir(legacy_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.endswith(".json"):
+                    continue
+                try:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except Exception as e:
+                    print(f"Error al migrar el objeto {entry.name}: {str(e)}")
+                    continue
+                data.setdefault("id", entry.name[:-5])
+                record = {"id": data["id"]}
+                record.update((key, value) for key, value in data.items() if key != "id")
+                lines.append(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+                migrated.append(entry.path)
+        
+        if lines:
+            # Los objetos antiguos van delante: si un id ya está en el catálogo, gana el del catálogo
+            existing = b""
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as f:
+                    existing = f.read()
+                if existing and not existing.endswith(b"\n"):
+                    existing += b"\n"
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(b"\n".join(lines) + b"\n" + existing)
+            os.replace(temp_path, self.path)
+        
+        for path in migrated:
+            os.remove(path)
+        try:
+            os.rmdir(legacy_dir)
+        except OSError:
+            pass
+
+
+# Catálogos abiertos, uno por tipo de objeto
+_catalogs: Dict[str, ItemCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(item_type: str) -> ItemCatalog:
+    """
+    Obtiene el catálogo de un tipo de objeto
+    
+    Args:
+        item_type (str): Tipo de objeto
+    
+    Returns:
+        ItemCatalog: Catálogo compartido del tipo
+    """
+    with _catalogs_lock:
+        catalog = _catalogs.get(item_type)
+        if catalog is None or catalog.directory != DIRECTORIO_OBJETOS:
+            catalog = ItemCatalog(item_type)
+            _catalogs[item_type] = catalog
+            _registries.pop(item_type, None)
+        return catalog
+
+
+def migrate_legacy_items() -> None:
+    """Convierte todos los objetos del formato antiguo (un archivo por objeto) a catálogos"""
+    for item_type in ITEM_TYPES:
+        get_catalog(item_type)._ensure_loaded()
+
+
+class ItemIdRegistry:
+    """
+    Registro en memoria de los ids ocupados de un tipo de objeto
+    
+    Se carga una vez desde el catálogo y se mantiene al guardar y eliminar. Recuerda el
+    siguiente sufijo libre de cada nombre, así que generar un id no recorre los ids ya
+    usados ni consulta el disco. Un id entregado queda reservado aunque el objeto aún no
+    se haya guardado, de modo que dos hilos que crean objetos a la vez nunca reciben el
+    mismo id.
+    """
+    
+    def __init__(self, item_type: str):
+        """
+        Inicializa el registro (sin cargarlo todavía)
+        
+        Args:
+            item_type (str): Tipo de objeto
+        """
+        self.item_type = item_type
+        self._ids = set()
+        self._reserved = set()
+        # Siguiente sufijo a probar para cada slug
+        self._next_suffix: Dict[str, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+    
+    def _ensure_loaded(self) -> None:
+        """Carga los ids del catálogo (debe llamarse con el cerrojo tomado)"""
+        if not self._loaded:
+            self._ids = set(get_catalog(self.item_type).ids()) | self._reserved
+            self._loaded = True
+    
+    def invalidate(self) -> None:
+        """Vuelve a cargar los ids del catálogo en el siguiente uso (cambios externos)"""
+        with self._lock:
+            self._loaded = False
+    
+    def reserve(self, slug: str) -> str:
+        """
+        Entrega un id libre para un nombre y lo marca como ocupado
+        
+        Args:
+            slug (str): Nombre normalizado del objeto
+        
+        Returns:
+            str: ID único
+        """
+        base_id = f"{self.item_type}_{slug}"
+        with self._lock:
+            self._ensure_loaded()
+            counter = self._next_suffix.get(slug, 0)
+            item_id = base_id if counter == 0 else f"{base_id}_{counter}"
+            while item_id in self._ids:
+                counter += 1
+                item_id = f"{base_id}_{counter}"
+            self._next_suffix[slug] = counter + 1
+            self._ids.add(item_id)
+            self._reserved.add(item_id)
+            return item_id
+    
+    def add(self, item_id: str) -> None:
+        """
+        Marca un id como ocupado tras guardar su objeto
+        
+        Args:
+            item_id (str): ID del objeto
+        """
+        with self._lock:
+            self._ensure_loaded()
+            self._ids.add(item_id)
+            self._reserved.discard(item_id)
+    
+    def discard(self, item_id: str) -> None:
+        """
+        Libera un id tras eliminar su objeto
+        
+        El sufijo no se reutiliza para ese nombre, así que un id eliminado no se vuelve
+        a entregar durante la sesión.
+        
+        Args:
+            item_id (str): ID del objeto
+        """
+        with self._lock:
+            self._ids.discard(item_id)
+            self._reserved.discard(item_id)
+    
+    def __contains__(self, item_id: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return item_id in self._ids
+
+
+# Registros de ids, uno por tipo de objeto
+_registries: Dict[str, ItemIdRegistry] = {}
+
+
+def get_id_registry(item_type: str) -> ItemIdRegistry:
+    """
+    Obtiene el registro de ids de un tipo de objeto
+    
+    Args:
+        item_type (str): Tipo de objeto
+    
+    Returns:
+        ItemIdRegistry: Registro compartido del tipo
+    """
+    get_catalog(item_type)
+    with _catalogs_lock:
+        registry = _registries.get(item_type)
+        if registry is None:
+            registry = ItemIdRegistry(item_type)
+            _registries[item_type] = registry
+        return registry
+
+
+def _on_catalog_change(event) -> None:
+    """Marca como desactualizado el catálogo afectado por un cambio en disco"""
+    if event.tipo == REINICIADO:
+        for catalog in list(_catalogs.values()):
+            catalog.invalidate()
+        for registry in list(_registries.values()):
+            registry.invalidate()
+        return
+    
+    name = os.path.basename(event.ruta)
+    if name.endswith(CATALOG_EXTENSION):
+        item_type = name[:-len(CATALOG_EXTENSION)]
+        catalog = _catalogs.get(item_type)
+        if catalog is not None:
+            catalog.invalidate()
+        registry = _registries.get(item_type)
+        if registry is not None:
+            registry.invalidate()
+
+
+suscribir(DIRECTORIO_OBJETOS, _on_catalog_change)
+
+
 def save_item(item: Item) -> bool:
     """
-    Guarda un objeto en el sistema de archivos
+    Guarda un objeto en el catálogo de su tipo
     
     Args:
         item (Item): Objeto a guardar
@@ -195,16 +867,9 @@ def save_item(item: Item) -> bool:
     Returns:
         bool: True si se guardó correctamente, False en caso contrario
     """
-    # Asegurar que el directorio existe
-    os.makedirs(DIRECTORIO_OBJETOS, exist_ok=True)
-    os.makedirs(os.path.join(DIRECTORIO_OBJETOS, item.item_type), exist_ok=True)
-    
-    # Ruta del archivo
-    filepath = os.path.join(DIRECTORIO_OBJETOS, item.item_type, f"{item.id}.json")
-    
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(item.to_dict(), f, ensure_ascii=False, indent=4)
+        get_catalog(item.item_type).put(item.to_dict())
+        get_id_registry(item.item_type).add(item.id)
         return True
     except Exception as e:
         print(f"Error al guardar el objeto: {str(e)}")
@@ -213,7 +878,7 @@ def save_item(item: Item) -> bool:
 
 def load_item(item_type: str, item_id: str) -> Optional[Item]:
     """
-    Carga un objeto desde el sistema de archivos
+    Carga un objeto desde el catálogo de su tipo
     
     Args:
         item_type (str): Tipo de objeto
@@ -222,18 +887,12 @@ def load_item(item_type: str, item_id: str) -> Optional[Item]:
     Returns:
         Optional[Item]: Objeto cargado o None si no se encuentra
     """
-    filepath = os.path.join(DIRECTORIO_OBJETOS, item_type, f"{item_id}.json")
-    
-    if not os.path.exists(filepath):
-        return None
-    
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return Item.from_dict(data)
+        data = get_catalog(item_type).get(item_id)
     except Exception as e:
         print(f"Error al cargar el objeto: {str(e)}")
         return None
+    return Item.from_dict(data) if data is not None else None
 
 
 def load_all_items_by_type(item_type: str) -> List[Item]:
@@ -246,19 +905,12 @@ def load_all_items_by_type(item_type: str) -> List[Item]:
     Returns:
         List[Item]: Lista de objetos del tipo especificado
     """
+    catalog = get_catalog(item_type)
     items = []
-    type_dir = os.path.join(DIRECTORIO_OBJETOS, item_type)
-    
-    if not os.path.exists(type_dir):
-        os.makedirs(type_dir, exist_ok=True)
-        return items
-    
-    for filename in os.listdir(type_dir):
-        if filename.endswith('.json'):
-            item_id = filename[:-5]  # Quitar la extensión .json
-            item = load_item(item_type, item_id)
-            if item:
-                items.append(item)
+    for item_id in catalog.ids():
+        item = load_item(item_type, item_id)
+        if item:
+            items.append(item)
     
     return items
 
@@ -272,9 +924,6 @@ def load_all_items() -> Dict[str, List[Item]]:
     """
     all_items = {}
     
-    # Asegurar que el directorio existe
-    os.makedirs(DIRECTORIO_OBJETOS, exist_ok=True)
-    
     for item_type in ITEM_TYPES:
         all_items[item_type] = load_all_items_by_type(item_type)
     
@@ -283,7 +932,7 @@ def load_all_items() -> Dict[str, List[Item]]:
 
 def delete_item(item_type: str, item_id: str) -> bool:
     """
-    Elimina un objeto del sistema de archivos
+    Elimina un objeto del catálogo de su tipo
     
     Args:
         item_type (str): Tipo de objeto
@@ -292,14 +941,10 @@ def delete_item(item_type: str, item_id: str) -> bool:
     Returns:
         bool: True si se eliminó correctamente, False en caso contrario
     """
-    filepath = os.path.join(DIRECTORIO_OBJETOS, item_type, f"{item_id}.json")
-    
-    if not os.path.exists(filepath):
-        return False
-    
     try:
-        os.remove(filepath)
-        return True
+        removed = get_catalog(item_type).remove(item_id)
+        get_id_registry(item_type).discard(item_id)
+        return removed
     except Exception as e:
         print(f"Error al eliminar el objeto: {str(e)}")
         return False
@@ -309,6 +954,9 @@ def generate_unique_id(item_type: str, name: str) -> str:
     """
     Genera un ID único para un objeto basado en su tipo y nombre
     
+    El ID queda reservado, así que llamadas sucesivas (o desde otros hilos) nunca
+    devuelven el mismo aunque el objeto aún no se haya guardado.
+    
     Args:
         item_type (str): Tipo de objeto
         name (str): Nombre del objeto
@@ -321,15 +969,8 @@ def generate_unique_id(item_type: str, name: str) -> str:
     # Eliminar caracteres especiales
     slug = ''.join(c for c in slug if c.isalnum() or c == '_')
     
-    # Comprobar si ya existe un objeto con este ID
-    counter = 0
-    item_id = f"{item_type}_{slug}"
-    
-    while os.path.exists(os.path.join(DIRECTORIO_OBJETOS, item_type, f"{item_id}.json")):
-        counter += 1
-        item_id = f"{item_type}_{slug}_{counter}"
-    
-    return item_id
+    # Reservar el primer ID libre en el registro en memoria
+    return get_id_registry(item_type).reserve(slug)
 
 
 # Constantes para armaduras y otros objetos comunes
@@ -641,27 +1282,31 @@ def calculate_character_ac(character_data, equipped_items):
     
     # Inicializar valores
     base_ac = 10  # CA base sin armadura
+    dex_limit = None
     ac_items = {}  # Contribución de cada item a la CA
-    final_dex_mod = dex_mod  # Modificador de destreza que se aplicará
     
     # Armadura
     armor = equipped_items.get("armor")
     if armor:
-        base_ac = armor.get_ac_bonus()
-        dex_limit = armor.get_dex_bonus_limit()
-        if dex_limit is not None:
-            final_dex_mod = min(dex_mod, dex_limit)
-        ac_items["armor"] = armor.get_ac_bonus()
+        base_ac = armor.ac_bonus
+        dex_limit = armor.dex_bonus_limit
+        ac_items["armor"] = armor.ac_bonus
     
-    # Añadir otros objetos
+    # Añadir otros objetos (el escudo por separado, como en el motor de CA)
+    shield_bonus = 0
+    other_bonus = 0
     for slot, item in equipped_items.items():
         if slot != "armor" and item:
-            ac_bonus = item.get_ac_bonus()
+            ac_bonus = item.ac_bonus
             if ac_bonus > 0:
                 ac_items[slot] = ac_bonus
+                if slot == "shield":
+                    shield_bonus += ac_bonus
+                else:
+                    other_bonus += ac_bonus
     
-    # Calcular AC total
-    total_ac = base_ac + final_dex_mod + sum(ac_items.values())
+    # Calcular AC total con el motor compartido (la armadura ya está contada en base_ac)
+    final_dex_mod, _, total_ac = calcular_ca_nucleo(base_ac, dex_limit, dex_mod, shield_bonus, other_bonus)
     
     # Devolver información detallada
     return {
@@ -672,6 +1317,85 @@ def calculate_character_ac(character_data, equipped_items):
     }
 
 
+
+# ----- Evaluación de CA por lotes con NumPy -----
+
+# Límite de Destreza con el que se codifican las armaduras sin límite
+NO_DEX_CAP = 99
+
+
+def encode_loadout(equipped_items) -> Tuple[int, int, int]:
+    """
+    Codifica un equipo como los tres números que determinan su CA
+    
+    Args:
+        equipped_items (Dict): Objetos equipados en cada slot
+    
+    Returns:
+        Tuple[int, int, int]: (CA base, límite de Destreza, bonificadores planos)
+    """
+    base_ac = 10
+    dex_cap = NO_DEX_CAP
+    flat_bonus = 0
+    for slot, item in equipped_items.items():
+        if not item:
+            continue
+        if slot == "armor":
+            base_ac = item.ac_bonus
+            if item.dex_bonus_limit is not None:
+                dex_cap = item.dex_bonus_limit
+        elif item.ac_bonus > 0:
+            flat_bonus += item.ac_bonus
+    return base_ac, dex_cap, flat_bonus
+
+
+def encode_loadouts(loadouts):
+    """
+    Codifica varios equipos en tres arrays de NumPy
+    
+    Args:
+        loadouts (List[Dict]): Equipos (slot -> objeto)
+    
+    Returns:
+        tuple: Arrays (CA base, límite de Destreza, bonificadores planos) con un valor por equipo
+    """
+    import numpy as np
+    
+    encoded = np.array([encode_loadout(loadout) for loadout in loadouts], dtype=np.int16).reshape(-1, 3)
+    return encoded[:, 0], encoded[:, 1], encoded[:, 2]
+
+
+def calculate_ac_batch(dex_modifiers, base_ac, dex_cap, flat_bonus, pairwise: bool = True):
+    """
+    Calcula la CA de muchos personajes y equipos en una sola pasada
+    
+    Usa las mismas reglas que calculate_character_ac: CA base de la armadura (10 sin
+    armadura) más el modificador de Destreza limitado por la armadura, más los
+    bonificadores planos del resto de objetos.
+    
+    Args:
+        dex_modifiers (array-like): Modificadores de Destreza
+        base_ac (array-like): CA base de cada equipo
+        dex_cap (array-like): Límite de Destreza de cada equipo (NO_DEX_CAP si no tiene)
+        flat_bonus (array-like): Suma de bonificadores planos de cada equipo
+        pairwise (bool): Si es True se evalúan todas las combinaciones personaje x equipo;
+            si es False los arrays se combinan elemento a elemento (con broadcasting)
+    
+    Returns:
+        numpy.ndarray: Matriz (personajes x equipos) con la CA, o el resultado elemento a elemento
+    """
+    import numpy as np
+    
+    dex_modifiers = np.asarray(dex_modifiers, dtype=np.int16)
+    base_ac = np.asarray(base_ac, dtype=np.int16)
+    dex_cap = np.asarray(dex_cap, dtype=np.int16)
+    flat_bonus = np.asarray(flat_bonus, dtype=np.int16)
+    
+    if pairwise:
+        dex_modifiers = dex_modifiers.reshape(-1, 1)
+    
+    return base_ac + flat_bonus + np.minimum(dex_modifiers, dex_cap)
+
 # Código de inicialización
 if __name__ == "__main__":
     # Inicializar objetos por defecto si no existen
@@ -8,6 +8,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import json
 import os
+import sys
+
+# Añadir directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.cache_personajes import (cargar_personaje, listar_personajes, referencia_jugador,
+                                    normalizar_jugadores, unir_jugadores)
+from utils.indice_campanas import registrar_campana, aplicar_cambios_sesion
 
 def mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, callback_cargar_campana, callback_menu):
     """
@@ -51,8 +58,12 @@ def mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, cal
     editar_campana_frame.bind("<Configure>", configure_frame)
     canvas.bind("<Configure>", lambda e: configure_frame(e))
     
-    # Jugadores de la campaña
-    jugadores = campana.get("jugadores", [])
+    # Jugadores de la campaña (referencias a los archivos de personaje; las campañas
+    # antiguas con copias de los personajes se convierten al guardar)
+    jugadores = normalizar_jugadores(campana.get("jugadores", []))
+    # Aplicar los renombrados/eliminaciones de personajes hechos mientras estaba abierta
+    aplicar_cambios_sesion(jugadores)
+    campana["jugadores"] = jugadores
     
     # Título y descripción
     titulo = ttk.Label(editar_campana_frame, text="Editar Campaña", style="Title.TLabel")
@@ -137,11 +148,11 @@ def mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, cal
         for i, col in enumerate(cols):
             ttk.Label(jugadores_list_frame, text=col, font=('Helvetica', 11, 'bold')).grid(row=0, column=i, padx=5, pady=5, sticky="w")
         
-        # Añadir jugadores
-        for i, jugador in enumerate(jugadores):
-            ttk.Label(jugadores_list_frame, text=jugador["nombre"]).grid(row=i+1, column=0, padx=5, pady=3, sticky="w")
-            ttk.Label(jugadores_list_frame, text=jugador["clase"]).grid(row=i+1, column=1, padx=5, pady=3, sticky="w")
-            ttk.Label(jugadores_list_frame, text=jugador["raza"]).grid(row=i+1, column=2, padx=5, pady=3, sticky="w")
+        # Añadir jugadores con los datos actuales de sus personajes
+        for i, jugador in enumerate(unir_jugadores(jugadores)):
+            ttk.Label(jugadores_list_frame, text=jugador.get("nombre", "")).grid(row=i+1, column=0, padx=5, pady=3, sticky="w")
+            ttk.Label(jugadores_list_frame, text=jugador.get("clase", "")).grid(row=i+1, column=1, padx=5, pady=3, sticky="w")
+            ttk.Label(jugadores_list_frame, text=jugador.get("raza", "")).grid(row=i+1, column=2, padx=5, pady=3, sticky="w")
             # Mostrar nivel con formato más claro
             nivel = jugador.get("nivel", 1)
             experiencia = jugador.get("experiencia", 0)
@@ -163,7 +174,8 @@ def mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, cal
     def eliminar_jugador(indice):
         """Elimina un jugador de la lista de la campaña"""
         if 0 <= indice < len(jugadores):
-            if messagebox.askyesno("Confirmar", f"¿Está seguro que desea eliminar al jugador '{jugadores[indice].get('nombre', '')}'?"):
+            nombre = unir_jugadores([jugadores[indice]])[0].get("nombre", "")
+            if messagebox.askyesno("Confirmar", f"¿Está seguro que desea eliminar al jugador '{nombre}'?"):
                 del jugadores[indice]
                 actualizar_lista_jugadores()
     
@@ -182,50 +194,22 @@ def mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, cal
             messagebox.showinfo("Información", f"El archivo del personaje '{personaje.get('nombre', '')}' no existe.")
             return
         
-        # Cargar datos completos del personaje
-        try:
-            with open(ruta_personaje, 'r', encoding='utf-8') as f:
-                datos_personaje = json.load(f)
-            
-            # Función de callback para cuando se termina de editar el personaje
-            def callback_edicion():
-                # Actualizar datos del personaje en la campaña
-                try:
-                    # Recargar el personaje editado
-                    with open(ruta_personaje, 'r', encoding='utf-8') as f:
-                        personaje_actualizado = json.load(f)
-                    
-                    # Actualizar datos básicos en la campaña
-                    jugadores[indice].update({
-                        "nombre": personaje_actualizado.get("nombre", ""),
-                        "clase": personaje_actualizado.get("clase", ""),
-                        "raza": personaje_actualizado.get("raza", ""),
-                        "nivel": personaje_actualizado.get("nivel", 1),
-                        "experiencia": personaje_actualizado.get("experiencia", 0),
-                        "archivo": personaje_actualizado.get("archivo", ""),
-                        "estadisticas": personaje_actualizado.get("estadisticas", {}),
-                        "competencias": personaje_actualizado.get("competencias", [])
-                    })
-                    
-                    # Actualizar vista
-                    actualizar_lista_jugadores()
-                    
-                    # Mostrar mensaje de éxito
-                    messagebox.showinfo("Éxito", "Personaje actualizado correctamente.")
-                    
-                except Exception as e:
-                    messagebox.showerror("Error", f"Error al actualizar el personaje: {str(e)}")
-                
-                # Mostrar de nuevo la pantalla de edición de campaña
-                mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, 
-                                     callback_cargar_campana, callback_menu)
-            
-            # Mostrar pantalla de edición de personaje
-            from modulos.gestor_personajes import mostrar_crear_editar_personaje
-            mostrar_crear_editar_personaje(root, datos_personaje, directorio_personajes, callback_edicion)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar los detalles del personaje: {str(e)}")
+        # Cargar datos completos del personaje (copia editable desde la caché)
+        datos_personaje = cargar_personaje(archivo_personaje)
+        if datos_personaje is None:
+            messagebox.showerror("Error", "Error al cargar los detalles del personaje.")
+            return
+        
+        # Función de callback para cuando se termina de editar el personaje
+        def callback_edicion():
+            # La campaña sólo guarda la referencia al archivo, así que no hay que
+            # copiar nada: la lista se vuelve a unir con la caché al mostrarse
+            mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, 
+                                 callback_cargar_campana, callback_menu)
+        
+        # Mostrar pantalla de edición de personaje
+        from modulos.gestor_personajes import mostrar_crear_editar_personaje
+        mostrar_crear_editar_personaje(root, datos_personaje, directorio_personajes, callback_edicion)
     
     def mostrar_agregar_jugador():
         """Muestra diálogo para seleccionar personajes y agregarlos a la campaña"""
@@ -237,17 +221,13 @@ def mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, cal
             messagebox.showinfo("Información", "No hay personajes creados todavía. Primero cree personajes en el Gestor de Personajes.")
             return
         
-        # Cargar personajes disponibles
+        # Cargar personajes disponibles (los que no estén ya en la campaña)
         personajes_disponibles = []
         try:
-            for archivo in os.listdir(directorio_personajes):
-                if archivo.endswith('.json'):
-                    ruta = os.path.join(directorio_personajes, archivo)
-                    with open(ruta, 'r', encoding='utf-8') as f:
-                        datos = json.load(f)
-                        # Verificar que el personaje no esté ya en la campaña
-                        if not any(p["nombre"] == datos["nombre"] for p in jugadores):
-                            personajes_disponibles.append(datos)
+            archivos_campana = {jugador.get("archivo", "") for jugador in jugadores}
+            for datos in listar_personajes():
+                if datos.get("archivo", "") not in archivos_campana:
+                    personajes_disponibles.append(datos)
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar los personajes: {str(e)}")
             return
@@ -335,19 +315,8 @@ def mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, cal
             personajes_seleccionados = []
             for i, var in seleccion_vars.items():
                 if var.get():
-                    personaje = personajes_disponibles[i]
-                    # Agregar solo los datos necesarios del personaje
-                    datos_jugador = {
-                        "nombre": personaje.get("nombre", ""),
-                        "clase": personaje.get("clase", ""),
-                        "raza": personaje.get("raza", ""),
-                        "nivel": personaje.get("nivel", 1),
-                        "experiencia": personaje.get("experiencia", 0),
-                        "archivo": personaje.get("archivo", ""),  # Referencia al archivo original
-                        "estadisticas": personaje.get("estadisticas", {}),
-                        "competencias": personaje.get("competencias", []),
-                    }
-                    personajes_seleccionados.append(datos_jugador)
+                    # Guardar sólo la referencia al archivo del personaje
+                    personajes_seleccionados.append(referencia_jugador(personajes_disponibles[i]))
             
             # Agregar a la lista de jugadores
             jugadores.extend(personajes_seleccionados)
@@ -418,6 +387,7 @@ def mostrar_editar_campana(root, campana, ruta_campana, directorio_campanas, cal
         try:
             with open(ruta_campana, 'w', encoding='utf-8') as f:
                 json.dump(campana, f, ensure_ascii=False, indent=4)
+            registrar_campana(ruta_campana, campana)
             
             messagebox.showinfo("Éxito", f"Campaña '{nombre_campana.get()}' guardada correctamente.")
             
@@ -6,9 +6,13 @@ Este es un puente para utilizar el gestor de personajes existente.
 """
 
 import os
-import json
+import sys
 from tkinter import messagebox
 
+# Añadir directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.cache_personajes import cargar_personaje
+
 def mostrar_editar_personaje(root, personaje, callback_edicion=None):
     """
     Abre el editor de personajes para editar un personaje desde la campaña
@@ -31,10 +35,11 @@ def mostrar_editar_personaje(root, personaje, callback_edicion=None):
         messagebox.showinfo("Información", f"El archivo del personaje '{personaje.get('nombre', '')}' no existe.")
         return
     
-    # Cargar datos completos del personaje
+    # Cargar datos completos del personaje (copia editable desde la caché)
     try:
-        with open(ruta_personaje, 'r', encoding='utf-8') as f:
-            datos_personaje = json.load(f)
+        datos_personaje = cargar_personaje(archivo_personaje)
+        if datos_personaje is None:
+            raise ValueError("el archivo no contiene un personaje válido")
         
         # Mostrar pantalla de edición de personaje
         from modulos.gestor_personajes import mostrar_crear_editar_personaje
@@ -10,8 +10,16 @@ from tkinter import ttk, messagebox, font, filedialog, scrolledtext
 import json
 import os
 import re
+import sys
 from PIL import Image, ImageTk
-import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.dados import parsear_dados, tirar_dados
+from utils.matriz_hechizos import (CA_REFERENCIA, MODIFICADOR_REFERENCIA, MODIFICADORES_LANZADOR, NIVELES_ESPACIO,
+                                   obtener_matriz)
+from utils.optimizador_conjuros import optimizar_conjuros
+from utils.servicio_aleatorio import generador as generador_aleatorio
+from utils.tablas_reglas import bonificador_competencia
+from utils.vigilante_archivos import suscribir, vigilando
 
 # Constantes para hechizos
 ESCUELAS = ["Abjuración", "Adivinación", "Conjuración", "Encantamiento", 
@@ -54,6 +62,16 @@ TIPOS_DAÑO = [
 DIRECTORIO_HECHIZOS = "data/hechizos"
 ARCHIVO_HECHIZOS = "hechizos.json"
 
+# Caché de la base de datos de hechizos: sólo se vuelve a leer si el archivo cambió
+_cache_hechizos = {"firma": None, "datos": None}
+
+def _invalidar_cache_hechizos(evento=None):
+    """Descarta la caché de hechizos (también se usa como suscriptor del vigilante)"""
+    _cache_hechizos["firma"] = None
+    _cache_hechizos["datos"] = None
+
+suscribir(DIRECTORIO_HECHIZOS, _invalidar_cache_hechizos)
+
 def inicializar_directorios():
     """Crea el directorio para hechizos si no existe"""
     if not os.path.exists(DIRECTORIO_HECHIZOS):
@@ -77,17 +95,27 @@ def cargar_hechizos():
             json.dump(hechizos_vacios, f, ensure_ascii=False, indent=4)
         return hechizos_vacios
     
-    # Cargar hechizos
+    # Cargar hechizos (desde la caché si el archivo no ha cambiado)
     try:
-        with open(ruta_hechizos, 'r', encoding='utf-8') as f:
-            hechizos = json.load(f)
-        
-        # Asegurarse de que todos los niveles estén presentes
-        for nivel in range(10):
-            if str(nivel) not in hechizos:
-                hechizos[str(nivel)] = []
+        datos = _cache_hechizos["datos"]
+        if datos is None or not vigilando(DIRECTORIO_HECHIZOS):
+            estado = os.stat(ruta_hechizos)
+            firma = (estado.st_mtime_ns, estado.st_size)
+            if datos is None or _cache_hechizos["firma"] != firma:
+                with open(ruta_hechizos, 'r', encoding='utf-8') as f:
+                    datos = json.load(f)
+                
+                # Asegurarse de que todos los niveles estén presentes
+                for nivel in range(10):
+                    if str(nivel) not in datos:
+                        datos[str(nivel)] = []
+                
+                _cache_hechizos["firma"] = firma
+                _cache_hechizos["datos"] = datos
         
-        return hechizos
+        # Copiar las listas por nivel para que quien las reciba pueda añadir o quitar
+        # hechizos sin alterar la caché (los hechizos en sí no se modifican en el sitio)
+        return {nivel: list(lista) for nivel, lista in datos.items()}
     except Exception as e:
         messagebox.showerror("Error", f"Error al cargar los hechizos: {str(e)}")
         return {str(nivel): [] for nivel in range(10)}
@@ -106,6 +134,7 @@ def guardar_hechizos(hechizos):
     try:
         with open(ruta_hechizos, 'w', encoding='utf-8') as f:
             json.dump(hechizos, f, ensure_ascii=False, indent=4)
+        _invalidar_cache_hechizos()
         return True
     except Exception as e:
         messagebox.showerror("Error", f"Error al guardar los hechizos: {str(e)}")
@@ -343,7 +372,7 @@ def buscar_hechizos(filtro=None, nivel=None, escuela=None, clase=None):
     
     return resultados
 
-def calcular_daño(formula, nivel_lanzado=None, modificador=0):
+def calcular_daño(formula, nivel_lanzado=None, modificador=0, generador=None):
     """
     Calcula el daño o curación según una fórmula de dados
     
@@ -351,6 +380,8 @@ def calcular_daño(formula, nivel_lanzado=None, modificador=0):
         formula (str): Fórmula de dados (ej: "2d6+3")
         nivel_lanzado (int, optional): Nivel al que se lanza el hechizo. Por defecto None.
         modificador (int, optional): Modificador adicional a aplicar. Por defecto 0.
+        generador (numpy.random.Generator, optional): Generador para la tirada. Por defecto
+            el flujo "hechizos" del servicio aleatorio compartido.
     
     Returns:
         tuple: (mínimo, promedio, máximo, resultado aleatorio)
@@ -359,18 +390,12 @@ def calcular_daño(formula, nivel_lanzado=None, modificador=0):
         return (0, 0, 0, 0)
     
     # Extraer componentes de la fórmula
-    patron = r'^(\d+)d(\d+)([+-]\d+)?$'
-    match = re.match(patron, formula)
+    dados = parsear_dados(formula)
     
-    if not match:
+    if not dados:
         return (0, 0, 0, 0)
     
-    num_dados = int(match.group(1))
-    tipo_dado = int(match.group(2))
-    mod_adicional = 0
-    
-    if match.group(3):
-        mod_adicional = int(match.group(3))
+    num_dados, tipo_dado, mod_adicional = dados
     
     # Valores base
     minimo = num_dados + mod_adicional + modificador
@@ -378,7 +403,9 @@ def calcular_daño(formula, nivel_lanzado=None, modificador=0):
     promedio = (minimo + maximo) / 2
     
     # Tirada aleatoria
-    resultado = sum(random.randint(1, tipo_dado) for _ in range(num_dados)) + mod_adicional + modificador
+    if generador is None:
+        generador = generador_aleatorio("hechizos")
+    resultado = tirar_dados(num_dados, tipo_dado, generador) + mod_adicional + modificador
     
     return (minimo, promedio, maximo, resultado)
 
@@ -460,29 +487,48 @@ def mostrar_gestor_hechizos(root, callback_volver=None):
     clase_filtro_values = ["Todas"] + CLASES_MAGICAS
     ttk.Combobox(filtro_frame, textvariable=clase_filtro_var, values=clase_filtro_values, width=15).grid(row=1, column=3, padx=5, pady=5, sticky="ew")
     
+    # Espacio y modificador con los que se comparan daño y curación esperados
+    ttk.Label(filtro_frame, text="Espacio:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+    espacio_var = tk.StringVar(value="Propio")
+    espacio_values = ["Propio"] + [str(i) for i in range(1, 10)]
+    ttk.Combobox(filtro_frame, textvariable=espacio_var, values=espacio_values, width=10).grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+    
+    ttk.Label(filtro_frame, text="Mod. lanzador:").grid(row=2, column=2, padx=5, pady=5, sticky="w")
+    modificador_var = tk.StringVar(value=str(MODIFICADOR_REFERENCIA))
+    modificador_values = [str(m) for m in MODIFICADORES_LANZADOR]
+    ttk.Combobox(filtro_frame, textvariable=modificador_var, values=modificador_values, width=10).grid(row=2, column=3, padx=5, pady=5, sticky="ew")
+    
     # Botón de filtrar
-    ttk.Button(filtro_frame, text="Aplicar Filtros", command=lambda: actualizar_lista_hechizos()).grid(row=2, column=0, columnspan=4, padx=5, pady=10)
+    ttk.Button(filtro_frame, text="Aplicar Filtros", command=lambda: actualizar_lista_hechizos()).grid(row=3, column=0, columnspan=4, padx=5, pady=10)
     
     # Marco para lista de hechizos
     lista_frame = ttk.LabelFrame(gestor_frame, text="Hechizos Disponibles")
     lista_frame.pack(fill="both", expand=True, padx=20, pady=10)
     
     # Crear Treeview para mostrar los hechizos
-    columnas = ("nombre", "nivel", "escuela", "tipo", "clases")
+    columnas = ("nombre", "nivel", "escuela", "tipo", "clases", "daño", "curacion")
     tree = ttk.Treeview(lista_frame, columns=columnas, show='headings', height=15)
     
     # Configurar columnas - ajustar anchura para evitar cortes
-    tree.heading("nombre", text="Nombre")
-    tree.heading("nivel", text="Nivel")
-    tree.heading("escuela", text="Escuela")
-    tree.heading("tipo", text="Tipo")
-    tree.heading("clases", text="Clases")
+    tree.heading("nombre", text="Nombre", command=lambda: ordenar_lista("nombre"))
+    tree.heading("nivel", text="Nivel", command=lambda: ordenar_lista("nivel"))
+    tree.heading("escuela", text="Escuela", command=lambda: ordenar_lista("escuela"))
+    tree.heading("tipo", text="Tipo", command=lambda: ordenar_lista("tipo"))
+    tree.heading("clases", text="Clases", command=lambda: ordenar_lista("clases"))
+    tree.heading("daño", text=f"Daño esp. (CA {CA_REFERENCIA})", command=lambda: ordenar_lista("daño"))
+    tree.heading("curacion", text="Curación esp.", command=lambda: ordenar_lista("curacion"))
     
     tree.column("nombre", width=200)  # Más ancho
     tree.column("nivel", width=60, anchor="center")
     tree.column("escuela", width=140)  # Más ancho
     tree.column("tipo", width=140)  # Más ancho
     tree.column("clases", width=200)
+    tree.column("daño", width=110, anchor="center")
+    tree.column("curacion", width=100, anchor="center")
+    
+    # Columna y sentido del orden actual, y claves numéricas de cada fila
+    orden_lista = {"columna": None, "descendente": False}
+    valores_esperados = {}
     
     # Añadir scrollbar
     scrollbar_tree = ttk.Scrollbar(lista_frame, orient="vertical", command=tree.yview)
@@ -520,6 +566,21 @@ def mostrar_gestor_hechizos(root, callback_volver=None):
         # Buscar hechizos
         hechizos_filtrados = buscar_hechizos(filtro=texto_busqueda, nivel=nivel, escuela=escuela, clase=clase)
         
+        # Valores esperados desde la matriz precalculada (sólo se recalculan los hechizos editados)
+        matriz = obtener_matriz([h for lista in cargar_hechizos().values() for h in lista])
+        # Un espacio escrito a mano que no sea un nivel válido se trata como "Propio"
+        try:
+            espacio = int(espacio_var.get())
+        except ValueError:
+            espacio = None
+        if espacio is not None and not 0 <= espacio < NIVELES_ESPACIO:
+            espacio = None
+        try:
+            modificador = int(modificador_var.get())
+        except ValueError:
+            modificador = MODIFICADOR_REFERENCIA
+        valores_esperados.clear()
+        
         # Mostrar hechizos en la tabla
         for hechizo in hechizos_filtrados:
             # Determinar tipo de hechizo
@@ -545,13 +606,49 @@ def mostrar_gestor_hechizos(root, callback_volver=None):
             
             clases_texto = ", ".join(clases_abr)
             
+            nombre = hechizo.get("nombre", "")
+            daño = matriz.valor(nombre, espacio, modificador)
+            curacion = matriz.valor(nombre, espacio, modificador, curacion=True)
+            valores_esperados[nombre] = (
+                -1.0 if daño is None else daño,
+                -1.0 if curacion is None else curacion
+            )
+            
             tree.insert("", "end", values=(
-                hechizo.get("nombre", ""),
+                nombre,
                 hechizo.get("nivel", "0"),
                 hechizo.get("escuela", ""),
                 tipo,
-                clases_texto
-            ), tags=(hechizo.get("nombre", "")))
+                clases_texto,
+                "—" if not daño else f"{daño:.1f}",
+                "—" if not curacion else f"{curacion:.1f}"
+            ), tags=(nombre))
+        
+        # Mantener el orden elegido al refrescar la lista
+        if orden_lista["columna"] is not None:
+            ordenar_lista(orden_lista["columna"], cambiar_sentido=False)
+    
+    # Función para ordenar la lista al pulsar la cabecera de una columna
+    def ordenar_lista(columna, cambiar_sentido=True):
+        if cambiar_sentido:
+            if orden_lista["columna"] == columna:
+                orden_lista["descendente"] = not orden_lista["descendente"]
+            else:
+                # Los valores esperados se ordenan de mayor a menor la primera vez
+                orden_lista["columna"] = columna
+                orden_lista["descendente"] = columna in ("daño", "curacion")
+        
+        items = tree.get_children()
+        if columna in ("daño", "curacion"):
+            posicion = 0 if columna == "daño" else 1
+            clave = lambda item: valores_esperados.get(tree.set(item, "nombre"), (-1.0, -1.0))[posicion]
+        elif columna == "nivel":
+            clave = lambda item: int(tree.set(item, "nivel") or 0)
+        else:
+            clave = lambda item: tree.set(item, columna).lower()
+        
+        for indice, item in enumerate(sorted(items, key=clave, reverse=orden_lista["descendente"])):
+            tree.move(item, "", indice)
     
     # Función para mostrar detalles del hechizo seleccionado
     def mostrar_detalles(event):
@@ -1021,7 +1118,7 @@ def mostrar_gestor_hechizos(root, callback_volver=None):
                 mod_atributo = int(mod_attr_var.get())
                 
                 # Calcular CD y bono de ataque
-                bono_comp = 2 + ((nivel_lanzamiento - 1) // 4)  # Bonificador de competencia según nivel
+                bono_comp = bonificador_competencia(nivel_lanzamiento)  # Bonificador de competencia según nivel
                 
                 dc = 8 + bono_comp + mod_atributo
                 dc_var.set(str(dc))
@@ -1760,7 +1857,23 @@ def obtener_hechizos_por_clase_y_nivel(clase, nivel_max=9, nivel_min=0):
     
     return hechizos_disponibles
 
-def simular_lanzamiento_hechizo(hechizo, nivel_lanzamiento=None, estadistica_conjuros=3, bono_competencia=2):
+def optimizar_hechizos_preparados(clase, nivel, estadisticas=None, **opciones):
+    """
+    Elige los hechizos que un personaje debería preparar para maximizar el valor esperado
+    
+    Args:
+        clase (str): Clase del personaje
+        nivel (int): Nivel del personaje
+        estadisticas (dict, optional): Puntuaciones de característica del personaje
+        **opciones: Resto de parámetros de optimizar_conjuros (pesos, fijos, excluidos...)
+        
+    Returns:
+        dict: Trucos, conjuros preparados y rituales elegidos, con su valor esperado
+    """
+    hechizos = [hechizo for lista in cargar_hechizos().values() for hechizo in lista]
+    return optimizar_conjuros(hechizos, clase, nivel, estadisticas, **opciones)
+
+def simular_lanzamiento_hechizo(hechizo, nivel_lanzamiento=None, estadistica_conjuros=3, bono_competencia=2, generador=None):
     """
     Simula el lanzamiento de un hechizo, calculando tiradas de ataque, daño y salvaciones
     
@@ -1769,10 +1882,15 @@ def simular_lanzamiento_hechizo(hechizo, nivel_lanzamiento=None, estadistica_con
         nivel_lanzamiento (int, optional): Nivel al que se lanza el hechizo. Por defecto None (usa el nivel del hechizo).
         estadistica_conjuros (int, optional): Modificador de la estadística de conjuros. Por defecto 3.
         bono_competencia (int, optional): Bonificador de competencia. Por defecto 2.
+        generador (numpy.random.Generator, optional): Generador para las tiradas. Por defecto
+            el flujo del hechizo en el servicio aleatorio compartido.
         
     Returns:
         dict: Resultados de la simulación
     """
+    if generador is None:
+        generador = generador_aleatorio("hechizos", hechizo.get("nombre", ""))
+    
     # Si no se especifica nivel de lanzamiento, usar nivel del hechizo
     if nivel_lanzamiento is None:
         nivel_lanzamiento = int(hechizo.get("nivel", 0))
@@ -1805,10 +1923,13 @@ def simular_lanzamiento_hechizo(hechizo, nivel_lanzamiento=None, estadistica_con
         }
     }
     
+    # Tiradas de d20 de ataque y salvación de una vez
+    d20_ataque, d20_salvacion = (int(tirada) for tirada in generador.integers(1, 21, size=2))
+    
     # Simular tirada de ataque si es necesario
     if hechizo.get("tipo_ataque", "Ninguno") != "Ninguno":
         # Tirada de d20 + bono de ataque
-        tirada = random.randint(1, 20)
+        tirada = d20_ataque
         resultados["tirada_ataque"] = {
             "d20": tirada,
             "bono": bono_ataque,
@@ -1819,7 +1940,7 @@ def simular_lanzamiento_hechizo(hechizo, nivel_lanzamiento=None, estadistica_con
     
     # Simular tirada de salvación (solo para mostrar info)
     if hechizo.get("requiere_salvacion", False):
-        tirada = random.randint(1, 20)
+        tirada = d20_salvacion
         mod_salvacion = 2  # Suponer un modificador promedio
         resultados["exito_salvacion"] = {
             "tipo": hechizo.get("tipo_salvacion", "Ninguna"),
@@ -1834,35 +1955,23 @@ def simular_lanzamiento_hechizo(hechizo, nivel_lanzamiento=None, estadistica_con
     # Calcular daño base
     if hechizo.get("daño_base", ""):
         # Obtener componentes de la fórmula
-        patron = r'^(\d+)d(\d+)([+-]\d+)?$'
-        match = re.match(patron, hechizo.get("daño_base", ""))
+        dados = parsear_dados(hechizo.get("daño_base", ""))
         
-        if match:
-            num_dados = int(match.group(1))
-            tipo_dado = int(match.group(2))
-            mod_adicional = 0
-            
-            if match.group(3):
-                mod_adicional = int(match.group(3))
+        if dados:
+            num_dados, tipo_dado, mod_adicional = dados
             
             # Calcular daño base
-            daño = sum(random.randint(1, tipo_dado) for _ in range(num_dados)) + mod_adicional
+            daño = tirar_dados(num_dados, tipo_dado, generador) + mod_adicional
             
             # Añadir daño por nivel superior si aplica
             if niveles_adicionales > 0 and hechizo.get("daño_nivel_superior", ""):
-                match_nivel = re.match(patron, hechizo.get("daño_nivel_superior", ""))
-                if match_nivel:
-                    num_dados_nivel = int(match_nivel.group(1))
-                    tipo_dado_nivel = int(match_nivel.group(2))
-                    mod_adicional_nivel = 0
-                    
-                    if match_nivel.group(3):
-                        mod_adicional_nivel = int(match_nivel.group(3))
+                dados_nivel = parsear_dados(hechizo.get("daño_nivel_superior", ""))
+                if dados_nivel:
+                    num_dados_nivel, tipo_dado_nivel, mod_adicional_nivel = dados_nivel
                     
-                        # Añadir daño por cada nivel adicional
-                        for _ in range(niveles_adicionales):
-                            daño_nivel = sum(random.randint(1, tipo_dado_nivel) for _ in range(num_dados_nivel)) + mod_adicional_nivel
-                            daño += daño_nivel
+                    # Los dados de todos los niveles adicionales en una sola tirada
+                    daño += tirar_dados(num_dados_nivel * niveles_adicionales, tipo_dado_nivel, generador)
+                    daño += mod_adicional_nivel * niveles_adicionales
             
             # Guardar resultado
             resultados["daño"]["resultado"] = daño
@@ -1870,38 +1979,28 @@ def simular_lanzamiento_hechizo(hechizo, nivel_lanzamiento=None, estadistica_con
     # Calcular curación base
     if hechizo.get("curacion_base", ""):
         # Obtener componentes de la fórmula
-        patron = r'^(\d+)d(\d+)([+-]\d+)?$'
-        match = re.match(patron, hechizo.get("curacion_base", ""))
+        formula = hechizo.get("curacion_base", "")
+        dados = parsear_dados(formula)
         
-        if match:
-            num_dados = int(match.group(1))
-            tipo_dado = int(match.group(2))
-            mod_adicional = 0
+        if dados:
+            num_dados, tipo_dado, mod_adicional = dados
             
-            if match.group(3):
-                mod_adicional = int(match.group(3))
-            else:
+            if not re.search(r'[+-]\d+$', formula.strip()):
                 # Si no hay modificador especificado, añadir el modificador de conjuros
                 mod_adicional = estadistica_conjuros
             
             # Calcular curación base
-            curacion = sum(random.randint(1, tipo_dado) for _ in range(num_dados)) + mod_adicional
+            curacion = tirar_dados(num_dados, tipo_dado, generador) + mod_adicional
             
             # Añadir curación por nivel superior si aplica
             if niveles_adicionales > 0 and hechizo.get("curacion_nivel_superior", ""):
-                match_nivel = re.match(patron, hechizo.get("curacion_nivel_superior", ""))
-                if match_nivel:
-                    num_dados_nivel = int(match_nivel.group(1))
-                    tipo_dado_nivel = int(match_nivel.group(2))
-                    mod_adicional_nivel = 0
-                    
-                    if match_nivel.group(3):
-                        mod_adicional_nivel = int(match_nivel.group(3))
+                dados_nivel = parsear_dados(hechizo.get("curacion_nivel_superior", ""))
+                if dados_nivel:
+                    num_dados_nivel, tipo_dado_nivel, mod_adicional_nivel = dados_nivel
                     
-                        # Añadir curación por cada nivel adicional
-                        for _ in range(niveles_adicionales):
-                            curacion_nivel = sum(random.randint(1, tipo_dado_nivel) for _ in range(num_dados_nivel)) + mod_adicional_nivel
-                            curacion += curacion_nivel
+                    # Los dados de todos los niveles adicionales en una sola tirada
+                    curacion += tirar_dados(num_dados_nivel * niveles_adicionales, tipo_dado_nivel, generador)
+                    curacion += mod_adicional_nivel * niveles_adicionales
             
             # Guardar resultado
             resultados["curacion"]["resultado"] = curacion
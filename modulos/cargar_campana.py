@@ -8,6 +8,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import json
 import os
+import sys
+
+# Añadir directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.cache_personajes import cargar_personaje, obtener_personaje, unir_jugadores
+from utils.indice_campanas import aplicar_cambios_sesion
 
 def mostrar_cargar_campana(root, directorio_campanas, callback_menu, callback_cargar_campana=None):
     """
@@ -249,7 +255,10 @@ def mostrar_detalles_campana(root, campana, ruta, callback_menu, callback_cargar
     jugadores_frame = ttk.Frame(detalles_content)
     jugadores_frame.pack(fill="both", expand=True, padx=50, pady=5)
     
-    jugadores = campana.get("jugadores", [])
+    # Aplicar renombrados/eliminaciones ya propagados al archivo y unir las referencias
+    # de la campaña con los datos actuales de los personajes
+    aplicar_cambios_sesion(campana.get("jugadores", []))
+    jugadores = unir_jugadores(campana.get("jugadores", []))
     
     if not jugadores:
         ttk.Label(jugadores_frame, text="No hay jugadores en esta campaña").pack(pady=10)
@@ -300,66 +309,21 @@ def mostrar_detalles_campana(root, campana, ruta, callback_menu, callback_cargar
             messagebox.showinfo("Información", f"El archivo del personaje '{personaje.get('nombre', '')}' no existe.")
             return
         
-        # Cargar datos completos del personaje
-        try:
-            with open(ruta_personaje, 'r', encoding='utf-8') as f:
-                datos_personaje = json.load(f)
-            
-            # Guardar referencia a la campaña para actualizar después
-            datos_campaña_actual = campana
-            ruta_campaña_actual = ruta
-            
-            # Función de callback para cuando se termina de editar el personaje
-            def callback_edicion():
-                # Actualizar datos del personaje en la campaña
-                try:
-                    # Recargar el personaje editado
-                    with open(ruta_personaje, 'r', encoding='utf-8') as f:
-                        personaje_actualizado = json.load(f)
-                    
-                    # Actualizar datos básicos en la campaña
-                    actualizar_personaje_en_campaña(personaje_actualizado, indice)
-                    
-                    # Volver a mostrar detalles de la campaña
-                    mostrar_detalles_campana(root, datos_campaña_actual, ruta_campaña_actual, 
-                                           callback_menu, callback_cargar_campana)
-                    
-                except Exception as e:
-                    messagebox.showerror("Error", f"Error al actualizar el personaje en la campaña: {str(e)}")
-                    mostrar_detalles_campana(root, datos_campaña_actual, ruta_campaña_actual, 
-                                           callback_menu, callback_cargar_campana)
-            
-            # Mostrar pantalla de edición de personaje
-            from modulos.gestor_personajes import mostrar_crear_editar_personaje
-            mostrar_crear_editar_personaje(root, datos_personaje, directorio_personajes, callback_edicion)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar los detalles del personaje: {str(e)}")
-    
-    def actualizar_personaje_en_campaña(personaje_actualizado, indice):
-        """Actualiza los datos del personaje en la campaña"""
-        if 0 <= indice < len(campana.get("jugadores", [])):
-            # Actualizar datos básicos necesarios
-            campana["jugadores"][indice].update({
-                "nombre": personaje_actualizado.get("nombre", ""),
-                "clase": personaje_actualizado.get("clase", ""),
-                "raza": personaje_actualizado.get("raza", ""),
-                "nivel": personaje_actualizado.get("nivel", 1),
-                "experiencia": personaje_actualizado.get("experiencia", 0),
-                "archivo": personaje_actualizado.get("archivo", ""),
-                "estadisticas": personaje_actualizado.get("estadisticas", {}),
-                "competencias": personaje_actualizado.get("competencias", [])
-            })
-            
-            # Guardar los cambios en el archivo de la campaña
-            try:
-                with open(ruta, 'w', encoding='utf-8') as f:
-                    json.dump(campana, f, ensure_ascii=False, indent=4)
-                    
-                # Mostrar mensaje de éxito
-                messagebox.showinfo("Éxito", "Personaje actualizado correctamente en la campaña.")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al guardar los cambios en la campaña: {str(e)}")
+        # Cargar datos completos del personaje (copia editable desde la caché)
+        datos_personaje = cargar_personaje(archivo_personaje)
+        if datos_personaje is None:
+            messagebox.showerror("Error", "Error al cargar los detalles del personaje.")
+            return
+        
+        # Función de callback para cuando se termina de editar el personaje
+        def callback_edicion():
+            # La campaña sólo guarda la referencia al archivo: basta con volver a
+            # mostrar los detalles, que leerán el personaje actualizado de la caché
+            mostrar_detalles_campana(root, campana, ruta, callback_menu, callback_cargar_campana)
+        
+        # Mostrar pantalla de edición de personaje
+        from modulos.gestor_personajes import mostrar_crear_editar_personaje
+        mostrar_crear_editar_personaje(root, datos_personaje, directorio_personajes, callback_edicion)
     
     def ver_detalles_personaje(personaje):
         """Muestra los detalles de un personaje"""
@@ -378,8 +342,9 @@ def mostrar_detalles_campana(root, campana, ruta, callback_menu, callback_cargar
         
         # Cargar datos completos del personaje
         try:
-            with open(ruta_personaje, 'r', encoding='utf-8') as f:
-                datos_personaje = json.load(f)
+            datos_personaje = obtener_personaje(archivo_personaje)
+            if datos_personaje is None:
+                raise ValueError("el archivo no contiene un personaje válido")
             
             # Crear diálogo con detalles
             dialogo = tk.Toplevel(root)
@@ -8,7 +8,17 @@ import tkinter as tk
 from tkinter import ttk, messagebox, font
 import json
 import os
+import sys
 from tkinter import scrolledtext
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.grafo_dependencias import GrafoDependencias
+from utils.cache_personajes import listar_personajes, cargar_personaje, invalidar_personaje
+from utils.indice_campanas import (campanas_con_personaje, propagar_eliminacion, propagar_renombrado,
+                                   registrar_personaje_guardado)
+from utils.motor_ca import ca_sin_armadura
+from utils.tablas_reglas import (TABLA_EXPERIENCIA, BONIF_COMPETENCIA, nivel_desde_experiencia,
+                                 experiencia_siguiente_nivel, bonificador_competencia, modificador,
+                                 atributo_conjuros)
 
 # Definición de constantes
 CLASES = ["Bárbaro", "Bardo", "Brujo", "Clérigo", "Druida", "Explorador", 
@@ -29,30 +39,6 @@ COMPETENCIAS = [
     "Religión", "Sigilo", "Supervivencia", "Trato con Animales"
 ]
 
-# Tabla de experiencia necesaria para cada nivel según D&D 5e
-TABLA_EXPERIENCIA = {
-    1: 0,
-    2: 300,
-    3: 900,
-    4: 2700,
-    5: 6500,
-    6: 14000,
-    7: 23000,
-    8: 34000,
-    9: 48000,
-    10: 64000,
-    11: 85000,
-    12: 100000,
-    13: 120000,
-    14: 140000,
-    15: 165000,
-    16: 195000,
-    17: 225000,
-    18: 265000,
-    19: 305000,
-    20: 355000
-}
-
 def mostrar_gestor_personajes(root, callback_menu):
     """
     Muestra la pantalla principal del gestor de personajes
@@ -106,15 +92,10 @@ def mostrar_gestor_personajes(root, callback_menu):
     for i in range(7):  # 7 columnas
         lista_frame.columnconfigure(i, weight=1)
     
-    # Obtener lista de personajes guardados
+    # Obtener lista de personajes guardados (sólo se releen los archivos modificados)
     personajes = []
     try:
-        for archivo in os.listdir(directorio_personajes):
-            if archivo.endswith('.json'):
-                ruta = os.path.join(directorio_personajes, archivo)
-                with open(ruta, 'r', encoding='utf-8') as f:
-                    datos = json.load(f)
-                    personajes.append(datos)
+        personajes = listar_personajes()
     except Exception as e:
         messagebox.showerror("Error", f"Error al cargar los personajes: {str(e)}")
     
@@ -185,16 +166,24 @@ def mostrar_gestor_personajes(root, callback_menu):
     
     def editar_personaje(personaje):
         """Muestra la pantalla de edición de personaje"""
+        # Editar una copia para no alterar los datos compartidos de la caché
+        personaje = cargar_personaje(personaje.get("archivo", "")) or dict(personaje)
         mostrar_crear_editar_personaje(root, personaje, directorio_personajes, 
                                       lambda: mostrar_gestor_personajes(root, callback_menu))
     
     def eliminar_personaje(personaje):
         """Elimina un personaje"""
-        if messagebox.askyesno("Confirmar", f"¿Está seguro que desea eliminar el personaje '{personaje.get('nombre', '')}'?"):
+        mensaje = f"¿Está seguro que desea eliminar el personaje '{personaje.get('nombre', '')}'?"
+        num_campanas = len(campanas_con_personaje(personaje.get("archivo", "")))
+        if num_campanas:
+            mensaje += f"\nTambién se quitará de {num_campanas} campaña(s)."
+        if messagebox.askyesno("Confirmar", mensaje):
             try:
                 ruta = os.path.join(directorio_personajes, personaje.get("archivo", ""))
                 if os.path.exists(ruta):
                     os.remove(ruta)
+                    invalidar_personaje(personaje.get("archivo", ""))
+                    propagar_eliminacion(personaje.get("archivo", ""))
                     messagebox.showinfo("Éxito", "Personaje eliminado correctamente.")
                     mostrar_gestor_personajes(root, callback_menu)  # Actualizar vista
                 else:
@@ -275,6 +264,19 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     editar_frame.bind("<Configure>", configure_frame)
     canvas.bind("<Configure>", lambda e: configure_frame(e))
     
+    # Grafo de campos calculados: cada trace sólo marca su fuente como modificada
+    # y el recálculo de los nodos afectados se agrupa en una pasada ociosa
+    grafo = GrafoDependencias(main_container)
+    
+    def leer_entero(var):
+        try:
+            return int(var.get())
+        except (ValueError, tk.TclError):
+            return None
+    
+    def formatear_bono(valor):
+        return f"+{valor}" if valor >= 0 else str(valor)
+    
     # Título
     titulo = ttk.Label(editar_frame, text=f"{modo} Personaje", style="Title.TLabel")
     titulo.pack(pady=(20, 10))
@@ -336,19 +338,14 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
         try:
             experiencia = int(experiencia_var.get())
             # Encontrar el nivel correspondiente a la experiencia
-            nuevo_nivel = 1
-            for lvl, exp_needed in sorted(TABLA_EXPERIENCIA.items()):
-                if experiencia >= exp_needed:
-                    nuevo_nivel = lvl
-                else:
-                    break
+            nuevo_nivel = nivel_desde_experiencia(experiencia)
             
             # Actualizar nivel
             nivel_var.set(str(nuevo_nivel))
             
             # Calcular experiencia para siguiente nivel y restante
-            if nuevo_nivel < 20:
-                exp_siguiente = TABLA_EXPERIENCIA[nuevo_nivel + 1]
+            exp_siguiente = experiencia_siguiente_nivel(nuevo_nivel)
+            if exp_siguiente is not None:
                 exp_restante = exp_siguiente - experiencia
                 exp_siguiente_var.set(str(exp_siguiente))
                 exp_restante_var.set(str(exp_restante))
@@ -356,9 +353,6 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
                 exp_siguiente_var.set("Máx.")
                 exp_restante_var.set("Máx.")
             
-            # Actualizar bonificadores relacionados con el nivel
-            calcular_modificador()
-            
         except ValueError:
             experiencia_var.set("0")
             nivel_var.set("1")
@@ -390,9 +384,6 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
                 exp_siguiente_var.set("Máx.")
                 exp_restante_var.set("Máx.")
             
-            # Actualizar bonificadores relacionados con el nivel
-            calcular_modificador()
-            
         except (ValueError, KeyError):
             nivel_var.set("1")
             experiencia_var.set("0")
@@ -406,6 +397,14 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     
     experiencia_entry.bind("<KeyRelease>", lambda e: calcular_nivel_desde_experiencia())
     
+    # Fuentes del grafo para datos básicos
+    grafo.agregar_fuente("nivel", lambda: leer_entero(nivel_var))
+    grafo.agregar_fuente("experiencia", lambda: leer_entero(experiencia_var))
+    grafo.agregar_fuente("clase", clase_var.get)
+    nivel_var.trace_add("write", lambda *args: grafo.marcar("nivel"))
+    experiencia_var.trace_add("write", lambda *args: grafo.marcar("experiencia"))
+    clase_var.trace_add("write", lambda *args: grafo.marcar("clase"))
+    
     # ===== ESTADÍSTICAS Y COMPETENCIAS =====
     tab_estadisticas = ttk.Frame(notebook)
     notebook.add(tab_estadisticas, text="Estadísticas y Competencias")
@@ -419,27 +418,6 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     mod_vars = {}
     stats_datos = personaje.get("estadisticas", {}) if personaje else {}
     
-    # Función para calcular modificador
-    def calcular_modificador(event=None):
-        for stat in ESTADISTICAS:
-            try:
-                valor = int(stats_vars[stat].get())
-                mod = (valor - 10) // 2
-                mod_vars[stat].set(f"{'+' if mod >= 0 else ''}{mod}")
-            except (ValueError, KeyError):
-                mod_vars[stat].set("")
-        
-        # Actualizar bonificador de competencia basado en nivel
-        try:
-            nivel = int(nivel_var.get())
-            comp = 2 + ((nivel - 1) // 4)
-            bonif_comp_var.set(f"+{comp}")
-        except (ValueError, KeyError):
-            bonif_comp_var.set("+2")
-        
-        # Actualizar valores calculados para conjuros
-        actualizar_ataques_conjuro()
-    
     # Crear campos para estadísticas
     for i, stat in enumerate(ESTADISTICAS):
         ttk.Label(stats_frame, text=stat).grid(row=i, column=0, sticky="w", padx=10, pady=5)
@@ -448,14 +426,18 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
         stats_vars[stat] = tk.StringVar(value=stats_datos.get(stat, "10"))
         entrada = ttk.Spinbox(stats_frame, from_=1, to=30, textvariable=stats_vars[stat], width=5)
         entrada.grid(row=i, column=1, padx=5, pady=5)
-        entrada.bind("<KeyRelease>", calcular_modificador)
-        entrada.bind("<<Increment>>", calcular_modificador)
-        entrada.bind("<<Decrement>>", calcular_modificador)
         
         # Modificador
         ttk.Label(stats_frame, text="Mod:").grid(row=i, column=2, padx=5, pady=5)
         mod_vars[stat] = tk.StringVar()
         ttk.Label(stats_frame, textvariable=mod_vars[stat], width=3).grid(row=i, column=3, padx=5, pady=5)
+        
+        # Nodos del grafo: valor introducido y modificador derivado
+        grafo.agregar_fuente(f"valor_{stat}", lambda var=stats_vars[stat]: leer_entero(var))
+        grafo.agregar_nodo(f"mod_{stat}", [f"valor_{stat}"],
+                           lambda valor: None if valor is None else modificador(valor),
+                           lambda mod, var=mod_vars[stat]: var.set("" if mod is None else formatear_bono(mod)))
+        stats_vars[stat].trace_add("write", lambda *args, s=stat: grafo.marcar(f"valor_{s}"))
     
     # Frame para bonificador de competencia
     comp_bonus_frame = ttk.Frame(stats_frame)
@@ -464,6 +446,11 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     bonif_comp_var = tk.StringVar(value="+2")
     ttk.Label(comp_bonus_frame, textvariable=bonif_comp_var, width=3).pack(side="left", padx=5)
     
+    # Bonificador de competencia basado en nivel
+    grafo.agregar_nodo("bonif_comp", ["nivel"],
+                       lambda nivel: 2 if nivel is None else bonificador_competencia(nivel),
+                       lambda comp: bonif_comp_var.set(f"+{comp}"))
+    
     # Frame para CD de conjuro y ataque
     conjuro_frame = ttk.Frame(stats_frame)
     conjuro_frame.grid(row=len(ESTADISTICAS)+1, column=0, columnspan=4, sticky="w", padx=10, pady=10)
@@ -480,50 +467,27 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     ttk.Label(conjuro_frame, text="(Sumar al d20 para tiradas de ataque con conjuros)", 
              font=("Helvetica", 9, "italic")).grid(row=2, column=0, columnspan=2, sticky="w", padx=5, pady=2)
     
-    def actualizar_ataques_conjuro(*args):
-        """Actualiza los valores calculados para ataques de conjuro y CD"""
-        try:
-            # Determinar el atributo principal basado en la clase
-            clase_actual = clase_var.get()
-            atributo_principal = "Inteligencia"  # Por defecto para magos
-            
-            if clase_actual in ["Clérigo", "Druida", "Explorador"]:
-                atributo_principal = "Sabiduría"
-            elif clase_actual in ["Bardo", "Brujo", "Paladín", "Hechicero"]:
-                atributo_principal = "Carisma"
-            
-            # Obtener modificador del atributo principal
-            if atributo_principal in mod_vars:
-                mod_texto = mod_vars[atributo_principal].get()
-                mod = int(mod_texto) if mod_texto else 0
-            else:
-                mod = 0
-            
-            # Obtener bonificador de competencia
-            comp_texto = bonif_comp_var.get()
-            comp = int(comp_texto.replace("+", "")) if comp_texto else 2
-            
-            # Calcular CD de conjuro: 8 + mod + comp
-            cd = 8 + mod + comp
-            cd_conjuro_var.set(str(cd))
-            
-            # Calcular ataque de conjuro: mod + comp
-            ataque = mod + comp
-            ataque_conjuro_var.set(f"+{ataque}" if ataque >= 0 else str(ataque))
-            
-            # Mostrar u ocultar frame de conjuros según la clase
-            if clase_actual in CLASES_MAGICAS:
-                conjuro_frame.grid()
-            else:
-                conjuro_frame.grid_remove()
-                
-        except Exception as e:
-            # En caso de error, usar valores por defecto
-            cd_conjuro_var.set("10")
-            ataque_conjuro_var.set("+0")
+    # Nodos para ataques de conjuro y CD: sólo dependen del modificador del atributo principal
+    grafo.agregar_nodo("atributo_conjuros", ["clase"], atributo_conjuros)
+    grafo.agregar_nodo("mod_conjuros", ["atributo_conjuros", "mod_Inteligencia", "mod_Sabiduría", "mod_Carisma"],
+                       lambda atributo, mod_int, mod_sab, mod_car: {
+                           "Inteligencia": mod_int, "Sabiduría": mod_sab, "Carisma": mod_car
+                       }.get(atributo) or 0)
+    
+    # CD de conjuro: 8 + mod + comp
+    grafo.agregar_nodo("cd_conjuro", ["mod_conjuros", "bonif_comp"],
+                       lambda mod, comp: 8 + mod + comp,
+                       lambda cd: cd_conjuro_var.set(str(cd)))
     
-    # Vincular cambio de clase con actualización de valores de conjuro
-    clase_var.trace_add("write", actualizar_ataques_conjuro)
+    # Ataque de conjuro: mod + comp
+    grafo.agregar_nodo("ataque_conjuro", ["mod_conjuros", "bonif_comp"],
+                       lambda mod, comp: mod + comp,
+                       lambda ataque: ataque_conjuro_var.set(formatear_bono(ataque)))
+    
+    # Mostrar u ocultar frame de conjuros según la clase
+    grafo.agregar_nodo("es_magica", ["clase"], lambda clase_actual: clase_actual in CLASES_MAGICAS)
+    grafo.agregar_nodo("frame_conjuros", ["es_magica"], lambda es_magica: es_magica,
+                       lambda es_magica: conjuro_frame.grid() if es_magica else conjuro_frame.grid_remove())
     
     # Frame para competencias
     comp_frame = ttk.LabelFrame(tab_estadisticas, text="Competencias en Habilidades")
@@ -609,49 +573,18 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     ttk.Label(ataques_frame, text="(Estos valores se suman a la tirada manual de d20)", 
              font=("Helvetica", 9, "italic")).grid(row=2, column=0, columnspan=2, sticky="w", padx=10, pady=5)
     
-    # Actualizar bonificadores de ataque cuando cambian estadísticas o competencias
-    def actualizar_bonificadores_ataque(*args):
-        try:
-            # Obtener modificadores
-            mod_fuerza = int(mod_vars["Fuerza"].get()) if mod_vars["Fuerza"].get() else 0
-            mod_destreza = int(mod_vars["Destreza"].get()) if mod_vars["Destreza"].get() else 0
-            
-            # Obtener bonificador de competencia
-            comp_texto = bonif_comp_var.get()
-            comp = int(comp_texto.replace("+", "")) if comp_texto else 2
-            
-            # Verificar competencias con armas
-            tiene_comp_simple = armas_vars["Simples"].get()
-            tiene_comp_marcial = armas_vars["Marciales"].get()
-            
-            # Bonificador con competencia
-            bonif_fuerza = mod_fuerza + (comp if tiene_comp_simple or tiene_comp_marcial else 0)
-            bonif_destreza = mod_destreza + (comp if tiene_comp_simple or tiene_comp_marcial else 0)
-            
-            # Actualizar valores
-            ataque_fuerza_var.set(f"+{bonif_fuerza}" if bonif_fuerza >= 0 else str(bonif_fuerza))
-            ataque_destreza_var.set(f"+{bonif_destreza}" if bonif_destreza >= 0 else str(bonif_destreza))
-            
-        except Exception:
-            ataque_fuerza_var.set("+0")
-            ataque_destreza_var.set("+0")
-    
-    # Vincular eventos para actualizar bonificadores
-    def actualizar_todo(*args):
-        calcular_modificador()
-        actualizar_ataques_conjuro()
-        actualizar_bonificadores_ataque()
-    
-    # Vincular eventos para estadísticas
-    for stat, var in stats_vars.items():
-        var.trace_add("write", actualizar_todo)
-    
-    # Vincular eventos para competencias con armas
+    # Competencia con armas simples o marciales
+    grafo.agregar_fuente("comp_armas", lambda: armas_vars["Simples"].get() or armas_vars["Marciales"].get())
     for arma, var in armas_vars.items():
-        var.trace_add("write", actualizar_bonificadores_ataque)
+        var.trace_add("write", lambda *args: grafo.marcar("comp_armas"))
     
-    # Inicializar modificadores y cálculos
-    actualizar_todo()
+    # Bonificadores de ataque: modificador + competencia si se tiene con armas
+    grafo.agregar_nodo("ataque_fuerza", ["mod_Fuerza", "bonif_comp", "comp_armas"],
+                       lambda mod, comp, tiene_comp: (mod or 0) + (comp if tiene_comp else 0),
+                       lambda bonif: ataque_fuerza_var.set(formatear_bono(bonif)))
+    grafo.agregar_nodo("ataque_destreza", ["mod_Destreza", "bonif_comp", "comp_armas"],
+                       lambda mod, comp, tiene_comp: (mod or 0) + (comp if tiene_comp else 0),
+                       lambda bonif: ataque_destreza_var.set(formatear_bono(bonif)))
     
     # Inicializar información de nivel/experiencia
     calcular_experiencia_desde_nivel()
@@ -708,6 +641,11 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     ttk.Label(ca_total_frame, text="CA Total:", font=('Helvetica', 12, 'bold')).pack(side="left", padx=5)
     ttk.Label(ca_total_frame, textvariable=ca_total_var, font=('Helvetica', 14, 'bold'), foreground="#004080").pack(side="left")
     
+    # CA total con el motor de CA compartido (sin objetos equipados todavía)
+    grafo.agregar_nodo("ca_total", ["mod_Destreza"],
+                       lambda mod: None if mod is None else ca_sin_armadura(mod),
+                       lambda ca: ca_total_var.set("" if ca is None else str(ca)))
+    
     # Frame para hechizos
     hechizos_frame = ttk.LabelFrame(tab_inventario, text="Hechizos")
     hechizos_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -717,54 +655,43 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     hechizos_content.pack(fill="both", expand=True)
     
     # Tabla de hechizos
-    hechizos_table_frame = ttk.Frame(hechizos_content)
-    hechizos_table_frame.pack(fill="both", expand=True, padx=5, pady=5)
+    inv_hechizos_table_frame = ttk.Frame(hechizos_content)
+    inv_hechizos_table_frame.pack(fill="both", expand=True, padx=5, pady=5)
     
     # Cabecera de tabla
-    ttk.Label(hechizos_table_frame, text="Nombre", width=25, font=("Helvetica", 10, "bold")).grid(row=0, column=0, padx=5, pady=5, sticky="w")
-    ttk.Label(hechizos_table_frame, text="Daño", width=10, font=("Helvetica", 10, "bold")).grid(row=0, column=1, padx=5, pady=5, sticky="w")
-    ttk.Label(hechizos_table_frame, text="Nivel", width=5, font=("Helvetica", 10, "bold")).grid(row=0, column=2, padx=5, pady=5, sticky="w")
+    ttk.Label(inv_hechizos_table_frame, text="Nombre", width=25, font=("Helvetica", 10, "bold")).grid(row=0, column=0, padx=5, pady=5, sticky="w")
+    ttk.Label(inv_hechizos_table_frame, text="Daño", width=10, font=("Helvetica", 10, "bold")).grid(row=0, column=1, padx=5, pady=5, sticky="w")
+    ttk.Label(inv_hechizos_table_frame, text="Nivel", width=5, font=("Helvetica", 10, "bold")).grid(row=0, column=2, padx=5, pady=5, sticky="w")
     
     # Cargar hechizos si existen
     hechizos = personaje.get("hechizos", []) if personaje else []
     
-    # Mostrar hechizos o mensaje de clase no mágica
-    if clase_var.get() not in CLASES_MAGICAS:
-        mensaje = "Esta clase no tiene acceso a hechizos"
-        ttk.Label(hechizos_table_frame, text=mensaje, font=("Helvetica", 10, "italic")).grid(row=1, column=0, columnspan=3, padx=5, pady=10)
-    elif not hechizos:
-        ttk.Label(hechizos_table_frame, text="No hay hechizos añadidos").grid(row=1, column=0, columnspan=3, padx=5, pady=10)
-    else:
-        for i, hechizo in enumerate(hechizos):
-            ttk.Label(hechizos_table_frame, text=hechizo.get("nombre", "")).grid(row=i+1, column=0, padx=5, pady=3, sticky="w")
-            ttk.Label(hechizos_table_frame, text=hechizo.get("daño", "")).grid(row=i+1, column=1, padx=5, pady=3, sticky="w")
-            ttk.Label(hechizos_table_frame, text=str(hechizo.get("nivel", ""))).grid(row=i+1, column=2, padx=5, pady=3, sticky="w")
-    
     # Botón para añadir hechizo
     ttk.Button(hechizos_content, text="Agregar Hechizo", 
               command=lambda: messagebox.showinfo("Información", "No implementado")).pack(pady=10)
     
-    # Vincular cambio de clase para actualizar mensaje
+    # Mostrar hechizos o mensaje de clase no mágica
     def actualizar_mensaje_hechizos(*args):
         # Limpiar tabla
-        for widget in hechizos_table_frame.winfo_children():
+        for widget in inv_hechizos_table_frame.winfo_children():
             if int(widget.grid_info().get("row", 0)) > 0:  # Mantener cabecera
                 widget.destroy()
         
         # Mostrar mensaje según clase
         if clase_var.get() not in CLASES_MAGICAS:
             mensaje = "Esta clase no tiene acceso a hechizos"
-            ttk.Label(hechizos_table_frame, text=mensaje, font=("Helvetica", 10, "italic")).grid(row=1, column=0, columnspan=3, padx=5, pady=10)
+            ttk.Label(inv_hechizos_table_frame, text=mensaje, font=("Helvetica", 10, "italic")).grid(row=1, column=0, columnspan=3, padx=5, pady=10)
         elif not hechizos:
-            ttk.Label(hechizos_table_frame, text="No hay hechizos añadidos").grid(row=1, column=0, columnspan=3, padx=5, pady=10)
+            ttk.Label(inv_hechizos_table_frame, text="No hay hechizos añadidos").grid(row=1, column=0, columnspan=3, padx=5, pady=10)
         else:
             for i, hechizo in enumerate(hechizos):
-                ttk.Label(hechizos_table_frame, text=hechizo.get("nombre", "")).grid(row=i+1, column=0, padx=5, pady=3, sticky="w")
-                ttk.Label(hechizos_table_frame, text=hechizo.get("daño", "")).grid(row=i+1, column=1, padx=5, pady=3, sticky="w")
-                ttk.Label(hechizos_table_frame, text=str(hechizo.get("nivel", ""))).grid(row=i+1, column=2, padx=5, pady=3, sticky="w")
+                ttk.Label(inv_hechizos_table_frame, text=hechizo.get("nombre", "")).grid(row=i+1, column=0, padx=5, pady=3, sticky="w")
+                ttk.Label(inv_hechizos_table_frame, text=hechizo.get("daño", "")).grid(row=i+1, column=1, padx=5, pady=3, sticky="w")
+                ttk.Label(inv_hechizos_table_frame, text=str(hechizo.get("nivel", ""))).grid(row=i+1, column=2, padx=5, pady=3, sticky="w")
     
-    # Vincular actualización de mensaje al cambio de clase
-    clase_var.trace_add("write", actualizar_mensaje_hechizos)
+    # La tabla sólo se reconstruye cuando se pasa de clase mágica a no mágica o viceversa
+    grafo.agregar_nodo("mensaje_hechizos", ["es_magica"], lambda es_magica: es_magica,
+                       lambda es_magica: actualizar_mensaje_hechizos())
     
     # ===== HECHIZOS =====
     # Esta pestaña solo aparece para clases mágicas
@@ -784,8 +711,9 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
             if tab_hechizos in tabs:
                 notebook.forget(tab_hechizos)
     
-    # Vincular cambio de clase con actualización de pestañas
-    clase_var.trace_add("write", actualizar_tabs_hechizos)
+    # La pestaña sólo se añade o quita cuando cambia el carácter mágico de la clase
+    grafo.agregar_nodo("pestaña_hechizos", ["es_magica"], lambda es_magica: es_magica,
+                       lambda es_magica: actualizar_tabs_hechizos())
     
     # Configurar pestaña de hechizos con más espacio horizontal
     hechizos_frame = ttk.Frame(tab_hechizos)
@@ -905,9 +833,6 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     ttk.Button(hechizos_frame, text="Añadir Hechizo", 
               command=mostrar_selector_hechizos).pack(pady=15)
     
-    # Actualizar pestañas según la clase inicial
-    actualizar_tabs_hechizos()
-    
     # ===== PESTAÑA DE PROGRESIÓN =====
     tab_progresion = ttk.Frame(notebook)
     notebook.add(tab_progresion, text="Progresión")
@@ -1056,7 +981,7 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
     # Rellenar tabla
     for lvl in range(1, 11):
         # Bonificador de competencia
-        comp = 2 + ((lvl - 1) // 4)
+        comp = BONIF_COMPETENCIA[lvl]
         
         # Primera columna (niveles 1-10)
         ttk.Label(exp_table, text=str(lvl)).grid(row=lvl, column=0, padx=5, pady=2, sticky="w")
@@ -1065,7 +990,7 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
         
         # Segunda columna (niveles 11-20)
         lvl2 = lvl + 10
-        comp2 = 2 + ((lvl2 - 1) // 4)
+        comp2 = BONIF_COMPETENCIA[lvl2]
         
         ttk.Label(exp_table, text=str(lvl2)).grid(row=lvl, column=3, padx=5, pady=2, sticky="w")
         ttk.Label(exp_table, text=str(TABLA_EXPERIENCIA[lvl2])).grid(row=lvl, column=4, padx=5, pady=2, sticky="w")
@@ -1090,12 +1015,12 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
             exp_siguiente_nivel_var.set("300")
             exp_restante_var.set("300")
     
-    # Inicializar displays
-    actualizar_displays_progresion()
-    
     # Vincular cambios de nivel/experiencia con actualización de displays
-    nivel_var.trace_add("write", lambda *args: actualizar_displays_progresion())
-    experiencia_var.trace_add("write", lambda *args: actualizar_displays_progresion())
+    grafo.agregar_nodo("progresion", ["nivel", "experiencia"], lambda nivel, experiencia: (nivel, experiencia),
+                       lambda valores: actualizar_displays_progresion())
+    
+    # Primera pasada síncrona: calcula todos los nodos, pestañas incluidas
+    grafo.recalcular()
     
     # Botones de acción
     botones_frame = ttk.Frame(editar_frame)
@@ -1192,10 +1117,12 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
             "armas_especificas": armas_especificas_var.get(),
             "inventario": [],  # Vacío por ahora
             "equipamiento": {},  # Vacío por ahora
-            "hechizos": hechizos  # Mantener hechizos existentes
+            "hechizos": hechizos,  # Mantener hechizos existentes
+            "recursos": personaje.get("recursos", {}) if personaje else {}  # Espacios y usos gastados
         }
         
-        # Valores calculados
+        # Valores calculados (aplicar cambios pendientes del grafo antes de leerlos)
+        grafo.recalcular()
         datos_personaje["bonif_comp"] = bonif_comp_var.get()
         datos_personaje["cd_conjuro"] = cd_conjuro_var.get()
         datos_personaje["ataque_conjuro"] = ataque_conjuro_var.get()
@@ -1207,10 +1134,30 @@ def mostrar_crear_editar_personaje(root, personaje, directorio_personajes, callb
         datos_personaje["archivo"] = nombre_archivo
         ruta_archivo = os.path.join(directorio_personajes, nombre_archivo)
         
+        # No sobrescribir sin confirmación a otro personaje que ya use ese archivo
+        archivo_anterior = personaje.get("archivo", "") if personaje else ""
+        if archivo_anterior != nombre_archivo and os.path.exists(ruta_archivo):
+            if not messagebox.askyesno("Advertencia",
+                    f"Ya existe otro personaje guardado en '{nombre_archivo}'.\n"
+                    f"¿Desea sobrescribirlo?"):
+                notebook.select(0)
+                return
+        
         # Guardar en archivo
         try:
             with open(ruta_archivo, 'w', encoding='utf-8') as f:
                 json.dump(datos_personaje, f, ensure_ascii=False, indent=4)
+            invalidar_personaje(nombre_archivo)
+            registrar_personaje_guardado(nombre_archivo)
+            
+            # Si cambió el nombre, el personaje pasa a otro archivo: borrar el anterior
+            # y actualizar de una vez todas las campañas que lo referencian
+            if archivo_anterior and archivo_anterior != nombre_archivo:
+                ruta_anterior = os.path.join(directorio_personajes, archivo_anterior)
+                if os.path.exists(ruta_anterior):
+                    os.remove(ruta_anterior)
+                invalidar_personaje(archivo_anterior)
+                propagar_renombrado(archivo_anterior, nombre_archivo)
             
             messagebox.showinfo("Éxito", f"Personaje '{nombre_var.get()}' guardado correctamente.")
             volver()  # Volver a la pantalla del gestor
@@ -8,6 +8,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import json
 import os
+import sys
+
+# Añadir directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.cache_personajes import listar_personajes, referencia_jugador, unir_jugadores
+from utils.indice_campanas import registrar_campana
 
 def mostrar_nueva_campana(root, directorio_campanas, callback_menu):
     """
@@ -133,11 +139,11 @@ def mostrar_nueva_campana(root, directorio_campanas, callback_menu):
         for i, col in enumerate(cols):
             ttk.Label(jugadores_list_frame, text=col, font=('Helvetica', 11, 'bold')).grid(row=0, column=i, padx=5, pady=5, sticky="w")
         
-        # Añadir jugadores
-        for i, jugador in enumerate(jugadores):
-            ttk.Label(jugadores_list_frame, text=jugador["nombre"]).grid(row=i+1, column=0, padx=5, pady=3, sticky="w")
-            ttk.Label(jugadores_list_frame, text=jugador["clase"]).grid(row=i+1, column=1, padx=5, pady=3, sticky="w")
-            ttk.Label(jugadores_list_frame, text=jugador["raza"]).grid(row=i+1, column=2, padx=5, pady=3, sticky="w")
+        # Añadir jugadores con los datos actuales de sus personajes
+        for i, jugador in enumerate(unir_jugadores(jugadores)):
+            ttk.Label(jugadores_list_frame, text=jugador.get("nombre", "")).grid(row=i+1, column=0, padx=5, pady=3, sticky="w")
+            ttk.Label(jugadores_list_frame, text=jugador.get("clase", "")).grid(row=i+1, column=1, padx=5, pady=3, sticky="w")
+            ttk.Label(jugadores_list_frame, text=jugador.get("raza", "")).grid(row=i+1, column=2, padx=5, pady=3, sticky="w")
             # Mostrar nivel con formato más claro
             nivel = jugador.get("nivel", 1)
             experiencia = jugador.get("experiencia", 0)
@@ -168,17 +174,13 @@ def mostrar_nueva_campana(root, directorio_campanas, callback_menu):
             messagebox.showinfo("Información", "No hay personajes creados todavía. Primero cree personajes en el Gestor de Personajes.")
             return
         
-        # Cargar personajes disponibles
+        # Cargar personajes disponibles (los que no estén ya en la campaña)
         personajes_disponibles = []
         try:
-            for archivo in os.listdir(directorio_personajes):
-                if archivo.endswith('.json'):
-                    ruta = os.path.join(directorio_personajes, archivo)
-                    with open(ruta, 'r', encoding='utf-8') as f:
-                        datos = json.load(f)
-                        # Verificar que el personaje no esté ya en la campaña
-                        if not any(p["nombre"] == datos["nombre"] for p in jugadores):
-                            personajes_disponibles.append(datos)
+            archivos_campana = {jugador.get("archivo", "") for jugador in jugadores}
+            for datos in listar_personajes():
+                if datos.get("archivo", "") not in archivos_campana:
+                    personajes_disponibles.append(datos)
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar los personajes: {str(e)}")
             return
@@ -266,19 +268,8 @@ def mostrar_nueva_campana(root, directorio_campanas, callback_menu):
             personajes_seleccionados = []
             for i, var in seleccion_vars.items():
                 if var.get():
-                    personaje = personajes_disponibles[i]
-                    # Agregar solo los datos necesarios del personaje
-                    datos_jugador = {
-                        "nombre": personaje.get("nombre", ""),
-                        "clase": personaje.get("clase", ""),
-                        "raza": personaje.get("raza", ""),
-                        "nivel": personaje.get("nivel", 1),
-                        "experiencia": personaje.get("experiencia", 0),
-                        "archivo": personaje.get("archivo", ""),  # Referencia al archivo original
-                        "estadisticas": personaje.get("estadisticas", {}),
-                        "competencias": personaje.get("competencias", []),
-                    }
-                    personajes_seleccionados.append(datos_jugador)
+                    # Guardar sólo la referencia al archivo del personaje
+                    personajes_seleccionados.append(referencia_jugador(personajes_disponibles[i]))
             
             # Agregar a la lista de jugadores
             jugadores.extend(personajes_seleccionados)
@@ -356,6 +347,7 @@ def mostrar_nueva_campana(root, directorio_campanas, callback_menu):
         try:
             with open(ruta_archivo, 'w', encoding='utf-8') as f:
                 json.dump(campana, f, ensure_ascii=False, indent=4)
+            registrar_campana(ruta_archivo, campana)
             
             messagebox.showinfo("Éxito", f"Campaña '{nombre_campana.get()}' guardada correctamente.")
             # Limpiar correctamente al guardar
@@ -4,101 +4,13 @@
 Utilidades para el cálculo de Clase de Armadura (CA) en la aplicación D&D Combat Manager.
 """
 
-# Constantes para tipos de armadura
-TIPOS_ARMADURA = [
-    "Sin armadura",
-    "Armadura ligera", 
-    "Armadura media", 
-    "Armadura pesada"
-]
+import os
+import sys
 
-# Definiciones de armaduras con sus valores base y límites de modificador
-ARMADURAS = {
-    "Sin armadura": {
-        "tipo": "Sin armadura",
-        "valor_base": 10,
-        "limite_mod": None,  # Sin límite para modificador de destreza
-        "requiere_competencia": False
-    },
-    "Armadura acolchada": {
-        "tipo": "Armadura ligera",
-        "valor_base": 11,
-        "limite_mod": None,  # Sin límite para modificador de destreza
-        "requiere_competencia": True
-    },
-    "Armadura de cuero": {
-        "tipo": "Armadura ligera",
-        "valor_base": 11,
-        "limite_mod": None,
-        "requiere_competencia": True
-    },
-    "Armadura de cuero tachonado": {
-        "tipo": "Armadura ligera",
-        "valor_base": 12,
-        "limite_mod": None,
-        "requiere_competencia": True
-    },
-    "Camisote de mallas": {
-        "tipo": "Armadura media",
-        "valor_base": 13,
-        "limite_mod": 2,  # Límite de +2 para modificador de destreza
-        "requiere_competencia": True
-    },
-    "Cota de escamas": {
-        "tipo": "Armadura media",
-        "valor_base": 14,
-        "limite_mod": 2,
-        "requiere_competencia": True
-    },
-    "Coraza": {
-        "tipo": "Armadura media",
-        "valor_base": 14,
-        "limite_mod": 2,
-        "requiere_competencia": True
-    },
-    "Media armadura": {
-        "tipo": "Armadura media",
-        "valor_base": 15,
-        "limite_mod": 2,
-        "requiere_competencia": True
-    },
-    "Cota de anillas": {
-        "tipo": "Armadura pesada",
-        "valor_base": 14,
-        "limite_mod": 0,  # No se aplica modificador de destreza
-        "requiere_competencia": True
-    },
-    "Cota de malla": {
-        "tipo": "Armadura pesada",
-        "valor_base": 16,
-        "limite_mod": 0,
-        "requiere_competencia": True
-    },
-    "Armadura de bandas": {
-        "tipo": "Armadura pesada",
-        "valor_base": 17,
-        "limite_mod": 0,
-        "requiere_competencia": True
-    },
-    "Armadura de placas": {
-        "tipo": "Armadura pesada",
-        "valor_base": 18,
-        "limite_mod": 0,
-        "requiere_competencia": True
-    }
-}
-
-# Escudos
-ESCUDOS = {
-    "Sin escudo": {
-        "bonus_ca": 0,
-        "requiere_competencia": False
-    },
-    "Escudo": {
-        "bonus_ca": 2,
-        "requiere_competencia": True
-    }
-}
+# Añadir directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.motor_ca import (TIPOS_ARMADURA, ARMADURAS, ESCUDOS, calcular_ca_nucleo,
+                            datos_armadura, bonus_escudo)
 
 def calcular_ca(armadura_nombre, mod_destreza, escudo_nombre=None, bonus_adicional=0):
     """
@@ -113,28 +25,16 @@ def calcular_ca(armadura_nombre, mod_destreza, escudo_nombre=None, bonus_adicion
     Returns:
         dict: Diccionario con detalles del cálculo de CA
     """
-    # Obtener datos de la armadura
-    armadura = ARMADURAS.get(armadura_nombre, ARMADURAS["Sin armadura"])
+    # Obtener datos de la armadura y del escudo
+    armadura = datos_armadura(armadura_nombre)
     valor_base = armadura.get("valor_base", 10)
     tipo = armadura.get("tipo", "Sin armadura")
     limite_mod = armadura.get("limite_mod", None)
+    bonus_del_escudo = bonus_escudo(escudo_nombre)
     
-    # Aplicar modificador de destreza según tipo de armadura
-    mod_aplicado = mod_destreza
-    if limite_mod is not None:
-        mod_aplicado = min(mod_destreza, limite_mod)
-    
-    # Calcular CA base
-    ca_base = valor_base + mod_aplicado
-    
-    # Añadir bonus de escudo
-    bonus_escudo = 0
-    if escudo_nombre:
-        escudo = ESCUDOS.get(escudo_nombre, ESCUDOS["Sin escudo"])
-        bonus_escudo = escudo.get("bonus_ca", 0)
-    
-    # Calcular CA total
-    ca_total = ca_base + bonus_escudo + bonus_adicional
+    # Cálculo compartido con el resto de la aplicación
+    mod_aplicado, ca_base, ca_total = calcular_ca_nucleo(valor_base, limite_mod, mod_destreza,
+                                                         bonus_del_escudo, bonus_adicional)
     
     # Devolver diccionario completo con detalles del cálculo
     return {
@@ -144,7 +44,7 @@ def calcular_ca(armadura_nombre, mod_destreza, escudo_nombre=None, bonus_adicion
         "mod_destreza": mod_destreza,
         "mod_aplicado": mod_aplicado,
         "escudo": escudo_nombre or "Sin escudo",
-        "bonus_escudo": bonus_escudo,
+        "bonus_escudo": bonus_del_escudo,
         "bonus_adicional": bonus_adicional,
         "ca_base": ca_base,
         "ca_total": ca_total
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bestiario de monstruos para la aplicación D&D Combat Manager.
+Los bloques de estadísticas se guardan en data/monstruos/monstruos.json y se
+cargan en columnas de NumPy (CA, PG, características, bono de ataque, daño por
+asalto...) ordenadas por valor de desafío. Así una búsqueda por rango de VD, con
+o sin tipo de criatura, es una búsqueda binaria, y las simulaciones de encuentros
+trabajan directamente con las columnas en lugar de con diccionarios.
+"""
+
+import json
+import os
+import sys
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.dados import promedio_dados
+from utils.tablas_reglas import experiencia_por_vd, valor_vd
+from utils.vigilante_archivos import suscribir, vigilando
+
+DIRECTORIO_MONSTRUOS = os.path.join("data", "monstruos")
+ARCHIVO_MONSTRUOS = "monstruos.json"
+
+ESTADISTICAS = ["Fuerza", "Destreza", "Constitución", "Inteligencia", "Sabiduría", "Carisma"]
+
+
+def _ataques_por_asalto(monstruo):
+    """Calcula número de ataques, mejor bono y daño medio (si todos impactan) de un asalto"""
+    ataques = 0
+    bono = 0
+    daño = 0.0
+    for ataque in monstruo.get("ataques", []):
+        cantidad = int(ataque.get("cantidad", 1))
+        ataques += cantidad
+        bono = max(bono, int(ataque.get("bono_ataque", 0)))
+        daño += cantidad * promedio_dados(ataque.get("daño", ""))
+    return ataques, bono, daño
+
+
+class Bestiario:
+    """Monstruos en columnas de NumPy con índices por nombre, tipo y VD"""
+    
+    def __init__(self, monstruos):
+        """
+        Construye las columnas e índices
+        
+        Args:
+            monstruos (list): Bloques de estadísticas
+        """
+        import numpy as np
+        
+        # Filas ordenadas por VD (y nombre): cada rango de VD es un tramo contiguo
+        self.monstruos = sorted(monstruos, key=lambda monstruo: (valor_vd(monstruo.get("vd", 0)), monstruo.get("nombre", "")))
+        n = len(self.monstruos)
+        
+        ataques = [_ataques_por_asalto(monstruo) for monstruo in self.monstruos]
+        self.nombres = [monstruo.get("nombre", "") for monstruo in self.monstruos]
+        self.tipos = [monstruo.get("tipo", "") for monstruo in self.monstruos]
+        self.vd = np.array([valor_vd(monstruo.get("vd", 0)) for monstruo in self.monstruos], dtype=np.float64)
+        self.experiencia = np.array([experiencia_por_vd(monstruo.get("vd", 0)) for monstruo in self.monstruos], dtype=np.int32)
+        self.ca = np.array([int(monstruo.get("ca", 10)) for monstruo in self.monstruos], dtype=np.int16)
+        self.pg = np.array([int(monstruo.get("pg", 1)) for monstruo in self.monstruos], dtype=np.int32)
+        self.estadisticas = np.array(
+            [[int(monstruo.get("estadisticas", {}).get(stat, 10)) for stat in ESTADISTICAS] for monstruo in self.monstruos],
+            dtype=np.int8
+        ).reshape(n, len(ESTADISTICAS))
+        self.modificadores = (self.estadisticas.astype(np.int16) - 10) // 2
+        self.ataques_asalto = np.array([a for a, _, _ in ataques], dtype=np.int16)
+        self.bono_ataque = np.array([b for _, b, _ in ataques], dtype=np.int16)
+        self.daño_asalto = np.array([d for _, _, d in ataques], dtype=np.float64)
+        
+        self._por_nombre = {nombre.lower(): fila for fila, nombre in enumerate(self.nombres)}
+        
+        # Por tipo: filas (ya ordenadas por VD) y sus VD para la búsqueda binaria
+        filas_tipo = {}
+        for fila, tipo in enumerate(self.tipos):
+            filas_tipo.setdefault(tipo, []).append(fila)
+        self._por_tipo = {}
+        for tipo, filas in filas_tipo.items():
+            filas = np.array(filas, dtype=np.int64)
+            self._por_tipo[tipo] = (filas, self.vd[filas])
+    
+    def __len__(self):
+        return len(self.monstruos)
+    
+    def fila(self, nombre):
+        """
+        Obtiene la fila de un monstruo
+        
+        Args:
+            nombre (str): Nombre del monstruo (sin distinguir mayúsculas)
+        
+        Returns:
+            int: Fila en las columnas o None si no existe
+        """
+        return self._por_nombre.get(nombre.lower())
+    
+    def monstruo(self, nombre):
+        """
+        Obtiene una copia del bloque de estadísticas de un monstruo
+        
+        Args:
+            nombre (str): Nombre del monstruo
+        
+        Returns:
+            dict: Bloque de estadísticas o None si no existe
+        """
+        fila = self.fila(nombre)
+        if fila is None:
+            return None
+        return json.loads(json.dumps(self.monstruos[fila]))
+    
+    def tipos_criatura(self):
+        """
+        Obtiene los tipos de criatura presentes
+        
+        Returns:
+            list: Tipos ordenados alfabéticamente
+        """
+        return sorted(self._por_tipo)
+    
+    def buscar(self, vd_min=None, vd_max=None, tipo=None):
+        """
+        Busca monstruos por rango de VD y tipo con búsqueda binaria
+        
+        Args:
+            vd_min (str | float, optional): VD mínimo (incluido)
+            vd_max (str | float, optional): VD máximo (incluido)
+            tipo (str, optional): Tipo de criatura
+        
+        Returns:
+            numpy.ndarray: Filas de los monstruos, ordenadas por VD
+        """
+        import numpy as np
+        
+        if tipo is None:
+            filas, vds = None, self.vd
+        elif tipo in self._por_tipo:
+            filas, vds = self._por_tipo[tipo]
+        else:
+            return np.zeros(0, dtype=np.int64)
+        
+        inicio = 0 if vd_min is None else int(np.searchsorted(vds, valor_vd(vd_min), side="left"))
+        fin = len(vds) if vd_max is None else int(np.searchsorted(vds, valor_vd(vd_max), side="right"))
+        if filas is None:
+            return np.arange(inicio, fin, dtype=np.int64)
+        return filas[inicio:fin]
+    
+    def columnas(self, filas):
+        """
+        Obtiene las columnas de un grupo de monstruos (con repeticiones si las hay)
+        
+        Args:
+            filas (list | numpy.ndarray): Filas de los monstruos
+        
+        Returns:
+            dict: Nombre de columna -> array con un valor por monstruo
+        """
+        import numpy as np
+        
+        filas = np.asarray(filas, dtype=np.int64)
+        return {
+            "vd": self.vd[filas],
+            "experiencia": self.experiencia[filas],
+            "ca": self.ca[filas],
+            "pg": self.pg[filas],
+            "modificadores": self.modificadores[filas],
+            "ataques_asalto": self.ataques_asalto[filas],
+            "bono_ataque": self.bono_ataque[filas],
+            "daño_asalto": self.daño_asalto[filas]
+        }
+
+
+# Bestiario compartido, reconstruido sólo cuando cambia el archivo
+_cache_bestiario = {"firma": None, "bestiario": None}
+
+
+def _al_cambiar_archivo(evento):
+    """Descarta el bestiario al cambiar el archivo en disco"""
+    _cache_bestiario["bestiario"] = None
+
+
+suscribir(DIRECTORIO_MONSTRUOS, _al_cambiar_archivo)
+
+
+def cargar_monstruos():
+    """
+    Carga los bloques de estadísticas del archivo de monstruos
+    
+    Returns:
+        list: Bloques de estadísticas (vacía si no hay archivo)
+    """
+    ruta = os.path.join(DIRECTORIO_MONSTRUOS, ARCHIVO_MONSTRUOS)
+    if not os.path.exists(ruta):
+        return []
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error al cargar los monstruos: {str(e)}")
+        return []
+
+
+def guardar_monstruos(monstruos):
+    """
+    Guarda los bloques de estadísticas en el archivo de monstruos
+    
+    Args:
+        monstruos (list): Bloques de estadísticas
+    
+    Returns:
+        bool: True si se guardó correctamente
+    """
+    os.makedirs(DIRECTORIO_MONSTRUOS, exist_ok=True)
+    ruta = os.path.join(DIRECTORIO_MONSTRUOS, ARCHIVO_MONSTRUOS)
+    try:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(monstruos, f, ensure_ascii=False, indent=4)
+    except Exception as e:
+        print(f"Error al guardar los monstruos: {str(e)}")
+        return False
+    _cache_bestiario["bestiario"] = None
+    return True
+
+
+def obtener_bestiario():
+    """
+    Obtiene el bestiario compartido (se reconstruye si el archivo cambió)
+    
+    Returns:
+        Bestiario: Bestiario con todos los monstruos
+    """
+    bestiario = _cache_bestiario["bestiario"]
+    if bestiario is not None and vigilando(DIRECTORIO_MONSTRUOS):
+        return bestiario
+    
+    ruta = os.path.join(DIRECTORIO_MONSTRUOS, ARCHIVO_MONSTRUOS)
+    try:
+        estado = os.stat(ruta)
+        firma = (estado.st_mtime_ns, estado.st_size)
+    except OSError:
+        firma = None
+    if bestiario is None or _cache_bestiario["firma"] != firma:
+        bestiario = Bestiario(cargar_monstruos())
+        _cache_bestiario["bestiario"] = bestiario
+        _cache_bestiario["firma"] = firma
+    return bestiario
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    bestiario = obtener_bestiario()
+    print(f"{len(bestiario)} monstruos; tipos: {', '.join(bestiario.tipos_criatura())}")
+    for fila in bestiario.buscar("2", "5", "No muerto"):
+        print(f"  VD {bestiario.vd[fila]:g} {bestiario.nombres[fila]}: CA {bestiario.ca[fila]}, PG {bestiario.pg[fila]}, "
+              f"{bestiario.daño_asalto[fila]:.1f} de daño por asalto")
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché compartida de personajes para la aplicación D&D Combat Manager.
+Los archivos de personaje se leen una sola vez y se vuelven a cargar sólo cuando
+cambia su fecha de modificación o su tamaño. Las campañas guardan a sus jugadores
+como referencias ({"archivo": ...}) que se unen con esta caché al mostrarlas.
+"""
+
+import json
+import os
+import sys
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.vigilante_archivos import REINICIADO, suscribir, vigilando
+
+DIRECTORIO_PERSONAJES = "personajes"
+
+# Campos de la copia desnormalizada que guardaban las campañas antiguas
+CAMPOS_COPIA_JUGADOR = ["nombre", "clase", "raza", "nivel", "experiencia", "estadisticas", "competencias"]
+
+
+class CachePersonajes:
+    """Caché de archivos de personaje validada por fecha de modificación"""
+    
+    def __init__(self, directorio=DIRECTORIO_PERSONAJES):
+        """
+        Inicializa una caché vacía
+        
+        Args:
+            directorio (str): Carpeta con los archivos de personaje
+        """
+        self.directorio = directorio
+        self._entradas = {}
+        # True cuando _entradas refleja todo el directorio (sólo se usa con el vigilante)
+        self._completo = False
+        # Contador de invalidaciones y en cuál se invalidó cada archivo (o todos), para no
+        # guardar datos leídos antes de una invalidación que llegó durante la lectura
+        self._generacion = 0
+        self._invalidado_en = {}
+        self._reinicio = 0
+    
+    def _invalidado_desde(self, archivo, generacion):
+        """Indica si un archivo se invalidó después de una generación dada"""
+        return max(self._reinicio, self._invalidado_en.get(archivo, 0)) > generacion
+    
+    def _cargar(self, archivo, firma):
+        """Lee un archivo de personaje y lo guarda en la caché con su firma"""
+        ruta = os.path.join(self.directorio, archivo)
+        generacion = self._generacion
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except Exception:
+            self._entradas.pop(archivo, None)
+            return None
+        
+        if not isinstance(datos, dict):
+            self._entradas.pop(archivo, None)
+            return None
+        
+        # Si cambió mientras se leía, devolver lo leído sin guardarlo: la siguiente
+        # consulta volverá a leer el archivo
+        if not self._invalidado_desde(archivo, generacion):
+            self._entradas[archivo] = (firma, datos)
+        return datos
+    
+    def obtener(self, archivo):
+        """
+        Obtiene los datos de un personaje, releyendo el archivo sólo si cambió
+        
+        El diccionario devuelto es compartido: no debe modificarse. Para editarlo,
+        usar cargar_personaje, que devuelve una copia independiente.
+        
+        Args:
+            archivo (str): Nombre del archivo del personaje
+        
+        Returns:
+            dict: Datos del personaje o None si no existe o no se puede leer
+        """
+        if not archivo:
+            return None
+        
+        # Con el vigilante en marcha, una entrada en caché es válida hasta que llegue un evento
+        entrada = self._entradas.get(archivo)
+        if entrada and vigilando(self.directorio):
+            return entrada[1]
+        
+        try:
+            estado = os.stat(os.path.join(self.directorio, archivo))
+        except OSError:
+            self._entradas.pop(archivo, None)
+            return None
+        
+        firma = (estado.st_mtime_ns, estado.st_size)
+        if entrada and entrada[0] == firma:
+            return entrada[1]
+        return self._cargar(archivo, firma)
+    
+    def listar(self):
+        """
+        Obtiene todos los personajes del directorio, reutilizando los ya cargados
+        
+        Returns:
+            list: Datos de cada personaje (compartidos, no deben modificarse)
+        """
+        personajes = []
+        if self._completo and vigilando(self.directorio):
+            return [datos for _, datos in list(self._entradas.values())]
+        if not os.path.isdir(self.directorio):
+            return personajes
+        
+        generacion = self._generacion
+        vistos = set()
+        with os.scandir(self.directorio) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file() or not entrada.name.endswith(".json"):
+                    continue
+                vistos.add(entrada.name)
+                
+                estado = entrada.stat()
+                firma = (estado.st_mtime_ns, estado.st_size)
+                cacheada = self._entradas.get(entrada.name)
+                if cacheada and cacheada[0] == firma:
+                    datos = cacheada[1]
+                else:
+                    datos = self._cargar(entrada.name, firma)
+                if datos is not None:
+                    personajes.append(datos)
+        
+        # Olvidar los archivos que ya no existen
+        for archivo in list(self._entradas):
+            if archivo not in vistos:
+                self._entradas.pop(archivo, None)
+        
+        # Sólo se da por completo si nada se invalidó durante el recorrido
+        self._completo = self._generacion == generacion
+        return personajes
+    
+    def invalidar(self, archivo=None):
+        """
+        Descarta un personaje de la caché (o todos si no se indica ninguno)
+        
+        Args:
+            archivo (str, optional): Nombre del archivo del personaje
+        """
+        self._completo = False
+        self._generacion += 1
+        if archivo is None:
+            self._reinicio = self._generacion
+            self._entradas.clear()
+        else:
+            self._invalidado_en[archivo] = self._generacion
+            self._entradas.pop(archivo, None)
+
+
+# Caché compartida por toda la aplicación
+_cache = CachePersonajes()
+
+
+def _al_cambiar_archivo(evento):
+    """Invalida sólo el personaje afectado por un cambio en disco"""
+    if evento.tipo == REINICIADO:
+        _cache.invalidar()
+    else:
+        _cache.invalidar(os.path.basename(evento.ruta))
+
+
+suscribir(DIRECTORIO_PERSONAJES, _al_cambiar_archivo)
+
+
+def obtener_personaje(archivo):
+    """
+    Obtiene los datos (compartidos, de sólo lectura) de un personaje
+    
+    Args:
+        archivo (str): Nombre del archivo del personaje
+    
+    Returns:
+        dict: Datos del personaje o None si no existe
+    """
+    return _cache.obtener(archivo)
+
+
+def cargar_personaje(archivo):
+    """
+    Obtiene una copia editable de los datos de un personaje
+    
+    Args:
+        archivo (str): Nombre del archivo del personaje
+    
+    Returns:
+        dict: Copia de los datos del personaje o None si no existe
+    """
+    datos = _cache.obtener(archivo)
+    if datos is None:
+        return None
+    # Copia profunda barata: los datos proceden de JSON
+    return json.loads(json.dumps(datos))
+
+
+def listar_personajes():
+    """
+    Obtiene todos los personajes guardados
+    
+    Returns:
+        list: Datos de cada personaje (compartidos, de sólo lectura)
+    """
+    return _cache.listar()
+
+
+def invalidar_personaje(archivo=None):
+    """
+    Descarta un personaje de la caché tras escribirlo o borrarlo
+    
+    Args:
+        archivo (str, optional): Nombre del archivo (todos si es None)
+    """
+    _cache.invalidar(archivo)
+
+
+def referencia_jugador(personaje):
+    """
+    Crea la referencia que guarda una campaña para uno de sus jugadores
+    
+    Args:
+        personaje (dict): Datos del personaje
+    
+    Returns:
+        dict: Referencia con el nombre del archivo del personaje
+    """
+    return {"archivo": personaje.get("archivo", "")}
+
+
+def normalizar_jugadores(jugadores):
+    """
+    Convierte la lista de jugadores de una campaña al formato de referencias
+    
+    Las campañas antiguas guardaban una copia de cada personaje; se reduce a su
+    referencia. Las entradas sin archivo se conservan tal cual, ya que no hay otro
+    sitio del que obtener sus datos.
+    
+    Args:
+        jugadores (list): Jugadores tal y como están en el archivo de campaña
+    
+    Returns:
+        list: Nueva lista de referencias, sin duplicados
+    """
+    normalizados = []
+    vistos = set()
+    for jugador in jugadores:
+        archivo = jugador.get("archivo", "")
+        if not archivo:
+            normalizados.append(jugador)
+            continue
+        if archivo in vistos:
+            continue
+        vistos.add(archivo)
+        normalizados.append({"archivo": archivo})
+    return normalizados
+
+
+def unir_jugadores(jugadores):
+    """
+    Une las referencias de jugadores de una campaña con los datos de sus personajes
+    
+    Args:
+        jugadores (list): Referencias (o copias antiguas) de los jugadores
+    
+    Returns:
+        list: Un diccionario por jugador con los datos actuales del personaje. Si el
+            archivo ya no existe se usan los datos guardados en la campaña, si los hay,
+            y se marca con "falta_archivo".
+    """
+    unidos = []
+    for jugador in jugadores:
+        datos = obtener_personaje(jugador.get("archivo", ""))
+        if datos is not None:
+            unido = dict(datos)
+            unido["archivo"] = jugador.get("archivo", "")
+        else:
+            unido = {campo: jugador[campo] for campo in CAMPOS_COPIA_JUGADOR if campo in jugador}
+            unido.setdefault("nombre", os.path.splitext(jugador.get("archivo", ""))[0] or "Sin nombre")
+            unido["archivo"] = jugador.get("archivo", "")
+            unido["falta_archivo"] = True
+        unidos.append(unido)
+    return unidos
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calculadora de ataques con armas para la aplicación D&D Combat Manager.
+Combina las armas del catálogo de objetos con las estadísticas del personaje para
+obtener la probabilidad de impacto contra una CA, el daño con críticos (dados
+duplicados) y el daño esperado por asalto (DPR), con ventaja, desventaja y Ataque
+extra. Tiene un cálculo exacto y otro por muestreo con NumPy, y ambos evalúan todas
+las armas del inventario a la vez.
+"""
+
+import os
+import sys
+from functools import lru_cache
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from conectores.items import Item, Weapon, load_item
+from utils.dados import distribucion_dados
+from utils.servicio_aleatorio import generador_para
+from utils.tablas_reglas import bonificador_competencia, modificador, ataques_por_accion
+
+# Modos de tirada del d20
+NORMAL = "normal"
+VENTAJA = "ventaja"
+DESVENTAJA = "desventaja"
+
+# Propiedades de arma que cambian la característica usada
+PROPIEDAD_SUTIL = "Sutil"
+PROPIEDAD_DISTANCIA = "A distancia"
+
+
+@lru_cache(maxsize=8)
+def distribucion_d20(modo=NORMAL):
+    """
+    Obtiene la probabilidad de cada resultado del d20
+    
+    Args:
+        modo (str): NORMAL, VENTAJA (la mayor de dos tiradas) o DESVENTAJA (la menor)
+    
+    Returns:
+        tuple: 21 posiciones; la posición r es la probabilidad de sacar r (la 0 no se usa)
+    """
+    probabilidades = [0.0] * 21
+    for r in range(1, 21):
+        if modo == VENTAJA:
+            probabilidades[r] = (r * r - (r - 1) * (r - 1)) / 400
+        elif modo == DESVENTAJA:
+            probabilidades[r] = ((21 - r) ** 2 - (20 - r) ** 2) / 400
+        else:
+            probabilidades[r] = 1 / 20
+    return tuple(probabilidades)
+
+
+def probabilidades_impacto(bono_ataque, ca_objetivo, modo=NORMAL, umbral_critico=20):
+    """
+    Calcula la probabilidad de impacto normal y de crítico de un ataque
+    
+    Un 1 natural siempre falla y una tirada igual o superior al umbral de crítico
+    siempre impacta como crítico.
+    
+    Args:
+        bono_ataque (int): Bonificador total al ataque
+        ca_objetivo (int): CA del objetivo
+        modo (str): NORMAL, VENTAJA o DESVENTAJA
+        umbral_critico (int): Tirada mínima para un crítico (20 por defecto)
+    
+    Returns:
+        tuple: (probabilidad de impacto sin crítico, probabilidad de crítico)
+    """
+    d20 = distribucion_d20(modo)
+    critico = sum(d20[umbral_critico:])
+    impacto = sum(d20[r] for r in range(2, umbral_critico) if r + bono_ataque >= ca_objetivo)
+    return impacto, critico
+
+
+def daño_medio(dados, modificador_daño=0, critico=False):
+    """
+    Calcula el daño medio de un impacto (nunca menor que 0)
+    
+    Args:
+        dados (tuple): (cantidad, caras, modificador) como devuelve parsear_dados
+        modificador_daño (int): Modificador de característica y bonificadores al daño
+        critico (bool): Si es True se tiran el doble de dados
+    
+    Returns:
+        float: Daño medio
+    """
+    if dados is None:
+        return float(max(0, modificador_daño))
+    cantidad, caras, mod_dados = dados
+    if critico:
+        cantidad *= 2
+    extra = mod_dados + modificador_daño
+    media = 0.0
+    for i, probabilidad in enumerate(distribucion_dados(cantidad, caras)):
+        media += probabilidad * max(0, cantidad + i + extra)
+    return media
+
+
+def _entero(valor, por_defecto=0):
+    """Convierte un valor a entero o devuelve el valor por defecto"""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return por_defecto
+
+
+def armas_de_inventario(personaje):
+    """
+    Obtiene las armas del inventario de un personaje
+    
+    Cada entrada del inventario puede ser un objeto, un diccionario con los datos del
+    objeto, una referencia {"id", "type"} al catálogo o directamente el id de un arma.
+    
+    Args:
+        personaje (dict): Datos del personaje
+    
+    Returns:
+        list: Objetos Weapon
+    """
+    armas = []
+    for entrada in personaje.get("inventario", []) or []:
+        arma = None
+        if isinstance(entrada, Item):
+            arma = entrada
+        elif isinstance(entrada, str):
+            arma = load_item("weapon", entrada)
+        elif isinstance(entrada, dict) and entrada.get("type", "weapon") == "weapon":
+            if "properties" in entrada or "name" in entrada:
+                arma = Item.from_dict(dict(entrada, type="weapon"))
+            elif entrada.get("id"):
+                arma = load_item("weapon", entrada["id"])
+        if isinstance(arma, Weapon):
+            armas.append(arma)
+    return armas
+
+
+def perfil_ataque(personaje, arma):
+    """
+    Reúne los valores que definen los ataques de un personaje con un arma
+    
+    Args:
+        personaje (dict): Datos del personaje
+        arma (Weapon): Arma del catálogo
+    
+    Returns:
+        dict: nombre, bono de ataque, dados, modificador de daño, tipo de daño y
+            ataques por acción
+    """
+    estadisticas = personaje.get("estadisticas", {}) or {}
+    mod_fuerza = modificador(_entero(estadisticas.get("Fuerza", 10), 10))
+    mod_destreza = modificador(_entero(estadisticas.get("Destreza", 10), 10))
+    
+    propiedades_arma = arma.properties.get("properties", []) or []
+    if PROPIEDAD_DISTANCIA in propiedades_arma:
+        mod = mod_destreza
+    elif PROPIEDAD_SUTIL in propiedades_arma:
+        mod = max(mod_fuerza, mod_destreza)
+    else:
+        mod = mod_fuerza
+    
+    # Competencia: igual que el editor (armas simples o marciales) o el arma en la lista específica
+    nivel = _entero(personaje.get("nivel", 1), 1)
+    comp_armas = personaje.get("comp_armas", []) or []
+    especificas = [nombre.strip().lower() for nombre in str(personaje.get("armas_especificas", "")).split(",")]
+    competente = "Simples" in comp_armas or "Marciales" in comp_armas or arma.name.lower() in especificas
+    competencia = bonificador_competencia(nivel) if competente else 0
+    
+    # Bonificadores mágicos opcionales del arma
+    bono_magico_ataque = _entero(arma.properties.get("attack_bonus", 0))
+    bono_magico_daño = _entero(arma.properties.get("damage_bonus", 0))
+    
+    return {
+        "nombre": arma.name,
+        "arma": arma,
+        "bono_ataque": mod + competencia + bono_magico_ataque,
+        "dados": arma.dice,
+        "mod_daño": mod + bono_magico_daño,
+        "tipo_daño": arma.damage_type,
+        "ataques": ataques_por_accion(personaje.get("clase", ""), nivel),
+        "umbral_critico": _entero(arma.properties.get("crit_range", 20), 20)
+    }
+
+
+def dpr_exacto(perfil, ca_objetivo, modo=NORMAL):
+    """
+    Calcula exactamente la probabilidad de impacto y el daño esperado por asalto
+    
+    Args:
+        perfil (dict): Perfil devuelto por perfil_ataque
+        ca_objetivo (int): CA del objetivo
+        modo (str): NORMAL, VENTAJA o DESVENTAJA
+    
+    Returns:
+        dict: Probabilidades de impacto y crítico, daño por impacto y DPR
+    """
+    impacto, critico = probabilidades_impacto(perfil["bono_ataque"], ca_objetivo, modo, perfil["umbral_critico"])
+    daño_normal = daño_medio(perfil["dados"], perfil["mod_daño"])
+    daño_critico = daño_medio(perfil["dados"], perfil["mod_daño"], critico=True)
+    por_ataque = impacto * daño_normal + critico * daño_critico
+    return {
+        "prob_impacto": impacto + critico,
+        "prob_critico": critico,
+        "daño_impacto": daño_normal,
+        "daño_critico": daño_critico,
+        "daño_por_ataque": por_ataque,
+        "dpr": por_ataque * perfil["ataques"]
+    }
+
+
+def dpr_muestreado(perfiles, ca_objetivo, modo=NORMAL, asaltos=100000, semilla=None):
+    """
+    Estima el daño por asalto simulando muchos asaltos con NumPy
+    
+    Todas las tiradas de un arma (d20 y dados de daño de todos los asaltos y ataques)
+    se generan en una sola operación por arma. Cada arma usa su propio flujo del
+    servicio aleatorio, así que su resultado no depende de qué otras armas se evalúen.
+    
+    Args:
+        perfiles (list): Perfiles devueltos por perfil_ataque
+        ca_objetivo (int): CA del objetivo
+        modo (str): NORMAL, VENTAJA o DESVENTAJA
+        asaltos (int): Número de asaltos simulados por arma
+        semilla (int, optional): Semilla para reproducir la simulación
+    
+    Returns:
+        list: Por arma, diccionario con DPR medio, desviación típica y frecuencias de
+            impacto y crítico
+    """
+    import numpy as np
+    
+    resultados = []
+    for perfil in perfiles:
+        rng = generador_para(semilla, "ataques", perfil["nombre"])
+        forma = (asaltos, perfil["ataques"])
+        d20 = rng.integers(1, 21, size=forma)
+        if modo == VENTAJA:
+            d20 = np.maximum(d20, rng.integers(1, 21, size=forma))
+        elif modo == DESVENTAJA:
+            d20 = np.minimum(d20, rng.integers(1, 21, size=forma))
+        
+        critico = d20 >= perfil["umbral_critico"]
+        impacto = critico | ((d20 > 1) & (d20 + perfil["bono_ataque"] >= ca_objetivo))
+        
+        # Daño de cada ataque: dados normales más, en los críticos, otra tirada de dados
+        if perfil["dados"] is not None:
+            cantidad, caras, mod_dados = perfil["dados"]
+            daño = rng.integers(1, caras + 1, size=forma + (cantidad,)).sum(axis=-1)
+            extra = rng.integers(1, caras + 1, size=forma + (cantidad,)).sum(axis=-1)
+            daño = daño + np.where(critico, extra, 0) + mod_dados + perfil["mod_daño"]
+        else:
+            daño = np.full(forma, perfil["mod_daño"])
+        daño = np.where(impacto, np.maximum(daño, 0), 0)
+        
+        por_asalto = daño.sum(axis=1)
+        resultados.append({
+            "prob_impacto": float(impacto.mean()),
+            "prob_critico": float(critico.mean()),
+            "dpr": float(por_asalto.mean()),
+            "desviacion": float(por_asalto.std())
+        })
+    return resultados
+
+
+def evaluar_armas(personaje, ca_objetivo, armas=None, modo=NORMAL, asaltos=None, semilla=None):
+    """
+    Evalúa todas las armas de un personaje contra una CA
+    
+    Args:
+        personaje (dict): Datos del personaje
+        ca_objetivo (int): CA del objetivo
+        armas (list, optional): Armas a evaluar. Por defecto, las del inventario
+        modo (str): NORMAL, VENTAJA o DESVENTAJA
+        asaltos (int, optional): Si se indica, el DPR se estima por muestreo con este
+            número de asaltos; si no, se calcula de forma exacta
+        semilla (int, optional): Semilla del muestreo
+    
+    Returns:
+        list: Un diccionario por arma (perfil y resultados), de mayor a menor DPR
+    """
+    if armas is None:
+        armas = armas_de_inventario(personaje)
+    perfiles = [perfil_ataque(personaje, arma) for arma in armas]
+    
+    if asaltos:
+        resultados = dpr_muestreado(perfiles, ca_objetivo, modo, asaltos, semilla)
+    else:
+        resultados = [dpr_exacto(perfil, ca_objetivo, modo) for perfil in perfiles]
+    
+    evaluadas = [dict(perfil, **resultado) for perfil, resultado in zip(perfiles, resultados)]
+    evaluadas.sort(key=lambda evaluada: evaluada["dpr"], reverse=True)
+    return evaluadas
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    guerrero = {
+        "clase": "Guerrero",
+        "nivel": 5,
+        "estadisticas": {"Fuerza": 16, "Destreza": 14},
+        "comp_armas": ["Simples", "Marciales"],
+        "inventario": [
+            {"name": "Espada larga", "properties": {"damage_dice": "1d8", "damage_type": "Cortante"}},
+            {"name": "Estoque", "properties": {"damage_dice": "1d8", "damage_type": "Perforante",
+                                               "properties": ["Sutil"]}},
+            {"name": "Gran hacha", "properties": {"damage_dice": "1d12", "damage_type": "Cortante",
+                                                  "properties": ["A dos manos", "Pesada"]}}
+        ]
+    }
+    for modo in (NORMAL, VENTAJA, DESVENTAJA):
+        print(f"= CA 15, {modo} =")
+        for evaluada in evaluar_armas(guerrero, 15, modo=modo):
+            print(f"  {evaluada['nombre']}: impacto {evaluada['prob_impacto']:.1%}, DPR {evaluada['dpr']:.2f}")
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Constructor de encuentros por presupuesto de experiencia para la aplicación D&D Combat Manager.
+A partir de los niveles del grupo (por ejemplo los jugadores de una campaña) y del
+bestiario, busca combinaciones de monstruos cuya experiencia ajustada cae en la
+franja de la dificultad pedida. Los monstruos se agrupan por experiencia (sólo hay
+unas pocas decenas de valores distintos, tengan el bestiario diez monstruos o
+diez mil) y una mochila acotada con memoización calcula, como bitsets, qué sumas
+son alcanzables; la búsqueda sólo recorre ramas que llevan a una solución.
+"""
+
+import math
+import os
+import sys
+from functools import lru_cache, reduce
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.bestiario import obtener_bestiario
+from utils.cache_personajes import unir_jugadores
+from utils.servicio_aleatorio import generador_para
+from utils.tablas_reglas import DIFICULTADES_ENCUENTRO, multiplicador_encuentro, umbrales_encuentro
+
+# Dificultad de encuentro por defecto según la dificultad de la campaña
+DIFICULTAD_CAMPANA = {
+    "Fácil": "Fácil",
+    "Normal": "Media",
+    "Difícil": "Difícil",
+    "Mortal": "Mortal"
+}
+
+# Un encuentro mortal se busca hasta este múltiplo del umbral mortal
+TECHO_MORTAL = 1.5
+
+# Combinaciones de experiencia que se examinan como máximo por número de monstruos
+LIMITE_COMBINACIONES = 100
+
+# Combinaciones más cercanas al presupuesto entre las que se eligen las variadas, por encuentro pedido
+CANDIDATAS_POR_ENCUENTRO = 20
+
+
+def niveles_campana(campana):
+    """
+    Obtiene los niveles de los jugadores de una campaña
+    
+    Args:
+        campana (dict): Datos de la campaña
+    
+    Returns:
+        list: Nivel de cada jugador
+    """
+    return [int(jugador.get("nivel", 1)) for jugador in unir_jugadores(campana.get("jugadores", []))]
+
+
+def franja_dificultad(niveles, dificultad):
+    """
+    Obtiene la franja de experiencia ajustada de una dificultad
+    
+    Args:
+        niveles (list): Nivel de cada personaje
+        dificultad (str): "Fácil", "Media", "Difícil" o "Mortal"
+    
+    Returns:
+        tuple: (mínimo, máximo) de experiencia ajustada, ambos incluidos
+    """
+    umbrales = umbrales_encuentro(niveles)
+    indice = DIFICULTADES_ENCUENTRO.index(dificultad)
+    minimo = umbrales[indice]
+    if indice + 1 < len(umbrales):
+        maximo = umbrales[indice + 1] - 1
+    else:
+        maximo = int(umbrales[indice] * TECHO_MORTAL)
+    return minimo, maximo
+
+
+def evaluar_encuentro(niveles, experiencias):
+    """
+    Calcula la dificultad de un encuentro
+    
+    Args:
+        niveles (list): Nivel de cada personaje
+        experiencias (list): Experiencia de cada monstruo
+    
+    Returns:
+        tuple: (experiencia ajustada, dificultad o "Trivial" si no llega a Fácil)
+    """
+    ajustada = sum(experiencias) * multiplicador_encuentro(len(experiencias), len(niveles))
+    dificultad = "Trivial"
+    for nombre, umbral in zip(DIFICULTADES_ENCUENTRO, umbrales_encuentro(niveles)):
+        if ajustada >= umbral:
+            dificultad = nombre
+    return ajustada, dificultad
+
+
+def _hay_suma(bits, minimo, maximo):
+    """Indica si el bitset de sumas alcanzables tiene alguna en [minimo, maximo]"""
+    minimo = max(minimo, 0)
+    if maximo < minimo:
+        return False
+    return (bits >> minimo) & ((1 << (maximo - minimo + 1)) - 1) != 0
+
+
+def _combinaciones_experiencia(pesos, cotas, maximo_monstruos, franjas, techo):
+    """
+    Busca cuántos monstruos tomar de cada grupo de experiencia
+    
+    Args:
+        pesos (list): Experiencia de cada grupo, en unidades
+        cotas (list): Máximo de monstruos de cada grupo
+        maximo_monstruos (int): Máximo de monstruos del encuentro
+        franjas (dict): Número de monstruos -> (mínimo, máximo) de experiencia bruta en unidades
+        techo (int): Mayor suma que interesa
+    
+    Returns:
+        list: Tuplas (experiencia bruta en unidades, número de monstruos, monstruos de cada grupo)
+    """
+    n = len(pesos)
+    mascara = (1 << (techo + 1)) - 1
+    
+    @lru_cache(maxsize=None)
+    def alcanzables(i, restantes):
+        # Bitset de las sumas posibles con exactamente "restantes" monstruos de los grupos i..n-1
+        if i == n:
+            return 1 if restantes == 0 else 0
+        bits = 0
+        for copias in range(min(cotas[i], restantes) + 1):
+            bits |= alcanzables(i + 1, restantes - copias) << (copias * pesos[i])
+        return bits & mascara
+    
+    combinaciones = []
+    elegidas = [0] * n
+    
+    def recorrer(i, restantes, minimo, maximo, suma, encontradas):
+        if restantes == 0:
+            combinaciones.append((suma, num_monstruos, tuple(elegidas)))
+            return encontradas + 1
+        for copias in range(min(cotas[i], restantes), -1, -1):
+            desplazamiento = copias * pesos[i]
+            if not _hay_suma(alcanzables(i + 1, restantes - copias), minimo - desplazamiento, maximo - desplazamiento):
+                continue
+            elegidas[i] = copias
+            encontradas = recorrer(
+                i + 1, restantes - copias, minimo - desplazamiento, maximo - desplazamiento,
+                suma + desplazamiento, encontradas
+            )
+            elegidas[i] = 0
+            if encontradas >= LIMITE_COMBINACIONES:
+                break
+        return encontradas
+    
+    for num_monstruos in range(1, maximo_monstruos + 1):
+        minimo, maximo = franjas[num_monstruos]
+        if _hay_suma(alcanzables(0, num_monstruos), minimo, maximo):
+            recorrer(0, num_monstruos, minimo, maximo, 0, 0)
+    return combinaciones
+
+
+def _parecido(a, b):
+    """Proporción de monstruos (por grupo de experiencia) que comparten dos combinaciones"""
+    comunes = sum(min(x, y) for x, y in zip(a, b))
+    return comunes / max(sum(a), sum(b))
+
+
+def construir_encuentros(niveles, dificultad="Media", bestiario=None, vd_min=None, vd_max=None, tipo=None,
+                         cantidad=5, maximo_monstruos=8, maximo_iguales=None, semilla=None):
+    """
+    Propone encuentros variados que encajan en el presupuesto de una dificultad
+    
+    Args:
+        niveles (list): Nivel de cada personaje del grupo
+        dificultad (str): "Fácil", "Media", "Difícil" o "Mortal"
+        bestiario (Bestiario, optional): Bestiario a usar. Por defecto el compartido
+        vd_min (str | float, optional): VD mínimo de los monstruos
+        vd_max (str | float, optional): VD máximo de los monstruos
+        tipo (str, optional): Tipo de criatura de los monstruos
+        cantidad (int): Número de encuentros a proponer
+        maximo_monstruos (int): Máximo de monstruos por encuentro
+        maximo_iguales (int, optional): Máximo de copias del mismo monstruo
+        semilla (int, optional): Semilla para elegir entre monstruos de igual experiencia
+    
+    Returns:
+        list: Encuentros ordenados del más ajustado al presupuesto al menos, cada uno un
+            diccionario con "monstruos" (nombre, fila, cantidad, vd, experiencia),
+            "num_monstruos", "experiencia", "multiplicador", "experiencia_ajustada" y "dificultad"
+    """
+    import numpy as np
+    
+    if not niveles:
+        return []
+    if bestiario is None:
+        bestiario = obtener_bestiario()
+    minimo, maximo = franja_dificultad(niveles, dificultad)
+    
+    # Agrupar candidatos por experiencia
+    filas = bestiario.buscar(vd_min, vd_max, tipo)
+    experiencia_filas = bestiario.experiencia[filas]
+    filas = filas[(experiencia_filas > 0) & (experiencia_filas <= maximo)]
+    if len(filas) == 0:
+        return []
+    valores, grupo_fila = np.unique(bestiario.experiencia[filas], return_inverse=True)
+    orden = np.argsort(grupo_fila, kind="stable")
+    cortes = np.cumsum(np.bincount(grupo_fila, minlength=len(valores)))[:-1]
+    grupos = {
+        int(experiencia): filas_grupo.tolist()
+        for experiencia, filas_grupo in zip(valores, np.split(filas[orden], cortes))
+    }
+    experiencias = sorted(grupos, reverse=True)
+    
+    # Trabajar en unidades del máximo común divisor para acortar los bitsets
+    unidad = reduce(math.gcd, experiencias)
+    pesos = [experiencia // unidad for experiencia in experiencias]
+    cotas = [
+        maximo_monstruos if maximo_iguales is None else min(maximo_monstruos, maximo_iguales * len(grupos[experiencia]))
+        for experiencia in experiencias
+    ]
+    
+    franjas = {}
+    for num_monstruos in range(1, maximo_monstruos + 1):
+        multiplicador = multiplicador_encuentro(num_monstruos, len(niveles))
+        franjas[num_monstruos] = (
+            math.ceil(minimo / multiplicador / unidad),
+            math.floor(maximo / multiplicador / unidad)
+        )
+    techo = max(franja[1] for franja in franjas.values())
+    
+    combinaciones = _combinaciones_experiencia(pesos, cotas, maximo_monstruos, franjas, techo)
+    if not combinaciones:
+        return []
+    
+    # Ordenar por cercanía al centro de la franja y elegir evitando combinaciones parecidas
+    centro = (minimo + maximo) / 2
+    anchura = maximo - minimo + 1
+    
+    def ajustada(combinacion):
+        suma, num_monstruos, _ = combinacion
+        return suma * unidad * multiplicador_encuentro(num_monstruos, len(niveles))
+    
+    # Sólo las más cercanas entran en la selección; el parecido máximo de cada
+    # candidata con las ya elegidas se actualiza con cada nueva elección
+    candidatas = sorted(combinaciones, key=lambda combinacion: abs(ajustada(combinacion) - centro))
+    candidatas = candidatas[:cantidad * CANDIDATAS_POR_ENCUENTRO]
+    distancias = [abs(ajustada(combinacion) - centro) / anchura for combinacion in candidatas]
+    parecidos = [0.0] * len(candidatas)
+    elegidas = []
+    libres = set(range(len(candidatas)))
+    while libres and len(elegidas) < cantidad:
+        mejor = min(libres, key=lambda i: (distancias[i] + parecidos[i], i))
+        libres.remove(mejor)
+        elegidas.append(candidatas[mejor][2])
+        for i in libres:
+            parecidos[i] = max(parecidos[i], _parecido(candidatas[i][2], candidatas[mejor][2]))
+    
+    # Repartir cada grupo de experiencia entre sus monstruos, rotando de un encuentro a otro
+    generador = generador_para(semilla, "encuentros")
+    turnos = {experiencia: int(generador.integers(len(filas))) for experiencia, filas in grupos.items()}
+    encuentros = []
+    for combinacion in elegidas:
+        monstruos = []
+        for copias, experiencia in zip(combinacion, experiencias):
+            filas = grupos[experiencia]
+            while copias > 0:
+                fila = filas[turnos[experiencia] % len(filas)]
+                turnos[experiencia] += 1
+                tomadas = copias if maximo_iguales is None else min(copias, maximo_iguales)
+                copias -= tomadas
+                monstruos.append({
+                    "nombre": bestiario.nombres[fila],
+                    "fila": fila,
+                    "cantidad": tomadas,
+                    "vd": float(bestiario.vd[fila]),
+                    "experiencia": experiencia
+                })
+        num_monstruos = sum(combinacion)
+        bruta = sum(copias * experiencia for copias, experiencia in zip(combinacion, experiencias))
+        multiplicador = multiplicador_encuentro(num_monstruos, len(niveles))
+        encuentros.append({
+            "monstruos": monstruos,
+            "num_monstruos": num_monstruos,
+            "experiencia": bruta,
+            "multiplicador": multiplicador,
+            "experiencia_ajustada": bruta * multiplicador,
+            "dificultad": dificultad
+        })
+    return encuentros
+
+
+def encuentros_campana(campana, dificultad=None, **opciones):
+    """
+    Propone encuentros para los jugadores de una campaña
+    
+    Args:
+        campana (dict): Datos de la campaña
+        dificultad (str, optional): Dificultad del encuentro. Por defecto, la que
+            corresponde a la dificultad de la campaña
+        **opciones: Resto de parámetros de construir_encuentros
+    
+    Returns:
+        list: Encuentros propuestos
+    """
+    if dificultad is None:
+        dificultad = DIFICULTAD_CAMPANA.get(campana.get("dificultad", "Normal"), "Media")
+    return construir_encuentros(niveles_campana(campana), dificultad, **opciones)
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    grupo = [3, 3, 4, 4]
+    for dificultad in DIFICULTADES_ENCUENTRO:
+        print(f"{dificultad} {franja_dificultad(grupo, dificultad)}:")
+        for encuentro in construir_encuentros(grupo, dificultad, cantidad=3, semilla=1):
+            monstruos = ", ".join(f"{monstruo['cantidad']}x {monstruo['nombre']}" for monstruo in encuentro["monstruos"])
+            print(f"  {monstruos} ({encuentro['experiencia_ajustada']:g} PX ajustados)")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Interpretación de expresiones de dados (NdM+K) para la aplicación D&D Combat Manager.
+Las expresiones se analizan una sola vez y el resultado se reutiliza, ya que las
+mismas cadenas ("1d8", "2d6+3"...) aparecen en miles de cálculos de daño.
+"""
+
+import re
+from functools import lru_cache
+
+# Mismo formato que valida el gestor de hechizos: 2d6, 1d8+3, 3d4-2
+PATRON_DADOS = re.compile(r'^(\d+)d(\d+)([+-]\d+)?$')
+
+
+@lru_cache(maxsize=1024)
+def parsear_dados(formato):
+    """
+    Descompone una expresión de dados
+    
+    Args:
+        formato (str): Expresión del tipo NdM, NdM+K o NdM-K
+    
+    Returns:
+        tuple: (cantidad, caras, modificador) o None si la expresión está vacía o no es válida
+    """
+    if not formato:
+        return None
+    coincidencia = PATRON_DADOS.match(formato.strip().lower())
+    if not coincidencia:
+        return None
+    cantidad, caras, modificador = coincidencia.groups()
+    return int(cantidad), int(caras), int(modificador or 0)
+
+
+def promedio_dados(formato):
+    """
+    Calcula el resultado medio de una expresión de dados
+    
+    Args:
+        formato (str): Expresión del tipo NdM+K
+    
+    Returns:
+        float: Resultado medio (0 si la expresión no es válida)
+    """
+    dados = parsear_dados(formato)
+    if dados is None:
+        return 0.0
+    cantidad, caras, modificador = dados
+    return cantidad * (caras + 1) / 2 + modificador
+
+
+@lru_cache(maxsize=256)
+def distribucion_dados(cantidad, caras):
+    """
+    Calcula la distribución exacta de la suma de varios dados iguales
+    
+    Args:
+        cantidad (int): Número de dados
+        caras (int): Caras de cada dado
+    
+    Returns:
+        tuple: Probabilidad de cada suma; la posición i corresponde a la suma cantidad + i
+    """
+    if cantidad <= 0 or caras <= 0:
+        return (1.0,)
+    distribucion = [1.0 / caras] * caras
+    for _ in range(cantidad - 1):
+        siguiente = [0.0] * (len(distribucion) + caras - 1)
+        for i, probabilidad in enumerate(distribucion):
+            parte = probabilidad / caras
+            for cara in range(caras):
+                siguiente[i + cara] += parte
+        distribucion = siguiente
+    return tuple(distribucion)
+
+
+def tirar_dados(cantidad, caras, generador, tiradas=None):
+    """
+    Tira varios dados iguales de una vez con un generador de NumPy
+    
+    Args:
+        cantidad (int): Número de dados
+        caras (int): Caras de cada dado
+        generador (numpy.random.Generator): Generador (ver utils.servicio_aleatorio)
+        tiradas (int, optional): Si se indica, repite la tirada ese número de veces
+    
+    Returns:
+        int | numpy.ndarray: Suma de los dados, o un array con la suma de cada tirada
+    """
+    if tiradas is None:
+        if cantidad <= 0 or caras <= 0:
+            return 0
+        return int(generador.integers(1, caras + 1, size=cantidad).sum())
+    if cantidad <= 0 or caras <= 0:
+        return generador.integers(0, 1, size=tiradas)
+    return generador.integers(1, caras + 1, size=(tiradas, cantidad)).sum(axis=1)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Seguimiento de efectos activos (duración de hechizos y concentración) para la
+aplicación D&D Combat Manager.
+Las duraciones ("Concentración (hasta 1 minuto)", "1 hora"...) se convierten a
+asaltos una sola vez y los vencimientos se guardan en una rueda de temporizadores
+jerárquica: avanzar un asalto sólo toca los efectos que vencen en él, así que un
+combate con cientos de efectos activos avanza en microsegundos. Romper la
+concentración de un lanzador termina de golpe todos los efectos que mantenía.
+"""
+
+import os
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.servicio_aleatorio import generador as generador_aleatorio
+
+# Asaltos por unidad de tiempo (un asalto son 6 segundos)
+ASALTOS_POR_UNIDAD = {
+    "asalto": 1,
+    "round": 1,
+    "turno": 1,
+    "minuto": 10,
+    "hora": 600,
+    "dia": 14400
+}
+
+PATRON_DURACION = re.compile(r'(\d+)\s*(asalto|round|turno|minuto|hora|dia)')
+
+# Rueda de temporizadores: 4 niveles de 64 casillas cubren 64^4 asaltos (más de 3 años)
+BITS_NIVEL = 6
+CASILLAS = 1 << BITS_NIVEL
+MASCARA = CASILLAS - 1
+NIVELES = 4
+
+
+def _normalizar(texto):
+    """Pasa a minúsculas y quita las tildes"""
+    sin_tildes = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in sin_tildes if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=256)
+def duracion_en_asaltos(duracion):
+    """
+    Convierte el texto de duración de un hechizo en asaltos
+    
+    Args:
+        duracion (str): Duración tal como aparece en el hechizo
+    
+    Returns:
+        tuple: (asaltos, concentración). asaltos es 0 para efectos instantáneos y
+            None para los que no caducan solos ("Hasta disiparse", "Permanente")
+    """
+    texto = _normalizar(duracion or "")
+    concentracion = "concentracion" in texto
+    coincidencia = PATRON_DURACION.search(texto)
+    if coincidencia:
+        return int(coincidencia.group(1)) * ASALTOS_POR_UNIDAD[coincidencia.group(2)], concentracion
+    if "instantaneo" in texto or not texto:
+        return 0, concentracion
+    return None, concentracion
+
+
+class Efecto:
+    """Efecto activo de un hechizo sobre una criatura"""
+    
+    __slots__ = ("hechizo", "lanzador", "objetivo", "inicio", "expira", "concentracion", "activo")
+    
+    def __init__(self, hechizo, lanzador, objetivo, inicio, expira, concentracion):
+        self.hechizo = hechizo
+        self.lanzador = lanzador
+        self.objetivo = objetivo
+        self.inicio = inicio
+        self.expira = expira
+        self.concentracion = concentracion
+        self.activo = True
+    
+    def restante(self, asalto):
+        """Asaltos que le quedan al efecto (None si no caduca)"""
+        return None if self.expira is None else self.expira - asalto
+    
+    def __repr__(self):
+        return f"Efecto({self.hechizo!r}, {self.lanzador!r} -> {self.objetivo!r}, expira={self.expira})"
+
+
+class GestorEfectos:
+    """Efectos activos de un combate organizados en una rueda de temporizadores"""
+    
+    def __init__(self, asalto=0):
+        """
+        Inicializa el gestor
+        
+        Args:
+            asalto (int): Asalto actual
+        """
+        self.asalto = asalto
+        self._rueda = [[[] for _ in range(CASILLAS)] for _ in range(NIVELES)]
+        self._desbordados = []
+        self._por_criatura = {}
+        self._concentracion = {}
+    
+    def __len__(self):
+        """Número de efectos activos"""
+        return sum(len(efectos) for efectos in self._por_criatura.values())
+    
+    def _programar(self, efecto):
+        """Coloca un efecto en la casilla de la rueda que corresponde a su vencimiento"""
+        restante = efecto.expira - self.asalto
+        for nivel in range(NIVELES):
+            if restante < CASILLAS << (BITS_NIVEL * nivel):
+                casilla = (efecto.expira >> (BITS_NIVEL * nivel)) & MASCARA
+                self._rueda[nivel][casilla].append(efecto)
+                return
+        self._desbordados.append(efecto)
+    
+    def aplicar(self, hechizo, lanzador, objetivos, duracion=None):
+        """
+        Aplica un hechizo con duración a uno o varios objetivos
+        
+        Si el hechizo requiere concentración, termina la concentración anterior del lanzador.
+        
+        Args:
+            hechizo (dict | str): Datos del hechizo (se usa "nombre" y "duracion") o su nombre
+            lanzador (str): Nombre de quien lanza el hechizo
+            objetivos (list | str): Nombre o nombres de los objetivos
+            duracion (str, optional): Duración a usar en lugar de la del hechizo
+        
+        Returns:
+            list: Efectos creados (vacía si el hechizo es instantáneo)
+        """
+        if isinstance(hechizo, dict):
+            nombre = hechizo.get("nombre", "")
+            duracion = duracion if duracion is not None else hechizo.get("duracion", "")
+        else:
+            nombre = hechizo
+        if isinstance(objetivos, str):
+            objetivos = [objetivos]
+        
+        asaltos, concentracion = duracion_en_asaltos(duracion or "")
+        if asaltos == 0:
+            return []
+        if concentracion:
+            self.romper_concentracion(lanzador)
+        
+        expira = None if asaltos is None else self.asalto + asaltos
+        efectos = []
+        for objetivo in objetivos:
+            efecto = Efecto(nombre, lanzador, objetivo, self.asalto, expira, concentracion)
+            self._por_criatura.setdefault(objetivo, []).append(efecto)
+            if expira is not None:
+                self._programar(efecto)
+            efectos.append(efecto)
+        if concentracion:
+            self._concentracion[lanzador] = efectos
+        return efectos
+    
+    def terminar(self, efecto):
+        """
+        Termina un efecto antes de tiempo (se descarta de la rueda al llegar su casilla)
+        
+        Args:
+            efecto (Efecto): Efecto a terminar
+        """
+        if not efecto.activo:
+            return
+        efecto.activo = False
+        efectos = self._por_criatura.get(efecto.objetivo)
+        if efectos is not None:
+            efectos.remove(efecto)
+            if not efectos:
+                del self._por_criatura[efecto.objetivo]
+        if efecto.concentracion:
+            mantenidos = self._concentracion.get(efecto.lanzador)
+            if mantenidos is not None and all(not mantenido.activo for mantenido in mantenidos):
+                del self._concentracion[efecto.lanzador]
+    
+    def romper_concentracion(self, lanzador):
+        """
+        Termina todos los efectos que mantiene un lanzador con su concentración
+        
+        Args:
+            lanzador (str): Nombre del lanzador
+        
+        Returns:
+            list: Efectos terminados
+        """
+        efectos = self._concentracion.pop(lanzador, [])
+        terminados = [efecto for efecto in efectos if efecto.activo]
+        for efecto in terminados:
+            self.terminar(efecto)
+        return terminados
+    
+    def concentrando(self, lanzador):
+        """
+        Indica qué hechizo mantiene un lanzador con su concentración
+        
+        Args:
+            lanzador (str): Nombre del lanzador
+        
+        Returns:
+            str: Nombre del hechizo (None si no se está concentrando)
+        """
+        efectos = self._concentracion.get(lanzador)
+        return efectos[0].hechizo if efectos else None
+    
+    def salvacion_concentracion(self, lanzador, daño, modificador=0, generador=None):
+        """
+        Tira la salvación de Constitución para mantener la concentración al recibir daño
+        
+        Args:
+            lanzador (str): Nombre del lanzador
+            daño (int): Daño recibido
+            modificador (int): Bonificador a la salvación de Constitución
+            generador (numpy.random.Generator, optional): Generador para la tirada
+        
+        Returns:
+            bool: True si mantiene la concentración (o no se estaba concentrando)
+        """
+        if lanzador not in self._concentracion:
+            return True
+        if generador is None:
+            generador = generador_aleatorio("concentracion", lanzador)
+        cd = max(10, daño // 2)
+        if int(generador.integers(1, 21)) + modificador >= cd:
+            return True
+        self.romper_concentracion(lanzador)
+        return False
+    
+    def eliminar_criatura(self, criatura):
+        """
+        Retira una criatura del combate: pierde su concentración y los efectos que tenía
+        
+        Args:
+            criatura (str): Nombre de la criatura
+        """
+        self.romper_concentracion(criatura)
+        for efecto in list(self._por_criatura.get(criatura, [])):
+            self.terminar(efecto)
+    
+    def efectos_de(self, criatura):
+        """
+        Obtiene los efectos activos sobre una criatura
+        
+        Args:
+            criatura (str): Nombre de la criatura
+        
+        Returns:
+            list: Efectos activos
+        """
+        return list(self._por_criatura.get(criatura, []))
+    
+    def _cascada(self, nivel):
+        """Redistribuye en niveles inferiores la casilla de un nivel que acaba de alcanzarse"""
+        casilla = (self.asalto >> (BITS_NIVEL * nivel)) & MASCARA
+        efectos = self._rueda[nivel][casilla]
+        self._rueda[nivel][casilla] = []
+        for efecto in efectos:
+            if efecto.activo:
+                self._programar(efecto)
+        return casilla
+    
+    def _avanzar_asalto(self, vencidos):
+        """Avanza un asalto y añade a vencidos los efectos que terminan en él"""
+        self.asalto += 1
+        
+        # Al dar la vuelta un nivel, se baja la siguiente casilla del nivel superior
+        nivel = 1
+        while nivel < NIVELES and (self.asalto & ((1 << (BITS_NIVEL * nivel)) - 1)) == 0:
+            if self._cascada(nivel) != 0:
+                break
+            nivel += 1
+        else:
+            if nivel == NIVELES and self._desbordados:
+                desbordados, self._desbordados = self._desbordados, []
+                for efecto in desbordados:
+                    if efecto.activo:
+                        self._programar(efecto)
+        
+        casilla = self.asalto & MASCARA
+        efectos = self._rueda[0][casilla]
+        if efectos:
+            self._rueda[0][casilla] = []
+            for efecto in efectos:
+                if efecto.activo:
+                    self.terminar(efecto)
+                    vencidos.append(efecto)
+    
+    def avanzar(self, asaltos=1):
+        """
+        Avanza el combate y termina los efectos que vencen
+        
+        Args:
+            asaltos (int): Asaltos a avanzar
+        
+        Returns:
+            list: Efectos vencidos, en orden de vencimiento
+        """
+        vencidos = []
+        for _ in range(asaltos):
+            self._avanzar_asalto(vencidos)
+        return vencidos
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    gestor = GestorEfectos()
+    gestor.aplicar({"nombre": "Bendecir", "duracion": "Concentración (hasta 1 minuto)"}, "Clérigo", ["Guerrero", "Pícaro"])
+    gestor.aplicar({"nombre": "Armadura de mago", "duracion": "8 horas"}, "Mago", "Mago")
+    print(f"Activos: {len(gestor)}")
+    for asalto in range(12):
+        for efecto in gestor.avanzar():
+            print(f"Asalto {gestor.asalto}: termina {efecto}")
+    gestor.salvacion_concentracion("Clérigo", 22)
+    print(gestor.efectos_de("Mago"))
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estimación analítica del daño esperado de hechizos para la aplicación D&D Combat Manager.
+En lugar de tirar dados como simular_lanzamiento_hechizo, calcula el valor esperado
+de un lanzamiento: probabilidad de impacto y de crítico (bono de ataque contra CA)
+o de fallar la salvación (CD contra el bono de salvación, con mitad de daño si el
+hechizo lo indica) por la media de los dados, incluidos los niveles superiores y
+la mejora de los trucos. Sólo es aritmética, así que acepta arrays de NumPy con
+las CA o bonos de muchos objetivos y sirve de heurística rápida para la IA de
+combate y los optimizadores.
+"""
+
+import os
+import sys
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.calculadora_ataques import NORMAL, VENTAJA, DESVENTAJA
+from utils.dados import parsear_dados
+
+# Fracción del daño que recibe un objetivo que supera la salvación
+FACTOR_SALVACION = {
+    "Ningún daño": 0.0,
+    "Mitad de daño": 0.5,
+    "Efecto reducido": 0.5
+}
+
+# Niveles de personaje a partir de los que un truco añade un dado más
+NIVELES_MEJORA_TRUCO = (5, 11, 17)
+
+CARACTERISTICAS = ["Fuerza", "Destreza", "Constitución", "Inteligencia", "Sabiduría", "Carisma"]
+
+
+def prob_d20_al_menos(objetivo, modo=NORMAL):
+    """
+    Probabilidad de sacar al menos un valor en el d20 (acepta arrays)
+    
+    Args:
+        objetivo (int | numpy.ndarray): Resultado mínimo
+        modo (str): NORMAL, VENTAJA o DESVENTAJA
+    
+    Returns:
+        float | numpy.ndarray: Probabilidad
+    """
+    import numpy as np
+    
+    # Probabilidad de no llegar al objetivo con una tirada
+    fallo = np.clip((np.asarray(objetivo, dtype=np.float64) - 1) / 20, 0.0, 1.0)
+    if modo == VENTAJA:
+        return 1 - fallo * fallo
+    if modo == DESVENTAJA:
+        return (1 - fallo) * (1 - fallo)
+    return 1 - fallo
+
+
+def prob_impacto(bono_ataque, ca_objetivo, modo=NORMAL, umbral_critico=20):
+    """
+    Probabilidad de impacto sin crítico y de crítico (acepta arrays de CA)
+    
+    Args:
+        bono_ataque (int): Bonificador al ataque
+        ca_objetivo (int | numpy.ndarray): CA de los objetivos
+        modo (str): NORMAL, VENTAJA o DESVENTAJA
+        umbral_critico (int): Tirada mínima para un crítico
+    
+    Returns:
+        tuple: (probabilidad de impacto sin crítico, probabilidad de crítico)
+    """
+    import numpy as np
+    
+    critico = prob_d20_al_menos(umbral_critico, modo)
+    # Un 1 natural siempre falla
+    necesario = np.maximum(np.asarray(ca_objetivo) - bono_ataque, 2)
+    impacto = np.maximum(prob_d20_al_menos(necesario, modo) - critico, 0.0)
+    return impacto, critico
+
+
+def prob_fallo_salvacion(cd, bono_salvacion, modo=NORMAL):
+    """
+    Probabilidad de que un objetivo falle una tirada de salvación (acepta arrays)
+    
+    Args:
+        cd (int): CD de la salvación
+        bono_salvacion (int | numpy.ndarray): Bono de salvación de los objetivos
+        modo (str): Modo de la tirada del objetivo (VENTAJA si tiene resistencia a la magia)
+    
+    Returns:
+        float | numpy.ndarray: Probabilidad de fallar
+    """
+    import numpy as np
+    
+    return 1 - prob_d20_al_menos(cd - np.asarray(bono_salvacion), modo)
+
+
+def _media(dados, multiplicador_dados=1):
+    """Media de una expresión de dados, multiplicando el número de dados"""
+    if dados is None:
+        return 0.0, 0.0
+    cantidad, caras, modificador = dados
+    return cantidad * multiplicador_dados * (caras + 1) / 2, float(modificador)
+
+
+def medias_hechizo(hechizo, nivel_lanzamiento=None, nivel_personaje=1):
+    """
+    Calcula la media de los dados de daño de un hechizo
+    
+    Args:
+        hechizo (dict): Datos del hechizo
+        nivel_lanzamiento (int, optional): Nivel al que se lanza. Por defecto, el del hechizo
+        nivel_personaje (int): Nivel del lanzador (para la mejora de los trucos)
+    
+    Returns:
+        tuple: (media de los dados, modificadores fijos); los críticos duplican sólo la primera
+    """
+    nivel_hechizo = int(hechizo.get("nivel", 0))
+    if nivel_lanzamiento is None:
+        nivel_lanzamiento = nivel_hechizo
+    niveles_adicionales = max(0, nivel_lanzamiento - nivel_hechizo)
+    
+    multiplicador = 1
+    if nivel_hechizo == 0:
+        multiplicador += sum(1 for nivel in NIVELES_MEJORA_TRUCO if nivel_personaje >= nivel)
+    
+    dados, fijo = _media(parsear_dados(hechizo.get("daño_base", "")), multiplicador)
+    if niveles_adicionales:
+        dados_nivel, fijo_nivel = _media(parsear_dados(hechizo.get("daño_nivel_superior", "")))
+        dados += niveles_adicionales * dados_nivel
+        fijo += niveles_adicionales * fijo_nivel
+    return dados, fijo
+
+
+def estimar_hechizo(hechizo, ca_objetivo=10, bono_salvacion=0, nivel_lanzamiento=None, estadistica_conjuros=3,
+                    bono_competencia=2, modo=NORMAL, modo_salvacion=NORMAL, nivel_personaje=1):
+    """
+    Calcula el valor esperado de un lanzamiento sin tirar dados
+    
+    Args:
+        hechizo (dict): Datos del hechizo
+        ca_objetivo (int | numpy.ndarray): CA de los objetivos (hechizos de ataque)
+        bono_salvacion (int | numpy.ndarray): Bono de salvación de los objetivos
+        nivel_lanzamiento (int, optional): Nivel al que se lanza. Por defecto, el del hechizo
+        estadistica_conjuros (int): Modificador de la característica de lanzamiento
+        bono_competencia (int): Bonificador de competencia
+        modo (str): Modo de la tirada de ataque
+        modo_salvacion (str): Modo de la tirada de salvación de los objetivos
+        nivel_personaje (int): Nivel del lanzador (para los trucos)
+    
+    Returns:
+        dict: "prob_impacto", "prob_critico", "prob_fallo_salvacion", "daño_esperado" (por
+            objetivo; arrays si se pasaron arrays) y "curacion_esperada"
+    """
+    import numpy as np
+    
+    cd_salvacion = 8 + estadistica_conjuros + bono_competencia
+    bono_ataque = estadistica_conjuros + bono_competencia
+    dados, fijo = medias_hechizo(hechizo, nivel_lanzamiento, nivel_personaje)
+    
+    impacto = critico = fallo = None
+    if hechizo.get("tipo_ataque", "Ninguno") != "Ninguno":
+        impacto, critico = prob_impacto(bono_ataque, ca_objetivo, modo)
+        daño = impacto * np.maximum(dados + fijo, 0) + critico * np.maximum(2 * dados + fijo, 0)
+    elif hechizo.get("requiere_salvacion", False):
+        fallo = prob_fallo_salvacion(cd_salvacion, bono_salvacion, modo_salvacion)
+        factor = FACTOR_SALVACION.get(hechizo.get("efecto_salvacion", ""), 0.0)
+        daño = max(dados + fijo, 0) * (fallo + (1 - fallo) * factor)
+    else:
+        # Daño automático (por ejemplo, Proyectil mágico)
+        forma = np.broadcast(np.asarray(ca_objetivo), np.asarray(bono_salvacion)).shape
+        daño = np.full(forma, max(dados + fijo, 0.0))
+    
+    return {
+        "prob_impacto": _escalar(impacto),
+        "prob_critico": _escalar(critico),
+        "prob_fallo_salvacion": _escalar(fallo),
+        "daño_esperado": _escalar(daño),
+        "curacion_esperada": curacion_esperada(hechizo, nivel_lanzamiento, estadistica_conjuros)
+    }
+
+
+def _escalar(valor):
+    """Convierte los arrays de cero dimensiones en float"""
+    if valor is None:
+        return None
+    if getattr(valor, "ndim", 1) == 0:
+        return float(valor)
+    return valor
+
+
+def daño_esperado(hechizo, ca_objetivo=10, bono_salvacion=0, **opciones):
+    """
+    Calcula el daño esperado de un lanzamiento contra uno o varios objetivos
+    
+    Args:
+        hechizo (dict): Datos del hechizo
+        ca_objetivo (int | numpy.ndarray): CA de los objetivos
+        bono_salvacion (int | numpy.ndarray): Bono de salvación de los objetivos
+        **opciones: Resto de parámetros de estimar_hechizo
+    
+    Returns:
+        float | numpy.ndarray: Daño esperado por objetivo
+    """
+    return estimar_hechizo(hechizo, ca_objetivo, bono_salvacion, **opciones)["daño_esperado"]
+
+
+def curacion_esperada(hechizo, nivel_lanzamiento=None, estadistica_conjuros=3):
+    """
+    Calcula la curación media de un lanzamiento
+    
+    Args:
+        hechizo (dict): Datos del hechizo
+        nivel_lanzamiento (int, optional): Nivel al que se lanza. Por defecto, el del hechizo
+        estadistica_conjuros (int): Modificador de la característica de lanzamiento
+            (se suma si la fórmula no lleva modificador, como en simular_lanzamiento_hechizo)
+    
+    Returns:
+        float: Curación media
+    """
+    formula = hechizo.get("curacion_base", "")
+    dados = parsear_dados(formula)
+    if dados is None:
+        return 0.0
+    media, fijo = _media(dados)
+    if not any(signo in formula for signo in "+-"):
+        fijo = float(estadistica_conjuros)
+    
+    nivel_hechizo = int(hechizo.get("nivel", 0))
+    if nivel_lanzamiento is None:
+        nivel_lanzamiento = nivel_hechizo
+    niveles_adicionales = max(0, nivel_lanzamiento - nivel_hechizo)
+    if niveles_adicionales:
+        media_nivel, fijo_nivel = _media(parsear_dados(hechizo.get("curacion_nivel_superior", "")))
+        media += niveles_adicionales * media_nivel
+        fijo += niveles_adicionales * fijo_nivel
+    return media + fijo
+
+
+def bonos_salvacion(bestiario, filas, caracteristica):
+    """
+    Obtiene el bono de salvación de varios monstruos del bestiario
+    
+    Args:
+        bestiario (Bestiario): Bestiario
+        filas (list | numpy.ndarray): Filas de los monstruos
+        caracteristica (str): Característica de la salvación ("Destreza", "Sabiduría"...)
+    
+    Returns:
+        numpy.ndarray: Modificador de esa característica de cada monstruo
+    """
+    if caracteristica not in CARACTERISTICAS:
+        caracteristica = "Destreza"
+    return bestiario.modificadores[filas, CARACTERISTICAS.index(caracteristica)]
+
+
+def ordenar_por_daño(hechizos, ca_objetivos, bonos_objetivos=None, **opciones):
+    """
+    Ordena hechizos por el daño total esperado contra un grupo de objetivos
+    
+    Args:
+        hechizos (list): Hechizos candidatos
+        ca_objetivos (list | numpy.ndarray): CA de cada objetivo
+        bonos_objetivos (dict, optional): Característica -> array con el bono de salvación
+            de cada objetivo (0 para las que falten)
+        **opciones: Resto de parámetros de estimar_hechizo
+    
+    Returns:
+        list: Tuplas (daño esperado contra un objetivo medio, hechizo), de mayor a menor
+    """
+    import numpy as np
+    
+    ca_objetivos = np.asarray(ca_objetivos)
+    bonos_objetivos = bonos_objetivos or {}
+    resultado = []
+    for hechizo in hechizos:
+        bonos = bonos_objetivos.get(hechizo.get("tipo_salvacion", ""), 0)
+        daño = daño_esperado(hechizo, ca_objetivos, bonos, **opciones)
+        resultado.append((float(np.mean(daño)), hechizo))
+    resultado.sort(key=lambda par: par[0], reverse=True)
+    return resultado
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import numpy as np
+    
+    bola_fuego = {
+        "nombre": "Bola de fuego", "nivel": 3, "daño_base": "8d6", "daño_nivel_superior": "1d6",
+        "requiere_salvacion": True, "tipo_salvacion": "Destreza", "efecto_salvacion": "Mitad de daño"
+    }
+    rayo_fuego = {"nombre": "Rayo de fuego", "nivel": 0, "daño_base": "1d10", "tipo_ataque": "A distancia"}
+    
+    bonos = np.array([-1, 0, 2, 5])
+    print("Bola de fuego (nivel 3):", daño_esperado(bola_fuego, bono_salvacion=bonos, estadistica_conjuros=4, bono_competencia=3))
+    print("Bola de fuego (nivel 5):", daño_esperado(bola_fuego, bono_salvacion=bonos, nivel_lanzamiento=5, estadistica_conjuros=4, bono_competencia=3))
+    print("Rayo de fuego (nivel 5):", daño_esperado(rayo_fuego, ca_objetivo=np.array([12, 15, 18]), estadistica_conjuros=4, bono_competencia=3, nivel_personaje=5))
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generador de botín para la aplicación D&D Combat Manager.
+Elige objetos del catálogo con probabilidad proporcional a su rareza y su tipo
+usando tablas de alias de Walker: construir la tabla cuesta O(n) y cada objeto
+se sortea en O(1). La tabla se guarda hasta que cambia el catálogo, y los
+tesoros se pueden generar por miles con NumPy para equilibrar la economía de
+una campaña. Con la misma semilla se obtiene siempre el mismo botín.
+"""
+
+import os
+import random
+import sys
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from conectores.items import ITEM_TYPES, RARITY_TYPES, get_catalog, load_all_items_by_type, load_item
+from utils.servicio_aleatorio import ServicioAleatorio, generador_para, obtener_servicio
+
+# Peso relativo de cada rareza (un objeto común sale 100 veces más que uno legendario)
+PESOS_RAREZA = {
+    "Common": 100.0,
+    "Uncommon": 40.0,
+    "Rare": 10.0,
+    "Very Rare": 3.0,
+    "Legendary": 1.0,
+    "Artifact": 0.2
+}
+
+# Peso relativo de cada tipo de objeto
+PESOS_TIPO = {tipo: 1.0 for tipo in ITEM_TYPES}
+
+
+class TablaAlias:
+    """Tabla de alias de Walker (algoritmo de Vose) para muestrear una distribución discreta"""
+    
+    def __init__(self, pesos):
+        """
+        Construye la tabla en O(n)
+        
+        Args:
+            pesos (list): Pesos no negativos (al menos uno positivo)
+        """
+        n = len(pesos)
+        total = float(sum(pesos))
+        if n == 0 or total <= 0:
+            raise ValueError("La tabla de alias necesita al menos un peso positivo")
+        
+        self.n = n
+        self.probabilidad = [0.0] * n
+        self.alias = [0] * n
+        
+        escalados = [peso * n / total for peso in pesos]
+        pequeños = [i for i, valor in enumerate(escalados) if valor < 1.0]
+        grandes = [i for i, valor in enumerate(escalados) if valor >= 1.0]
+        
+        while pequeños and grandes:
+            pequeño = pequeños.pop()
+            grande = grandes.pop()
+            self.probabilidad[pequeño] = escalados[pequeño]
+            self.alias[pequeño] = grande
+            escalados[grande] -= 1.0 - escalados[pequeño]
+            if escalados[grande] < 1.0:
+                pequeños.append(grande)
+            else:
+                grandes.append(grande)
+        
+        # Lo que queda (por redondeo) tiene probabilidad 1
+        for i in grandes + pequeños:
+            self.probabilidad[i] = 1.0
+        
+        self._arrays = None
+    
+    def muestrear(self, rng=random):
+        """
+        Sortea un índice en O(1)
+        
+        Args:
+            rng (random.Random): Generador de números aleatorios
+        
+        Returns:
+            int: Índice sorteado
+        """
+        i = int(rng.random() * self.n)
+        return i if rng.random() < self.probabilidad[i] else self.alias[i]
+    
+    def muestrear_lote(self, forma, generador):
+        """
+        Sortea muchos índices a la vez con NumPy
+        
+        Args:
+            forma (int | tuple): Forma del array de resultados
+            generador (numpy.random.Generator): Generador de NumPy
+        
+        Returns:
+            numpy.ndarray: Índices sorteados
+        """
+        import numpy as np
+        
+        if self._arrays is None:
+            self._arrays = (np.array(self.probabilidad), np.array(self.alias, dtype=np.int64))
+        probabilidad, alias = self._arrays
+        
+        columnas = generador.integers(0, self.n, size=forma)
+        return np.where(generador.random(size=forma) < probabilidad[columnas], columnas, alias[columnas])
+
+
+class GeneradorBotin:
+    """Sorteo de objetos del catálogo ponderado por rareza y tipo"""
+    
+    def __init__(self, pesos_rareza=None, pesos_tipo=None):
+        """
+        Inicializa el generador (la tabla se construye en el primer sorteo)
+        
+        Args:
+            pesos_rareza (dict, optional): Rareza -> peso. Por defecto PESOS_RAREZA
+            pesos_tipo (dict, optional): Tipo -> peso. Por defecto PESOS_TIPO; los tipos
+                con peso 0 no se sortean
+        """
+        self.pesos_rareza = dict(PESOS_RAREZA if pesos_rareza is None else pesos_rareza)
+        self.pesos_tipo = dict(PESOS_TIPO if pesos_tipo is None else pesos_tipo)
+        self._version = None
+        self._tabla = None
+        self._objetos = []
+        self._rarezas = []
+        self._tipos = []
+    
+    def _version_catalogo(self):
+        """Versión de los catálogos implicados (cambia al guardar, borrar o recargar)"""
+        version = []
+        for tipo in self.pesos_tipo:
+            catalogo = get_catalog(tipo)
+            len(catalogo)  # Fuerza la comprobación de cambios en disco
+            version.append((tipo, id(catalogo), catalogo.version))
+        return tuple(version)
+    
+    def tabla(self):
+        """
+        Obtiene la tabla de alias, reconstruyéndola sólo si el catálogo cambió
+        
+        Returns:
+            TablaAlias: Tabla sobre los objetos sorteables (None si no hay ninguno)
+        """
+        version = self._version_catalogo()
+        if version == self._version:
+            return self._tabla
+        
+        objetos, rarezas, tipos, pesos = [], [], [], []
+        for tipo, peso_tipo in self.pesos_tipo.items():
+            if peso_tipo <= 0:
+                continue
+            for objeto in load_all_items_by_type(tipo):
+                peso = peso_tipo * self.pesos_rareza.get(objeto.rarity, 0.0)
+                if peso > 0:
+                    objetos.append((tipo, objeto.id))
+                    rarezas.append(objeto.rarity)
+                    tipos.append(tipo)
+                    pesos.append(peso)
+        
+        self._objetos = objetos
+        self._rarezas = rarezas
+        self._tipos = tipos
+        self._tabla = TablaAlias(pesos) if pesos else None
+        self._version = version
+        return self._tabla
+    
+    def generar_botin(self, cantidad, semilla=None, rng=None):
+        """
+        Sortea un lote de objetos
+        
+        Args:
+            cantidad (int): Número de objetos
+            semilla (int, optional): Semilla para reproducir el sorteo
+            rng (random.Random, optional): Generador a usar en lugar de la semilla
+        
+        Returns:
+            list: Objetos del catálogo (puede repetirse el mismo objeto)
+        """
+        tabla = self.tabla()
+        if tabla is None:
+            return []
+        if rng is None:
+            servicio = obtener_servicio() if semilla is None else ServicioAleatorio(semilla)
+            rng = servicio.aleatorio("botin")
+        botin = []
+        for _ in range(cantidad):
+            tipo, item_id = self._objetos[tabla.muestrear(rng)]
+            objeto = load_item(tipo, item_id)
+            if objeto is not None:
+                botin.append(objeto)
+        return botin
+    
+    def generar_tesoros(self, tesoros, objetos_por_tesoro, semilla=None):
+        """
+        Sortea muchos tesoros a la vez sin decodificar los objetos
+        
+        Args:
+            tesoros (int): Número de tesoros
+            objetos_por_tesoro (int): Objetos de cada tesoro
+            semilla (int, optional): Semilla para reproducir el sorteo
+        
+        Returns:
+            numpy.ndarray: Matriz (tesoros x objetos) de índices; ver objeto_de_indice
+        """
+        import numpy as np
+        
+        tabla = self.tabla()
+        if tabla is None:
+            return np.zeros((tesoros, 0), dtype=np.int64)
+        return tabla.muestrear_lote((tesoros, objetos_por_tesoro), generador_para(semilla, "tesoros"))
+    
+    def objeto_de_indice(self, indice):
+        """
+        Obtiene el objeto correspondiente a un índice devuelto por generar_tesoros
+        
+        Args:
+            indice (int): Índice en la tabla
+        
+        Returns:
+            Item: Objeto del catálogo
+        """
+        tipo, item_id = self._objetos[int(indice)]
+        return load_item(tipo, item_id)
+    
+    def resumen_tesoros(self, indices):
+        """
+        Cuenta cuántos objetos de cada rareza y tipo hay en cada tesoro
+        
+        Args:
+            indices (numpy.ndarray): Resultado de generar_tesoros
+        
+        Returns:
+            dict: "rareza" y "tipo", cada uno nombre -> array con el recuento por tesoro
+        """
+        import numpy as np
+        
+        resumen = {"rareza": {}, "tipo": {}}
+        for clave, valores, nombres in (("rareza", self._rarezas, RARITY_TYPES), ("tipo", self._tipos, list(ITEM_TYPES))):
+            codigo = {nombre: i for i, nombre in enumerate(nombres)}
+            por_objeto = np.array([codigo.get(valor, -1) for valor in valores], dtype=np.int64)
+            categorias = por_objeto[indices] if len(valores) else np.zeros_like(indices)
+            for nombre, i in codigo.items():
+                resumen[clave][nombre] = (categorias == i).sum(axis=1)
+        return resumen
+
+
+# Generador compartido con los pesos por defecto
+_generador = None
+
+
+def generar_botin(cantidad, semilla=None):
+    """
+    Sortea un lote de objetos con los pesos por defecto
+    
+    Args:
+        cantidad (int): Número de objetos
+        semilla (int, optional): Semilla para reproducir el sorteo
+    
+    Returns:
+        list: Objetos del catálogo
+    """
+    global _generador
+    if _generador is None:
+        _generador = GeneradorBotin()
+    return _generador.generar_botin(cantidad, semilla)
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    generador = GeneradorBotin()
+    for objeto in generador.generar_botin(5, semilla=42):
+        print(objeto)
+    
+    indices = generador.generar_tesoros(10000, 5, semilla=42)
+    resumen = generador.resumen_tesoros(indices)
+    print("Media de objetos por tesoro:")
+    for rareza, recuento in resumen["rareza"].items():
+        print(f"  {rareza}: {recuento.mean():.2f}")
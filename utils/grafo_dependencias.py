@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Grafo de dependencias reactivo para los campos calculados de los editores.
+Cada nodo declara sus entradas; al cambiar una fuente sólo se recalculan los nodos
+afectados, agrupados en una única pasada en el siguiente momento ocioso de Tk.
+"""
+
+class GrafoDependencias:
+    """Grafo de nodos derivados con recálculo diferido y perezoso"""
+    
+    def __init__(self, widget):
+        """
+        Inicializa un grafo vacío
+        
+        Args:
+            widget: Widget de Tk usado para programar el recálculo con after_idle
+        """
+        self.widget = widget
+        self._calculos = {}
+        self._entradas = {}
+        self._al_cambiar = {}
+        self._dependientes = {}
+        self._valores = {}
+        self._orden = {}
+        self._sucios = set()
+        self._pendiente = None
+    
+    def agregar_fuente(self, nombre, obtener):
+        """
+        Añade un nodo fuente, cuyo valor se lee directamente de la interfaz
+        
+        Args:
+            nombre (str): Nombre del nodo
+            obtener (callable): Función sin argumentos que devuelve el valor actual
+        """
+        self.agregar_nodo(nombre, [], obtener)
+    
+    def agregar_nodo(self, nombre, entradas, calcular, al_cambiar=None):
+        """
+        Añade un nodo derivado
+        
+        Args:
+            nombre (str): Nombre del nodo
+            entradas (list): Nombres de los nodos de los que depende (ya definidos)
+            calcular (callable): Recibe los valores de las entradas y devuelve el valor del nodo
+            al_cambiar (callable, optional): Se llama con el nuevo valor cuando éste cambia
+        """
+        self._calculos[nombre] = calcular
+        self._entradas[nombre] = list(entradas)
+        self._al_cambiar[nombre] = al_cambiar
+        self._dependientes.setdefault(nombre, [])
+        for entrada in entradas:
+            self._dependientes[entrada].append(nombre)
+        
+        # Al añadirse en orden, la posición es un orden topológico válido
+        self._orden[nombre] = len(self._orden)
+        self._sucios.add(nombre)
+    
+    def marcar(self, nombre, *args):
+        """
+        Marca un nodo como modificado y programa el recálculo
+        
+        Acepta argumentos extra para poder usarse directamente en trace_add.
+        
+        Args:
+            nombre (str): Nombre del nodo modificado
+        """
+        self._sucios.add(nombre)
+        if self._pendiente is None:
+            try:
+                self._pendiente = self.widget.after_idle(self.recalcular)
+            except Exception:
+                # El widget ya no existe (pantalla cerrada)
+                self._pendiente = None
+    
+    def valor(self, nombre):
+        """
+        Obtiene el último valor calculado de un nodo
+        
+        Args:
+            nombre (str): Nombre del nodo
+        
+        Returns:
+            Valor del nodo o None si todavía no se ha calculado
+        """
+        return self._valores.get(nombre)
+    
+    def recalcular(self):
+        """
+        Recalcula los nodos sucios y propaga sólo a los dependientes cuyo valor cambió
+        """
+        if self._pendiente is not None:
+            try:
+                self.widget.after_cancel(self._pendiente)
+            except Exception:
+                pass
+            self._pendiente = None
+        
+        sucios = self._sucios
+        self._sucios = set()
+        
+        while sucios:
+            # Procesar siempre el nodo más temprano en orden topológico
+            nombre = min(sucios, key=self._orden.__getitem__)
+            sucios.discard(nombre)
+            
+            argumentos = [self._valores.get(entrada) for entrada in self._entradas[nombre]]
+            try:
+                nuevo = self._calculos[nombre](*argumentos)
+            except Exception:
+                nuevo = None
+            
+            if nombre in self._valores and self._valores[nombre] == nuevo:
+                continue
+            
+            self._valores[nombre] = nuevo
+            # Un fallo al mostrar el valor (p. ej. None tras un cálculo fallido) no
+            # debe cortar la propagación a los dependientes
+            if self._al_cambiar[nombre]:
+                try:
+                    self._al_cambiar[nombre](nuevo)
+                except Exception:
+                    pass
+            sucios.update(self._dependientes[nombre])
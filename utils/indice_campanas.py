@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice inverso de personajes a campañas para la aplicación D&D Combat Manager.
+Mantiene qué campañas contienen cada archivo de personaje, releyendo sólo las
+campañas modificadas, para que renombrar o eliminar un personaje actualice todas
+las campañas afectadas en una única pasada de escritura.
+"""
+
+import json
+import os
+import sys
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.cache_personajes import normalizar_jugadores
+from utils.vigilante_archivos import REINICIADO, suscribir, vigilando
+
+DIRECTORIO_CAMPANAS = "campanas"
+
+
+def _firma(ruta):
+    """Obtiene la firma (fecha de modificación y tamaño) de un archivo"""
+    estado = os.stat(ruta)
+    return (estado.st_mtime_ns, estado.st_size)
+
+
+class IndiceCampanas:
+    """Índice archivo de personaje -> campañas que lo contienen"""
+    
+    def __init__(self, directorio=DIRECTORIO_CAMPANAS):
+        """
+        Inicializa un índice vacío
+        
+        Args:
+            directorio (str): Carpeta con los archivos de campaña
+        """
+        self.directorio = directorio
+        self._firmas = {}
+        self._archivos_por_campana = {}
+        self._campanas_por_archivo = {}
+        # Con el vigilante en marcha sólo se releen las campañas con eventos pendientes
+        self._pendientes = set()
+        self._completo = False
+    
+    def _indexar(self, ruta, jugadores):
+        """Sustituye las entradas de una campaña en el índice"""
+        self._desindexar(ruta)
+        archivos = {jugador.get("archivo", "") for jugador in jugadores if jugador.get("archivo")}
+        self._archivos_por_campana[ruta] = archivos
+        for archivo in archivos:
+            self._campanas_por_archivo.setdefault(archivo, set()).add(ruta)
+    
+    def _desindexar(self, ruta):
+        """Elimina del índice todas las entradas de una campaña"""
+        for archivo in self._archivos_por_campana.pop(ruta, ()):
+            rutas = self._campanas_por_archivo.get(archivo)
+            if rutas:
+                rutas.discard(ruta)
+                if not rutas:
+                    del self._campanas_por_archivo[archivo]
+        self._firmas.pop(ruta, None)
+    
+    def invalidar(self, ruta=None):
+        """
+        Marca una campaña (o todas) para volver a leerla en la próxima consulta
+        
+        Args:
+            ruta (str, optional): Ruta de la campaña modificada
+        """
+        if ruta is None:
+            self._completo = False
+        else:
+            self._pendientes.add(os.path.join(self.directorio, os.path.basename(ruta)))
+    
+    def _actualizar_pendientes(self):
+        """Relee sólo las campañas señaladas por el vigilante"""
+        while self._pendientes:
+            ruta = self._pendientes.pop()
+            try:
+                firma = _firma(ruta)
+            except OSError:
+                self._desindexar(ruta)
+                continue
+            if self._firmas.get(ruta) == firma:
+                continue
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    jugadores = json.load(f).get("jugadores", [])
+            except Exception:
+                jugadores = []
+            self._indexar(ruta, jugadores)
+            self._firmas[ruta] = firma
+    
+    def actualizar(self):
+        """Relee sólo las campañas nuevas o modificadas desde la última consulta"""
+        if self._completo and vigilando(self.directorio):
+            self._actualizar_pendientes()
+            return
+        
+        self._pendientes.clear()
+        if not os.path.isdir(self.directorio):
+            for ruta in list(self._archivos_por_campana):
+                self._desindexar(ruta)
+            return
+        
+        vistas = set()
+        with os.scandir(self.directorio) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file() or not entrada.name.endswith(".json"):
+                    continue
+                ruta = os.path.join(self.directorio, entrada.name)
+                vistas.add(ruta)
+                
+                estado = entrada.stat()
+                firma = (estado.st_mtime_ns, estado.st_size)
+                if self._firmas.get(ruta) == firma:
+                    continue
+                
+                try:
+                    with open(ruta, 'r', encoding='utf-8') as f:
+                        campana = json.load(f)
+                    jugadores = campana.get("jugadores", [])
+                except Exception:
+                    jugadores = []
+                self._indexar(ruta, jugadores)
+                self._firmas[ruta] = firma
+        
+        # Olvidar las campañas borradas
+        for ruta in list(self._archivos_por_campana):
+            if ruta not in vistas:
+                self._desindexar(ruta)
+        
+        self._completo = True
+    
+    def campanas_de(self, archivo):
+        """
+        Obtiene las campañas que contienen un personaje
+        
+        Args:
+            archivo (str): Nombre del archivo del personaje
+        
+        Returns:
+            list: Rutas de las campañas, ordenadas
+        """
+        self.actualizar()
+        return sorted(self._campanas_por_archivo.get(archivo, ()))
+    
+    def registrar(self, ruta, campana):
+        """
+        Actualiza el índice tras guardar una campaña, sin volver a leerla
+        
+        Args:
+            ruta (str): Ruta del archivo de campaña
+            campana (dict): Datos guardados
+        """
+        ruta = os.path.join(self.directorio, os.path.basename(ruta))
+        self._indexar(ruta, campana.get("jugadores", []))
+        try:
+            self._firmas[ruta] = _firma(ruta)
+        except OSError:
+            self._firmas.pop(ruta, None)
+    
+    def propagar(self, cambios):
+        """
+        Aplica varios renombrados o eliminaciones de personajes a todas sus campañas
+        
+        Cada campaña afectada se lee y se escribe una sola vez, aunque le afecten
+        varios cambios. De paso, sus jugadores quedan en formato de referencias.
+        
+        Args:
+            cambios (dict): archivo anterior -> archivo nuevo (None si se eliminó)
+        
+        Returns:
+            list: Rutas de las campañas reescritas
+        """
+        self.actualizar()
+        
+        afectadas = set()
+        for archivo in cambios:
+            afectadas.update(self._campanas_por_archivo.get(archivo, ()))
+        
+        reescritas = []
+        for ruta in sorted(afectadas):
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    campana = json.load(f)
+            except Exception as e:
+                print(f"Error al leer la campaña {ruta}: {e}")
+                continue
+            
+            jugadores = normalizar_jugadores(campana.get("jugadores", []))
+            aplicar_cambios(jugadores, cambios)
+            campana["jugadores"] = jugadores
+            
+            try:
+                with open(ruta, 'w', encoding='utf-8') as f:
+                    json.dump(campana, f, ensure_ascii=False, indent=4)
+            except Exception as e:
+                print(f"Error al guardar la campaña {ruta}: {e}")
+                continue
+            
+            self.registrar(ruta, campana)
+            reescritas.append(ruta)
+        
+        return reescritas
+
+
+def aplicar_cambios(jugadores, cambios):
+    """
+    Aplica renombrados y eliminaciones a una lista de jugadores en memoria
+    
+    Args:
+        jugadores (list): Referencias de jugadores (se modifica en el sitio)
+        cambios (dict): archivo anterior -> archivo nuevo (None si se eliminó)
+    
+    Returns:
+        bool: True si la lista cambió
+    """
+    cambiada = False
+    resultado = []
+    vistos = set()
+    for jugador in jugadores:
+        archivo = jugador.get("archivo", "")
+        # Seguir cadenas de renombrados (a -> b -> c)
+        saltos = 0
+        while archivo in cambios and saltos < len(cambios):
+            archivo = cambios[archivo]
+            saltos += 1
+            if archivo is None:
+                break
+        
+        if archivo is None or (archivo and archivo in vistos):
+            cambiada = True
+            continue
+        if archivo != jugador.get("archivo", ""):
+            jugador = dict(jugador, archivo=archivo)
+            cambiada = True
+        if archivo:
+            vistos.add(archivo)
+        resultado.append(jugador)
+    
+    jugadores[:] = resultado
+    return cambiada
+
+
+# Índice compartido por toda la aplicación
+_indice = IndiceCampanas()
+
+
+def _al_cambiar_archivo(evento):
+    """Marca para relectura sólo la campaña afectada por un cambio en disco"""
+    if evento.tipo == REINICIADO:
+        _indice.invalidar()
+    else:
+        _indice.invalidar(evento.ruta)
+
+
+suscribir(DIRECTORIO_CAMPANAS, _al_cambiar_archivo)
+
+# Cambios de archivo ocurridos durante la sesión, para corregir campañas ya abiertas
+_cambios_sesion = {}
+
+
+def campanas_con_personaje(archivo):
+    """
+    Obtiene las campañas que contienen un personaje
+    
+    Args:
+        archivo (str): Nombre del archivo del personaje
+    
+    Returns:
+        list: Rutas de las campañas
+    """
+    return _indice.campanas_de(archivo)
+
+
+def registrar_campana(ruta, campana):
+    """
+    Informa al índice de que se ha guardado una campaña
+    
+    Args:
+        ruta (str): Ruta del archivo de campaña
+        campana (dict): Datos guardados
+    """
+    _indice.registrar(ruta, campana)
+
+
+def registrar_personaje_guardado(archivo):
+    """
+    Informa de que se ha guardado un personaje, para que su archivo deje de contar
+    como renombrado o eliminado en las campañas abiertas
+    
+    Args:
+        archivo (str): Archivo del personaje guardado
+    """
+    _cambios_sesion.pop(archivo, None)
+
+
+def propagar_cambios(cambios):
+    """
+    Propaga renombrados y eliminaciones de personajes a todas las campañas
+    
+    Args:
+        cambios (dict): archivo anterior -> archivo nuevo (None si se eliminó)
+    
+    Returns:
+        list: Rutas de las campañas reescritas
+    """
+    cambios = {anterior: nuevo for anterior, nuevo in cambios.items() if anterior and anterior != nuevo}
+    if not cambios:
+        return []
+    
+    # Un archivo que vuelve a usarse deja de estar renombrado o eliminado
+    for nuevo in cambios.values():
+        _cambios_sesion.pop(nuevo, None)
+    _cambios_sesion.update(cambios)
+    return _indice.propagar(cambios)
+
+
+def propagar_renombrado(anterior, nuevo):
+    """
+    Propaga a las campañas el cambio de archivo de un personaje
+    
+    Args:
+        anterior (str): Archivo anterior del personaje
+        nuevo (str): Archivo nuevo del personaje
+    
+    Returns:
+        list: Rutas de las campañas reescritas
+    """
+    return propagar_cambios({anterior: nuevo})
+
+
+def propagar_eliminacion(archivo):
+    """
+    Quita un personaje eliminado de todas las campañas
+    
+    Args:
+        archivo (str): Archivo del personaje eliminado
+    
+    Returns:
+        list: Rutas de las campañas reescritas
+    """
+    return propagar_cambios({archivo: None})
+
+
+def aplicar_cambios_sesion(jugadores):
+    """
+    Aplica a una campaña abierta en memoria los cambios propagados en la sesión
+    
+    Args:
+        jugadores (list): Jugadores de la campaña (se modifica en el sitio)
+    
+    Returns:
+        bool: True si la lista cambió
+    """
+    if not _cambios_sesion:
+        return False
+    return aplicar_cambios(jugadores, _cambios_sesion)
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mapa de batalla en cuadrícula para la aplicación D&D Combat Manager.
+Las criaturas ocupan casillas de 5 pies según su tamaño y se guardan en una tabla
+hash por casilla. El alcance de los hechizos ("120 pies", "Toque", "Personal (cono
+de 15 pies)") y sus áreas (esfera, cono, línea, cubo, cilindro) se interpretan una
+sola vez; las casillas de cada plantilla se precalculan por forma, dirección y
+punto de origen, así que saber qué criaturas quedan dentro sólo mira las casillas
+afectadas, tenga el combate tres criaturas o cincuenta.
+"""
+
+import math
+import os
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PIES_POR_CASILLA = 5
+
+# Casillas de lado que ocupa una criatura según su tamaño
+CASILLAS_POR_TAMAÑO = {
+    "Diminuto": 1,
+    "Pequeño": 1,
+    "Mediano": 1,
+    "Grande": 2,
+    "Enorme": 3,
+    "Gargantuesco": 4
+}
+
+# Alcances sin número de pies (None: sin límite dentro del mapa)
+ALCANCES_ESPECIALES = {
+    "personal": 0,
+    "toque": 5,
+    "a la vista": None,
+    "ilimitado": None
+}
+
+FORMAS_AREA = ("esfera", "cilindro", "cono", "linea", "cubo")
+
+PATRON_ALCANCE = re.compile(r'(\d+)\s*(pies|milla)')
+PATRON_AREA = re.compile(
+    r'(esfera|cilindro|cono|linea|cubo)\s+de\s+(\d+)\s*pies(?:\s+de\s+(?:radio|largo|lado))?'
+    r'(?:\s+(?:y|por)\s+(\d+)\s*pies\s+de\s+ancho)?'
+)
+PATRON_RADIO = re.compile(r'(esfera|cilindro)[^.]{0,40}?radio\s+de\s+(\d+)\s*pies')
+# Auras en el campo alcance sin forma explícita ("Personal (radio de 15 pies)"): esfera
+PATRON_RADIO_SIMPLE = re.compile(r'radio\s+de\s+(\d+)\s*pies')
+
+# Pasos angulares con los que se guardan las direcciones de conos, líneas y cubos
+PASOS_DIRECCION = 360
+
+# Una casilla queda afectada si el área cubre al menos la mitad (se mide con
+# MUESTRAS x MUESTRAS puntos por casilla al precalcular la plantilla)
+MUESTRAS = 4
+COBERTURA_MINIMA = 0.5
+
+
+def _normalizar(texto):
+    """Pasa a minúsculas y quita las tildes"""
+    sin_tildes = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in sin_tildes if not unicodedata.combining(c))
+
+
+class Plantilla:
+    """Área de efecto con forma y medidas en pies"""
+    
+    __slots__ = ("forma", "tamaño", "ancho")
+    
+    def __init__(self, forma, tamaño, ancho=PIES_POR_CASILLA):
+        """
+        Inicializa la plantilla
+        
+        Args:
+            forma (str): "esfera", "cilindro", "cono", "linea" o "cubo"
+            tamaño (int): Radio (esfera, cilindro), longitud (cono, línea) o lado (cubo) en pies
+            ancho (int): Ancho de las líneas en pies
+        """
+        self.forma = forma
+        self.tamaño = tamaño
+        self.ancho = ancho
+    
+    def __repr__(self):
+        return f"Plantilla({self.forma!r}, {self.tamaño}, {self.ancho})"
+    
+    def __eq__(self, otra):
+        return isinstance(otra, Plantilla) and (self.forma, self.tamaño, self.ancho) == (otra.forma, otra.tamaño, otra.ancho)
+    
+    def __hash__(self):
+        return hash((self.forma, self.tamaño, self.ancho))
+    
+    @property
+    def direccional(self):
+        """Indica si la forma depende de la dirección en que se lanza"""
+        return self.forma in ("cono", "linea", "cubo")
+    
+    def celdas(self, origen, direccion=0.0):
+        """
+        Obtiene las casillas que cubre la plantilla
+        
+        Args:
+            origen (tuple): Punto de origen (x, y) en casillas; se ajusta a medias casillas
+            direccion (float): Ángulo en radianes (conos, líneas y cubos)
+        
+        Returns:
+            numpy.ndarray: Casillas (x, y) afectadas, de forma (n, 2)
+        """
+        x, y = origen
+        # Origen en la rejilla de medias casillas: esquinas, centros y puntos medios de los lados
+        medio_x, medio_y = round(x * 2), round(y * 2)
+        paso = round(math.degrees(direccion) * PASOS_DIRECCION / 360) % PASOS_DIRECCION if self.direccional else 0
+        desplazamientos = _desplazamientos(self, medio_x % 2, medio_y % 2, paso)
+        return desplazamientos + (medio_x // 2, medio_y // 2)
+
+
+@lru_cache(maxsize=4096)
+def _desplazamientos(plantilla, medio_x, medio_y, paso):
+    """
+    Casillas de una plantilla relativas a la casilla del origen
+    
+    Args:
+        plantilla (Plantilla): Área de efecto
+        medio_x (int): 1 si el origen está a media casilla en x
+        medio_y (int): 1 si el origen está a media casilla en y
+        paso (int): Dirección en pasos de 360 / PASOS_DIRECCION grados
+    
+    Returns:
+        numpy.ndarray: Desplazamientos (dx, dy) de las casillas cubiertas (sólo lectura)
+    """
+    import numpy as np
+    
+    tamaño = plantilla.tamaño / PIES_POR_CASILLA
+    ox, oy = medio_x / 2, medio_y / 2
+    limite = int(math.ceil(tamaño * math.sqrt(2))) + 1
+    rango = np.arange(-limite, limite + 1)
+    dx, dy = np.meshgrid(rango, rango, indexing="ij")
+    # Vector del origen a cada punto de muestra de cada casilla: (casillas, casillas, muestras)
+    muestras = (np.arange(MUESTRAS) + 0.5) / MUESTRAS
+    mx, my = np.meshgrid(muestras, muestras, indexing="ij")
+    vx = dx[:, :, None] + mx.ravel()[None, None, :] - ox
+    vy = dy[:, :, None] + my.ravel()[None, None, :] - oy
+    
+    if plantilla.forma in ("esfera", "cilindro"):
+        cubierto = vx * vx + vy * vy <= tamaño * tamaño
+    else:
+        angulo = paso * 2 * math.pi / PASOS_DIRECCION
+        ux, uy = math.cos(angulo), math.sin(angulo)
+        avance = vx * ux + vy * uy
+        lateral = np.abs(vy * ux - vx * uy)
+        if plantilla.forma == "cono":
+            # El ancho de un cono en cada punto es igual a su distancia al origen
+            mitad = avance / 2
+        elif plantilla.forma == "linea":
+            mitad = plantilla.ancho / PIES_POR_CASILLA / 2
+        else:
+            # Cubo con el origen en el centro de la cara que mira hacia el origen
+            mitad = tamaño / 2
+        cubierto = (avance > 0) & (avance <= tamaño) & (lateral <= mitad)
+    
+    dentro = cubierto.mean(axis=2) >= COBERTURA_MINIMA
+    desplazamientos = np.stack([dx[dentro], dy[dentro]], axis=1).astype(np.int64)
+    desplazamientos.setflags(write=False)
+    return desplazamientos
+
+
+@lru_cache(maxsize=512)
+def analizar_alcance(alcance, descripcion=""):
+    """
+    Interpreta el alcance y el área de efecto de un hechizo
+    
+    Args:
+        alcance (str): Campo alcance ("120 pies", "Toque", "Personal (cono de 15 pies)"...)
+        descripcion (str): Descripción del hechizo, donde se busca el área si el alcance no la indica
+    
+    Returns:
+        tuple: (alcance en pies o None si no tiene límite, Plantilla o None si no tiene área)
+    """
+    texto = _normalizar(alcance or "")
+    pies = None
+    for clave, valor in ALCANCES_ESPECIALES.items():
+        if texto.startswith(clave):
+            pies = valor
+            break
+    else:
+        coincidencia = PATRON_ALCANCE.search(texto)
+        if coincidencia:
+            pies = int(coincidencia.group(1)) * (5280 if coincidencia.group(2) == "milla" else 1)
+    
+    plantilla = None
+    for fuente in (texto, _normalizar(descripcion or "")):
+        coincidencia = PATRON_AREA.search(fuente)
+        if coincidencia:
+            forma, tamaño, ancho = coincidencia.groups()
+            plantilla = Plantilla(forma, int(tamaño), int(ancho or PIES_POR_CASILLA))
+            break
+        coincidencia = PATRON_RADIO.search(fuente)
+        if coincidencia:
+            plantilla = Plantilla(coincidencia.group(1), int(coincidencia.group(2)))
+            break
+        coincidencia = PATRON_RADIO_SIMPLE.search(fuente) if fuente is texto else None
+        if coincidencia:
+            plantilla = Plantilla("esfera", int(coincidencia.group(1)))
+            break
+    return pies, plantilla
+
+
+def area_hechizo(hechizo):
+    """
+    Obtiene el alcance y el área de un hechizo
+    
+    Args:
+        hechizo (dict): Datos del hechizo
+    
+    Returns:
+        tuple: (alcance en pies o None, Plantilla o None)
+    """
+    return analizar_alcance(hechizo.get("alcance", ""), hechizo.get("descripcion", ""))
+
+
+def _clave(x, y):
+    """Empaqueta una casilla en un entero para la tabla hash"""
+    return (x << 32) ^ (y & 0xFFFFFFFF)
+
+
+class MapaBatalla:
+    """Posiciones de las criaturas en una cuadrícula de casillas de 5 pies"""
+    
+    def __init__(self):
+        """Inicializa un mapa vacío"""
+        # id -> (x, y, lado en casillas) y casilla empaquetada -> ids que la ocupan
+        self._criaturas = {}
+        self._celdas = {}
+        self._suscriptores = []
+    
+    def __len__(self):
+        return len(self._criaturas)
+    
+    def __contains__(self, criatura):
+        return criatura in self._criaturas
+    
+    def __iter__(self):
+        return iter(list(self._criaturas))
+    
+    def suscribir(self, callback):
+        """
+        Registra una función a la que avisar cuando una criatura se coloca o se quita
+        
+        Args:
+            callback (callable): Recibe (criatura, posición anterior, posición nueva);
+                las posiciones son (x, y, lado) o None
+        """
+        self._suscriptores.append(callback)
+    
+    def _avisar(self, criatura, anterior, nueva):
+        """Avisa a los suscriptores de un cambio de posición"""
+        for callback in self._suscriptores:
+            callback(criatura, anterior, nueva)
+    
+    def _ocupadas(self, x, y, lado):
+        """Claves de las casillas que ocupa una criatura"""
+        return [_clave(x + i, y + j) for i in range(lado) for j in range(lado)]
+    
+    def colocar(self, criatura, x, y, tamaño="Mediano"):
+        """
+        Coloca una criatura (o la mueve si ya estaba)
+        
+        Args:
+            criatura: Identificador de la criatura
+            x (int): Casilla de la esquina superior izquierda
+            y (int): Casilla de la esquina superior izquierda
+            tamaño (str | int): Categoría de tamaño o lado en casillas
+        """
+        lado = tamaño if isinstance(tamaño, int) else CASILLAS_POR_TAMAÑO.get(tamaño, 1)
+        if criatura in self._criaturas:
+            self.quitar(criatura)
+        self._criaturas[criatura] = (x, y, lado)
+        for clave in self._ocupadas(x, y, lado):
+            self._celdas.setdefault(clave, set()).add(criatura)
+        self._avisar(criatura, None, (x, y, lado))
+    
+    def mover(self, criatura, x, y):
+        """
+        Mueve una criatura a otra casilla conservando su tamaño
+        
+        Args:
+            criatura: Identificador de la criatura
+            x (int): Nueva casilla de la esquina superior izquierda
+            y (int): Nueva casilla de la esquina superior izquierda
+        """
+        _, _, lado = self._criaturas[criatura]
+        self.colocar(criatura, x, y, lado)
+    
+    def quitar(self, criatura):
+        """
+        Quita una criatura del mapa
+        
+        Args:
+            criatura: Identificador de la criatura
+        """
+        posicion = self._criaturas.pop(criatura, None)
+        if posicion is None:
+            return
+        for clave in self._ocupadas(*posicion):
+            ocupantes = self._celdas.get(clave)
+            if ocupantes is not None:
+                ocupantes.discard(criatura)
+                if not ocupantes:
+                    del self._celdas[clave]
+        self._avisar(criatura, posicion, None)
+    
+    def posicion(self, criatura):
+        """
+        Obtiene la posición de una criatura
+        
+        Returns:
+            tuple: (x, y, lado en casillas) o None si no está en el mapa
+        """
+        return self._criaturas.get(criatura)
+    
+    def centro(self, criatura):
+        """
+        Obtiene el punto central de una criatura en casillas
+        
+        Returns:
+            tuple: (x, y)
+        """
+        x, y, lado = self._criaturas[criatura]
+        return x + lado / 2, y + lado / 2
+    
+    def en_casilla(self, x, y):
+        """
+        Obtiene las criaturas que ocupan una casilla
+        
+        Returns:
+            set: Identificadores de las criaturas
+        """
+        return set(self._celdas.get(_clave(x, y), ()))
+    
+    def criaturas_en(self, celdas):
+        """
+        Obtiene las criaturas que ocupan alguna de las casillas dadas
+        
+        Args:
+            celdas (numpy.ndarray): Casillas (x, y), de forma (n, 2)
+        
+        Returns:
+            set: Identificadores de las criaturas
+        """
+        import numpy as np
+        
+        if len(celdas) == 0 or not self._celdas:
+            return set()
+        celdas = np.asarray(celdas, dtype=np.int64)
+        claves = (celdas[:, 0] << 32) ^ (celdas[:, 1] & 0xFFFFFFFF)
+        encontradas = set()
+        for clave in claves.tolist():
+            ocupantes = self._celdas.get(clave)
+            if ocupantes:
+                encontradas.update(ocupantes)
+        return encontradas
+    
+    def en_plantilla(self, plantilla, origen, direccion=0.0):
+        """
+        Obtiene las criaturas dentro de un área de efecto
+        
+        Args:
+            plantilla (Plantilla): Área de efecto
+            origen (tuple): Punto de origen (x, y) en casillas
+            direccion (float | tuple): Ángulo en radianes o punto (x, y) hacia el que se lanza
+        
+        Returns:
+            set: Identificadores de las criaturas afectadas
+        """
+        if isinstance(direccion, tuple):
+            direccion = math.atan2(direccion[1] - origen[1], direccion[0] - origen[0])
+        return self.criaturas_en(plantilla.celdas(origen, direccion))
+    
+    def distancia(self, criatura, otra):
+        """
+        Distancia en pies entre dos criaturas (cada diagonal cuenta 5 pies)
+        
+        Returns:
+            int: Distancia entre las casillas más cercanas de ambas
+        """
+        xa, ya, la = self._criaturas[criatura]
+        xb, yb, lb = self._criaturas[otra]
+        dx = max(0, xb - (xa + la - 1), xa - (xb + lb - 1))
+        dy = max(0, yb - (ya + la - 1), ya - (yb + lb - 1))
+        return max(dx, dy) * PIES_POR_CASILLA
+    
+    def distancia_punto(self, criatura, punto):
+        """
+        Distancia en pies de una criatura a la casilla que contiene un punto
+        
+        Returns:
+            int: Distancia (0 si el punto está en una de sus casillas)
+        """
+        x, y, lado = self._criaturas[criatura]
+        px, py = math.floor(punto[0]), math.floor(punto[1])
+        dx = max(0, px - (x + lado - 1), x - px)
+        dy = max(0, py - (y + lado - 1), y - py)
+        return max(dx, dy) * PIES_POR_CASILLA
+    
+    def en_alcance(self, criatura, alcance):
+        """
+        Obtiene las criaturas a una distancia máxima de otra
+        
+        Args:
+            criatura: Identificador de la criatura de origen
+            alcance (int): Distancia máxima en pies (None: todo el mapa)
+        
+        Returns:
+            set: Identificadores de las criaturas al alcance (sin la de origen)
+        """
+        import numpy as np
+        
+        if alcance is None:
+            return set(self._criaturas) - {criatura}
+        x, y, lado = self._criaturas[criatura]
+        radio = alcance // PIES_POR_CASILLA
+        lado_zona = 2 * radio + lado
+        if lado_zona * lado_zona <= 4 * len(self._criaturas):
+            # Zona pequeña: mirar sus casillas
+            rango_x = np.arange(x - radio, x + lado + radio)
+            rango_y = np.arange(y - radio, y + lado + radio)
+            celdas = np.stack(np.meshgrid(rango_x, rango_y, indexing="ij"), axis=-1).reshape(-1, 2)
+            encontradas = self.criaturas_en(celdas)
+        else:
+            # Zona grande: es más barato recorrer las criaturas
+            encontradas = {otra for otra in self._criaturas if self.distancia(criatura, otra) <= alcance}
+        encontradas.discard(criatura)
+        return encontradas
+    
+    def objetivos_hechizo(self, hechizo, lanzador, destino):
+        """
+        Obtiene las criaturas afectadas por un hechizo lanzado hacia un punto
+        
+        Args:
+            hechizo (dict): Datos del hechizo
+            lanzador: Identificador de la criatura que lo lanza
+            destino (tuple): Punto (x, y) en casillas al que se apunta
+        
+        Returns:
+            set: Identificadores de las criaturas afectadas (vacío si el destino está fuera de alcance)
+        """
+        alcance, plantilla = area_hechizo(hechizo)
+        if alcance == 0 and plantilla is None:
+            # Hechizo personal sin área: sólo afecta al lanzador, apunte a donde apunte
+            return {lanzador}
+        if alcance:
+            if self.distancia_punto(lanzador, destino) > alcance:
+                return set()
+        
+        if plantilla is None:
+            return self.en_casilla(math.floor(destino[0]), math.floor(destino[1]))
+        
+        if alcance == 0:
+            # Áreas que salen del lanzador (conos, líneas, auras): origen en su borde hacia el destino
+            cx, cy = self.centro(lanzador)
+            _, _, lado = self._criaturas[lanzador]
+            angulo = math.atan2(destino[1] - cy, destino[0] - cx)
+            if plantilla.direccional:
+                origen = (cx + math.cos(angulo) * lado / 2, cy + math.sin(angulo) * lado / 2)
+            else:
+                origen = (cx, cy)
+            afectadas = self.en_plantilla(plantilla, origen, angulo)
+            afectadas.discard(lanzador)
+            return afectadas
+        
+        if plantilla.direccional:
+            cx, cy = self.centro(lanzador)
+            return self.en_plantilla(plantilla, destino, math.atan2(destino[1] - cy, destino[0] - cx))
+        return self.en_plantilla(plantilla, destino)
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    mapa = MapaBatalla()
+    mapa.colocar("Maga", 0, 0)
+    mapa.colocar("Ogro", 8, 5, "Grande")
+    for i in range(6):
+        mapa.colocar(f"Goblin {i + 1}", 10 + i % 3, 3 + i // 3, "Pequeño")
+    
+    bola_de_fuego = {"alcance": "150 pies", "descripcion": "Todas las criaturas en una esfera de 20 pies de radio centrada en ese punto..."}
+    print("Bola de fuego:", sorted(mapa.objetivos_hechizo(bola_de_fuego, "Maga", (11, 5))))
+    manos = {"alcance": "Personal (cono de 15 pies)"}
+    mapa.colocar("Kobold", 2, 1, "Pequeño")
+    print("Manos ardientes:", sorted(mapa.objetivos_hechizo(manos, "Maga", (3, 2))))
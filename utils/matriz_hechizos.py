@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Matriz precalculada para comparar hechizos en la aplicación D&D Combat Manager.
+Para cada hechizo del catálogo guarda el daño y la curación esperados en cada
+nivel de espacio (0-9) y con cada modificador de lanzador, contra un objetivo de
+referencia (CA y bono de salvación). Se construye en una sola pasada vectorizada
+a partir de daño_base, daño_nivel_superior, curacion_base y curacion_nivel_superior;
+al editar un hechizo sólo se recalculan sus filas, y los órdenes por columna se
+guardan para que las listas se puedan ordenar al instante.
+"""
+
+import os
+import sys
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.dados import parsear_dados
+from utils.estimador_hechizos import FACTOR_SALVACION, NIVELES_MEJORA_TRUCO, prob_fallo_salvacion, prob_impacto
+from utils.tablas_reglas import BONIF_COMPETENCIA
+
+NIVELES_ESPACIO = 10
+MODIFICADORES_LANZADOR = tuple(range(-1, 6))
+
+# Objetivo de referencia por defecto
+CA_REFERENCIA = 15
+BONO_SALVACION_REFERENCIA = 2
+MODIFICADOR_REFERENCIA = 3
+
+# Campos de un hechizo que influyen en la matriz
+CAMPOS_MATRIZ = (
+    "nivel", "tipo_ataque", "requiere_salvacion", "efecto_salvacion",
+    "daño_base", "daño_nivel_superior", "curacion_base", "curacion_nivel_superior"
+)
+
+# Tipo de resolución del daño
+_ATAQUE, _SALVACION, _AUTOMATICO = 0, 1, 2
+
+
+def nivel_lanzador_espacio(nivel_espacio):
+    """Nivel mínimo de un lanzador completo con espacios de ese nivel (los trucos cuentan como nivel 1)"""
+    return max(1, 2 * nivel_espacio - 1)
+
+
+def _firma(hechizo):
+    """Valores de los campos que afectan a la matriz"""
+    return tuple(str(hechizo.get(campo, "")) for campo in CAMPOS_MATRIZ)
+
+
+def _medias(formula):
+    """(media de los dados, modificador fijo, lleva modificador) de una fórmula"""
+    dados = parsear_dados(formula)
+    if dados is None:
+        return 0.0, 0.0, False
+    cantidad, caras, modificador = dados
+    return cantidad * (caras + 1) / 2, float(modificador), any(signo in formula for signo in "+-")
+
+
+class MatrizHechizos:
+    """Daño y curación esperados por hechizo, nivel de espacio y modificador del lanzador"""
+    
+    def __init__(self, ca_objetivo=CA_REFERENCIA, bono_salvacion=BONO_SALVACION_REFERENCIA):
+        """
+        Inicializa una matriz vacía
+        
+        Args:
+            ca_objetivo (int): CA del objetivo de referencia
+            bono_salvacion (int): Bono de salvación del objetivo de referencia
+        """
+        import numpy as np
+        
+        self.ca_objetivo = ca_objetivo
+        self.bono_salvacion = bono_salvacion
+        self.nombres = []
+        self._filas = {}
+        self._firmas = {}
+        forma = (0, NIVELES_ESPACIO, len(MODIFICADORES_LANZADOR))
+        self.daño = np.zeros(forma, dtype=np.float32)
+        self.curacion = np.zeros(forma, dtype=np.float32)
+        self._ordenes = {}
+    
+    def __len__(self):
+        return len(self.nombres)
+    
+    def _calcular(self, hechizos):
+        """
+        Calcula las filas de varios hechizos en una pasada
+        
+        Returns:
+            tuple: (daño, curación), arrays de forma (hechizos, niveles de espacio, modificadores)
+        """
+        import numpy as np
+        
+        n = len(hechizos)
+        nivel = np.array([int(hechizo.get("nivel", 0) or 0) for hechizo in hechizos])
+        base = np.array([_medias(hechizo.get("daño_base", ""))[:2] for hechizo in hechizos]).reshape(n, 2)
+        superior = np.array([_medias(hechizo.get("daño_nivel_superior", ""))[:2] for hechizo in hechizos]).reshape(n, 2)
+        cura = [_medias(hechizo.get("curacion_base", "")) for hechizo in hechizos]
+        cura_base = np.array([media + fijo for media, fijo, _ in cura]).reshape(n)
+        cura_suma_mod = np.array([not lleva for _, _, lleva in cura], dtype=bool).reshape(n)
+        cura_superior = np.array([sum(_medias(hechizo.get("curacion_nivel_superior", ""))[:2]) for hechizo in hechizos]).reshape(n)
+        tipo = np.array([
+            _ATAQUE if hechizo.get("tipo_ataque", "Ninguno") != "Ninguno"
+            else _SALVACION if hechizo.get("requiere_salvacion", False)
+            else _AUTOMATICO
+            for hechizo in hechizos
+        ]).reshape(n)
+        factor = np.array([FACTOR_SALVACION.get(hechizo.get("efecto_salvacion", ""), 0.0) for hechizo in hechizos]).reshape(n)
+        
+        # Ejes: hechizo (n), nivel de espacio (10), modificador del lanzador (m)
+        espacios = np.arange(NIVELES_ESPACIO)
+        modificadores = np.array(MODIFICADORES_LANZADOR)
+        nivel_lanzador = np.array([nivel_lanzador_espacio(espacio) for espacio in espacios])
+        competencia = np.array(BONIF_COMPETENCIA)[nivel_lanzador]
+        
+        adicionales = np.maximum(espacios[None, :] - nivel[:, None], 0)
+        mejora_truco = 1 + sum((nivel_lanzador >= umbral).astype(np.int64) for umbral in NIVELES_MEJORA_TRUCO)
+        multiplicador = np.where(nivel[:, None] == 0, mejora_truco[None, :], 1)
+        dados = base[:, 0:1] * multiplicador + adicionales * superior[:, 0:1]
+        fijo = base[:, 1:2] + adicionales * superior[:, 1:2]
+        normal = np.maximum(dados + fijo, 0)[:, :, None]
+        critico_dados = np.maximum(2 * dados + fijo, 0)[:, :, None]
+        
+        bono = modificadores[None, None, :] + competencia[None, :, None]
+        impacto, critico = prob_impacto(bono, self.ca_objetivo)
+        fallo = prob_fallo_salvacion(8 + bono, self.bono_salvacion)
+        
+        daño = np.where(
+            (tipo == _ATAQUE)[:, None, None],
+            impacto * normal + critico * critico_dados,
+            np.where(
+                (tipo == _SALVACION)[:, None, None],
+                normal * (fallo + (1 - fallo) * factor[:, None, None]),
+                normal
+            )
+        )
+        curacion = (
+            cura_base[:, None, None]
+            + np.where(cura_suma_mod[:, None, None], modificadores[None, None, :], 0)
+            + (adicionales * cura_superior[:, None])[:, :, None]
+        )
+        tiene_curacion = np.array([media > 0 for media, _, _ in cura], dtype=bool).reshape(n)
+        curacion = np.where(tiene_curacion[:, None, None], curacion, 0)
+        
+        # Un hechizo no se puede lanzar con un espacio de nivel inferior
+        invalido = (espacios[None, :] < nivel[:, None])[:, :, None]
+        daño = np.where(invalido, np.nan, daño).astype(np.float32)
+        curacion = np.where(invalido, np.nan, curacion).astype(np.float32)
+        return daño, curacion
+    
+    def actualizar(self, hechizos):
+        """
+        Sincroniza la matriz con el catálogo recalculando sólo los hechizos que cambiaron
+        
+        Args:
+            hechizos (list): Todos los hechizos del catálogo
+        
+        Returns:
+            int: Número de filas recalculadas, añadidas o eliminadas
+        """
+        import numpy as np
+        
+        actuales = {}
+        for hechizo in hechizos:
+            nombre = hechizo.get("nombre", "")
+            if nombre:
+                actuales[nombre] = hechizo
+        
+        eliminados = [nombre for nombre in self.nombres if nombre not in actuales]
+        cambiados = [nombre for nombre, hechizo in actuales.items()
+                     if self._firmas.get(nombre) != _firma(hechizo)]
+        if not eliminados and not cambiados:
+            return 0
+        
+        if eliminados:
+            conservar = np.array([nombre in actuales for nombre in self.nombres], dtype=bool)
+            self.daño = self.daño[conservar]
+            self.curacion = self.curacion[conservar]
+            self.nombres = [nombre for nombre in self.nombres if nombre in actuales]
+            for nombre in eliminados:
+                self._firmas.pop(nombre, None)
+            self._filas = {nombre: fila for fila, nombre in enumerate(self.nombres)}
+        
+        if cambiados:
+            daño, curacion = self._calcular([actuales[nombre] for nombre in cambiados])
+            nuevos = [nombre for nombre in cambiados if nombre not in self._filas]
+            existentes = [i for i, nombre in enumerate(cambiados) if nombre in self._filas]
+            if existentes:
+                filas = [self._filas[cambiados[i]] for i in existentes]
+                self.daño[filas] = daño[existentes]
+                self.curacion[filas] = curacion[existentes]
+            if nuevos:
+                indices = [i for i, nombre in enumerate(cambiados) if nombre not in self._filas]
+                self.daño = np.concatenate([self.daño, daño[indices]])
+                self.curacion = np.concatenate([self.curacion, curacion[indices]])
+                for nombre in nuevos:
+                    self._filas[nombre] = len(self.nombres)
+                    self.nombres.append(nombre)
+            for nombre in cambiados:
+                self._firmas[nombre] = _firma(actuales[nombre])
+        
+        self._ordenes = {}
+        return len(eliminados) + len(cambiados)
+    
+    def filas(self, nombres):
+        """
+        Obtiene las filas de varios hechizos
+        
+        Args:
+            nombres (list): Nombres de los hechizos
+        
+        Returns:
+            numpy.ndarray: Fila de cada hechizo (-1 si no está en la matriz)
+        """
+        import numpy as np
+        
+        return np.array([self._filas.get(nombre, -1) for nombre in nombres], dtype=np.int64)
+    
+    def indice_modificador(self, modificador):
+        """Posición de un modificador en el eje de modificadores (acotado a los disponibles)"""
+        modificador = min(max(modificador, MODIFICADORES_LANZADOR[0]), MODIFICADORES_LANZADOR[-1])
+        return MODIFICADORES_LANZADOR.index(modificador)
+    
+    def valor(self, nombre, nivel_espacio=None, modificador=MODIFICADOR_REFERENCIA, curacion=False):
+        """
+        Obtiene el valor esperado de un hechizo
+        
+        Args:
+            nombre (str): Nombre del hechizo
+            nivel_espacio (int, optional): Nivel del espacio. Por defecto, el menor con el que se puede lanzar
+            modificador (int): Modificador de la característica de lanzamiento
+            curacion (bool): Curación en lugar de daño
+        
+        Returns:
+            float: Valor esperado (None si el hechizo no está o no se puede lanzar con ese espacio)
+        """
+        import numpy as np
+        
+        fila = self._filas.get(nombre)
+        if fila is None:
+            return None
+        matriz = self.curacion if curacion else self.daño
+        columna = self.indice_modificador(modificador)
+        if nivel_espacio is None:
+            validos = np.flatnonzero(~np.isnan(matriz[fila, :, columna]))
+            if len(validos) == 0:
+                return None
+            nivel_espacio = int(validos[0])
+        valor = matriz[fila, nivel_espacio, columna]
+        return None if np.isnan(valor) else float(valor)
+    
+    def orden(self, nivel_espacio, modificador=MODIFICADOR_REFERENCIA, curacion=False):
+        """
+        Obtiene las filas ordenadas de mayor a menor valor esperado (guardado hasta el próximo cambio)
+        
+        Args:
+            nivel_espacio (int): Nivel del espacio
+            modificador (int): Modificador de la característica de lanzamiento
+            curacion (bool): Ordenar por curación en lugar de daño
+        
+        Returns:
+            numpy.ndarray: Filas de los hechizos que se pueden lanzar con ese espacio
+        """
+        import numpy as np
+        
+        clave = (nivel_espacio, self.indice_modificador(modificador), curacion)
+        filas = self._ordenes.get(clave)
+        if filas is None:
+            valores = (self.curacion if curacion else self.daño)[:, nivel_espacio, clave[1]]
+            filas = np.argsort(-np.nan_to_num(valores, nan=-np.inf), kind="stable")
+            filas = filas[~np.isnan(valores[filas])]
+            self._ordenes[clave] = filas
+        return filas
+    
+    def mejores(self, nivel_espacio, modificador=MODIFICADOR_REFERENCIA, cantidad=3, curacion=False):
+        """
+        Obtiene los hechizos con mayor valor esperado para un espacio
+        
+        Args:
+            nivel_espacio (int): Nivel del espacio
+            modificador (int): Modificador de la característica de lanzamiento
+            cantidad (int): Número de hechizos
+            curacion (bool): Curación en lugar de daño
+        
+        Returns:
+            list: Tuplas (nombre, valor esperado), sin los hechizos de valor nulo
+        """
+        matriz = self.curacion if curacion else self.daño
+        columna = self.indice_modificador(modificador)
+        return [
+            (self.nombres[fila], float(matriz[fila, nivel_espacio, columna]))
+            for fila in self.orden(nivel_espacio, modificador, curacion)
+            if matriz[fila, nivel_espacio, columna] > 0
+        ][:cantidad]
+
+
+# Matrices compartidas por objetivo de referencia
+_matrices = {}
+
+
+def obtener_matriz(hechizos, ca_objetivo=CA_REFERENCIA, bono_salvacion=BONO_SALVACION_REFERENCIA):
+    """
+    Obtiene la matriz compartida de un objetivo, sincronizada con el catálogo
+    
+    Args:
+        hechizos (list): Todos los hechizos del catálogo
+        ca_objetivo (int): CA del objetivo de referencia
+        bono_salvacion (int): Bono de salvación del objetivo de referencia
+    
+    Returns:
+        MatrizHechizos: Matriz actualizada
+    """
+    clave = (ca_objetivo, bono_salvacion)
+    matriz = _matrices.get(clave)
+    if matriz is None:
+        matriz = MatrizHechizos(ca_objetivo, bono_salvacion)
+        _matrices[clave] = matriz
+    matriz.actualizar(hechizos)
+    return matriz
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import json
+    
+    with open(os.path.join("data", "hechizos", "hechizos.json"), "r", encoding="utf-8") as f:
+        catalogo = [hechizo for lista in json.load(f).values() for hechizo in lista]
+    matriz = obtener_matriz(catalogo)
+    for nivel_espacio in range(4):
+        print(f"Espacio de nivel {nivel_espacio}: {matriz.mejores(nivel_espacio)}")
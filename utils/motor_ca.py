@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de reglas de Clase de Armadura (CA) para la aplicación D&D Combat Manager.
+Única implementación del cálculo de CA: las utilidades de armaduras por nombre, los
+objetos del catálogo, el editor de personajes y el optimizador de equipo llaman a
+este núcleo, memorizado por armadura, modificador de Destreza, escudo y bonificadores.
+"""
+
+from functools import lru_cache
+
+# Constantes para tipos de armadura
+TIPOS_ARMADURA = [
+    "Sin armadura",
+    "Armadura ligera", 
+    "Armadura media", 
+    "Armadura pesada"
+]
+
+# Definiciones de armaduras con sus valores base y límites de modificador
+ARMADURAS = {
+    "Sin armadura": {
+        "tipo": "Sin armadura",
+        "valor_base": 10,
+        "limite_mod": None,  # Sin límite para modificador de destreza
+        "requiere_competencia": False
+    },
+    "Armadura acolchada": {
+        "tipo": "Armadura ligera",
+        "valor_base": 11,
+        "limite_mod": None,  # Sin límite para modificador de destreza
+        "requiere_competencia": True
+    },
+    "Armadura de cuero": {
+        "tipo": "Armadura ligera",
+        "valor_base": 11,
+        "limite_mod": None,
+        "requiere_competencia": True
+    },
+    "Armadura de cuero tachonado": {
+        "tipo": "Armadura ligera",
+        "valor_base": 12,
+        "limite_mod": None,
+        "requiere_competencia": True
+    },
+    "Camisote de mallas": {
+        "tipo": "Armadura media",
+        "valor_base": 13,
+        "limite_mod": 2,  # Límite de +2 para modificador de destreza
+        "requiere_competencia": True
+    },
+    "Cota de escamas": {
+        "tipo": "Armadura media",
+        "valor_base": 14,
+        "limite_mod": 2,
+        "requiere_competencia": True
+    },
+    "Coraza": {
+        "tipo": "Armadura media",
+        "valor_base": 14,
+        "limite_mod": 2,
+        "requiere_competencia": True
+    },
+    "Media armadura": {
+        "tipo": "Armadura media",
+        "valor_base": 15,
+        "limite_mod": 2,
+        "requiere_competencia": True
+    },
+    "Cota de anillas": {
+        "tipo": "Armadura pesada",
+        "valor_base": 14,
+        "limite_mod": 0,  # No se aplica modificador de destreza
+        "requiere_competencia": True
+    },
+    "Cota de malla": {
+        "tipo": "Armadura pesada",
+        "valor_base": 16,
+        "limite_mod": 0,
+        "requiere_competencia": True
+    },
+    "Armadura de bandas": {
+        "tipo": "Armadura pesada",
+        "valor_base": 17,
+        "limite_mod": 0,
+        "requiere_competencia": True
+    },
+    "Armadura de placas": {
+        "tipo": "Armadura pesada",
+        "valor_base": 18,
+        "limite_mod": 0,
+        "requiere_competencia": True
+    }
+}
+
+# Escudos
+ESCUDOS = {
+    "Sin escudo": {
+        "bonus_ca": 0,
+        "requiere_competencia": False
+    },
+    "Escudo": {
+        "bonus_ca": 2,
+        "requiere_competencia": True
+    }
+}
+
+def ca_armadura(valor_base, limite_mod, mod_destreza):
+    """
+    Calcula la CA de una armadura con el modificador de Destreza aplicado
+    
+    Args:
+        valor_base (int): CA base de la armadura (10 sin armadura)
+        limite_mod (int): Máximo modificador de Destreza aplicable (None si no tiene)
+        mod_destreza (int): Modificador de Destreza del personaje
+    
+    Returns:
+        int: CA de la armadura
+    """
+    if limite_mod is None:
+        return valor_base + mod_destreza
+    return valor_base + min(mod_destreza, limite_mod)
+
+
+@lru_cache(maxsize=4096)
+def calcular_ca_nucleo(valor_base, limite_mod, mod_destreza, bonus_escudo=0, bonus_adicional=0):
+    """
+    Núcleo memorizado del cálculo de CA
+    
+    Args:
+        valor_base (int): CA base de la armadura (10 sin armadura)
+        limite_mod (int): Máximo modificador de Destreza aplicable (None si no tiene)
+        mod_destreza (int): Modificador de Destreza del personaje
+        bonus_escudo (int, optional): Bonificador del escudo. Por defecto 0
+        bonus_adicional (int, optional): Resto de bonificadores planos. Por defecto 0
+    
+    Returns:
+        tuple: (modificador aplicado, CA base con Destreza, CA total)
+    """
+    ca_base = ca_armadura(valor_base, limite_mod, mod_destreza)
+    return ca_base - valor_base, ca_base, ca_base + bonus_escudo + bonus_adicional
+
+
+def datos_armadura(armadura_nombre):
+    """
+    Obtiene los datos de una armadura de la tabla por nombre
+    
+    Args:
+        armadura_nombre (str): Nombre de la armadura
+    
+    Returns:
+        dict: Datos de la armadura ("Sin armadura" si no existe)
+    """
+    return ARMADURAS.get(armadura_nombre, ARMADURAS["Sin armadura"])
+
+
+def bonus_escudo(escudo_nombre):
+    """
+    Obtiene el bonificador a la CA de un escudo de la tabla por nombre
+    
+    Args:
+        escudo_nombre (str): Nombre del escudo (None o vacío si no lleva)
+    
+    Returns:
+        int: Bonificador del escudo
+    """
+    if not escudo_nombre:
+        return 0
+    return ESCUDOS.get(escudo_nombre, ESCUDOS["Sin escudo"]).get("bonus_ca", 0)
+
+
+def ca_sin_armadura(mod_destreza, bonus_adicional=0):
+    """
+    Calcula la CA de un personaje sin armadura ni escudo
+    
+    Args:
+        mod_destreza (int): Modificador de Destreza
+        bonus_adicional (int, optional): Bonificadores planos. Por defecto 0
+    
+    Returns:
+        int: CA total
+    """
+    return calcular_ca_nucleo(10, None, mod_destreza, 0, bonus_adicional)[2]
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optimizador de conjuros preparados para la aplicación D&D Combat Manager.
+Elige los trucos y conjuros que un personaje prepara (o conoce) para maximizar el
+valor esperado: daño y curación de la matriz precalculada de hechizos, más un peso
+de utilidad para los que no hacen ninguna de las dos cosas. Respeta la clase, el
+número de conjuros de la tabla de reglas y los niveles de conjuro con espacios.
+Los conjuros de un mismo nivel cuestan lo mismo, así que cada nivel se reduce a
+sus mejores candidatos y el reparto entre niveles es una mochila por grupos que se
+resuelve con programación dinámica en unos milisegundos.
+"""
+
+import os
+import sys
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.matriz_hechizos import BONO_SALVACION_REFERENCIA, CA_REFERENCIA, NIVELES_ESPACIO, obtener_matriz
+from utils.tablas_reglas import atributo_conjuros, conjuros_clase, espacios_conjuro, modificador, tipo_lanzador
+
+PESOS_DEFECTO = {"daño": 1.0, "curacion": 1.0, "utilidad": 2.0}
+
+# Clases que pueden lanzar rituales de su lista sin tenerlos preparados
+CLASES_RITUAL_LIBRE = ("Mago",)
+
+
+def es_ritual(hechizo):
+    """Indica si un hechizo se puede lanzar como ritual"""
+    return "ritual" in hechizo.get("tiempo_lanzamiento", "").lower()
+
+
+def valorar_hechizos(hechizos, matriz, modificador_conjuros, nivel_personaje=1, pesos=None, valores_extra=None,
+                     nivel_espacio=None):
+    """
+    Calcula el valor esperado de cada hechizo para un personaje
+    
+    Args:
+        hechizos (list): Hechizos a valorar
+        matriz (MatrizHechizos): Matriz con los hechizos
+        modificador_conjuros (int): Modificador de la característica de lanzamiento
+        nivel_personaje (int): Nivel del personaje (para la mejora de los trucos)
+        pesos (dict, optional): Pesos de "daño", "curacion" y "utilidad"
+        valores_extra (dict, optional): Valor adicional por nombre de hechizo
+        nivel_espacio (int, optional): Nivel al que se lanzan siempre los conjuros (magia
+            del pacto); por defecto, cada uno a su propio nivel
+    
+    Returns:
+        numpy.ndarray: Valor de cada hechizo
+    """
+    import numpy as np
+    
+    pesos = dict(PESOS_DEFECTO, **(pesos or {}))
+    valores_extra = valores_extra or {}
+    
+    filas = matriz.filas([hechizo.get("nombre", "") for hechizo in hechizos])
+    niveles = np.array([int(hechizo.get("nivel", 0) or 0) for hechizo in hechizos], dtype=np.int64)
+    # Los trucos usan la columna del lanzador de su nivel; los demás, su propio espacio
+    # (o el del pacto, si es mayor)
+    espacio_truco = min(NIVELES_ESPACIO - 1, (nivel_personaje + 1) // 2)
+    espacios = niveles if nivel_espacio is None else np.maximum(niveles, nivel_espacio)
+    espacios = np.where(niveles == 0, espacio_truco, espacios)
+    columna = matriz.indice_modificador(modificador_conjuros)
+    
+    validas = filas >= 0
+    daño = np.zeros(len(hechizos))
+    curacion = np.zeros(len(hechizos))
+    daño[validas] = np.nan_to_num(matriz.daño[filas[validas], espacios[validas], columna])
+    curacion[validas] = np.nan_to_num(matriz.curacion[filas[validas], espacios[validas], columna])
+    
+    valores = pesos["daño"] * daño + pesos["curacion"] * curacion
+    valores += np.where((daño <= 0) & (curacion <= 0), pesos["utilidad"], 0.0)
+    valores += np.array([float(valores_extra.get(hechizo.get("nombre", ""), 0)) for hechizo in hechizos])
+    return valores
+
+
+def _repartir(prefijos, capacidad, minimos):
+    """
+    Mochila por grupos: cuántos conjuros tomar de cada nivel
+    
+    Args:
+        prefijos (list): Por grupo, valor acumulado de tomar sus c mejores (prefijos[g][c])
+        capacidad (int): Conjuros a repartir como máximo
+        minimos (list): Mínimo de conjuros por grupo
+    
+    Returns:
+        list: Cantidad por grupo o None si los mínimos no caben
+    """
+    import numpy as np
+    
+    # mejor[k]: valor máximo usando exactamente k conjuros en los grupos vistos
+    mejor = np.full(capacidad + 1, -np.inf)
+    mejor[0] = 0.0
+    elecciones = []
+    for prefijo, minimo in zip(prefijos, minimos):
+        nuevo = np.full(capacidad + 1, -np.inf)
+        eleccion = np.zeros(capacidad + 1, dtype=np.int64)
+        for cantidad in range(minimo, min(len(prefijo) - 1, capacidad) + 1):
+            candidato = np.full(capacidad + 1, -np.inf)
+            candidato[cantidad:] = mejor[:capacidad + 1 - cantidad] + prefijo[cantidad]
+            mejora = candidato > nuevo
+            nuevo[mejora] = candidato[mejora]
+            eleccion[mejora] = cantidad
+        mejor = nuevo
+        elecciones.append(eleccion)
+    
+    if not np.isfinite(mejor).any():
+        return None
+    k = int(np.argmax(mejor))
+    cantidades = []
+    for eleccion in reversed(elecciones):
+        cantidad = int(eleccion[k])
+        cantidades.append(cantidad)
+        k -= cantidad
+    return cantidades[::-1]
+
+
+def optimizar_conjuros(hechizos, clase, nivel, estadisticas=None, pesos=None, valores_extra=None,
+                       fijos=(), excluidos=(), maximo_por_nivel=None, cubrir_niveles=True,
+                       ca_objetivo=CA_REFERENCIA, bono_salvacion=BONO_SALVACION_REFERENCIA):
+    """
+    Elige los trucos y conjuros preparados que maximizan el valor esperado
+    
+    Args:
+        hechizos (list): Catálogo completo de hechizos
+        clase (str): Clase del personaje
+        nivel (int): Nivel del personaje
+        estadisticas (dict, optional): Puntuaciones de característica
+        pesos (dict, optional): Pesos de "daño", "curacion" y "utilidad"
+        valores_extra (dict, optional): Valor adicional por nombre de hechizo
+        fijos (list): Nombres de conjuros que se preparan siempre (cuentan para el límite)
+        excluidos (list): Nombres de conjuros que no se deben elegir
+        maximo_por_nivel (dict, optional): Máximo de conjuros por nivel de conjuro
+        cubrir_niveles (bool): Preparar al menos un conjuro de cada nivel con espacios, si caben
+        ca_objetivo (int): CA del objetivo de referencia
+        bono_salvacion (int): Bono de salvación del objetivo de referencia
+    
+    Returns:
+        dict: "trucos", "preparados" y "rituales" (nombres; los rituales libres no cuentan
+            para el límite), "por_nivel", "valor_total", "capacidad" y "prepara"
+    """
+    import numpy as np
+    
+    maximo_por_nivel = maximo_por_nivel or {}
+    fijos = set(fijos)
+    excluidos = set(excluidos)
+    num_trucos, capacidad, prepara = conjuros_clase(clase, nivel, estadisticas)
+    valor_atributo = (estadisticas or {}).get(atributo_conjuros(clase), 10)
+    espacios = espacios_conjuro(clase, nivel)
+    niveles_con_espacios = [n for n in range(1, NIVELES_ESPACIO) if espacios[n]]
+    nivel_maximo = max(niveles_con_espacios, default=0)
+    # La magia del pacto sólo tiene espacios del nivel más alto, pero con ellos se lanza
+    # cualquier conjuro de nivel igual o inferior (siempre a ese nivel)
+    nivel_pacto = None
+    niveles_elegibles = niveles_con_espacios
+    if tipo_lanzador(clase) == "pacto" and nivel_maximo:
+        nivel_pacto = nivel_maximo
+        niveles_elegibles = list(range(1, nivel_maximo + 1))
+    
+    candidatos = [
+        hechizo for hechizo in hechizos
+        if clase in hechizo.get("clases", []) and hechizo.get("nombre", "") not in excluidos
+        and int(hechizo.get("nivel", 0) or 0) <= nivel_maximo
+    ]
+    matriz = obtener_matriz(hechizos, ca_objetivo, bono_salvacion)
+    valores = valorar_hechizos(candidatos, matriz, modificador(int(valor_atributo)), nivel, pesos, valores_extra,
+                               nivel_pacto)
+    valor_de = {hechizo.get("nombre", ""): float(valor) for hechizo, valor in zip(candidatos, valores)}
+    
+    # Trucos: todos cuestan lo mismo y no compiten con los conjuros de nivel 1+
+    trucos = sorted(
+        (h.get("nombre", "") for h in candidatos if int(h.get("nivel", 0) or 0) == 0),
+        key=lambda nombre: -valor_de[nombre]
+    )[:num_trucos]
+    
+    rituales = []
+    if prepara and clase in CLASES_RITUAL_LIBRE:
+        rituales = sorted(
+            h.get("nombre", "") for h in candidatos
+            if int(h.get("nivel", 0) or 0) > 0 and es_ritual(h) and h.get("nombre", "") not in fijos
+        )
+    libres = set(rituales)
+    
+    preparados = [h.get("nombre", "") for h in candidatos if h.get("nombre", "") in fijos]
+    restante = max(0, capacidad - len(preparados))
+    
+    # Candidatos de cada nivel que se puede lanzar, de mayor a menor valor
+    grupos = []
+    for nivel_conjuro in niveles_elegibles:
+        nombres = [
+            h.get("nombre", "") for h in candidatos
+            if int(h.get("nivel", 0) or 0) == nivel_conjuro
+            and h.get("nombre", "") not in fijos and h.get("nombre", "") not in libres
+        ]
+        nombres.sort(key=lambda nombre: -valor_de[nombre])
+        ya_fijos = sum(1 for h in candidatos if h.get("nombre", "") in fijos and int(h.get("nivel", 0) or 0) == nivel_conjuro)
+        tope = max(0, maximo_por_nivel.get(nivel_conjuro, len(nombres) + ya_fijos) - ya_fijos)
+        nombres = nombres[:tope]
+        minimo = 1 if cubrir_niveles and espacios[nivel_conjuro] and nombres and not ya_fijos else 0
+        prefijo = np.concatenate([[0.0], np.cumsum([valor_de[nombre] for nombre in nombres])])
+        grupos.append((nivel_conjuro, nombres, prefijo, minimo))
+    
+    cantidades = _repartir([g[2] for g in grupos], restante, [g[3] for g in grupos])
+    if cantidades is None:
+        cantidades = _repartir([g[2] for g in grupos], restante, [0] * len(grupos))
+    for (_, nombres, _, _), cantidad in zip(grupos, cantidades):
+        preparados.extend(nombres[:cantidad])
+    
+    niveles = {h.get("nombre", ""): int(h.get("nivel", 0) or 0) for h in candidatos}
+    preparados.sort(key=lambda nombre: (niveles[nombre], -valor_de[nombre]))
+    por_nivel = {}
+    for nombre in preparados:
+        por_nivel[niveles[nombre]] = por_nivel.get(niveles[nombre], 0) + 1
+    
+    return {
+        "trucos": trucos,
+        "preparados": preparados,
+        "rituales": rituales,
+        "por_nivel": por_nivel,
+        "valor_total": sum(valor_de[nombre] for nombre in trucos + preparados),
+        "capacidad": capacidad,
+        "prepara": prepara
+    }
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import json
+    
+    with open(os.path.join("data", "hechizos", "hechizos.json"), "r", encoding="utf-8") as f:
+        catalogo = [hechizo for lista in json.load(f).values() for hechizo in lista]
+    resultado = optimizar_conjuros(catalogo, "Mago", 5, {"Inteligencia": 16})
+    print(f"Trucos: {', '.join(resultado['trucos'])}")
+    print(f"Preparados ({len(resultado['preparados'])}/{resultado['capacidad']}): {', '.join(resultado['preparados'])}")
+    print(f"Valor esperado: {resultado['valor_total']:.1f}")
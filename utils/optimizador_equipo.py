@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optimizador de equipo para la aplicación D&D Combat Manager.
+Busca, entre los objetos reales del catálogo (data/objetos), la combinación de
+armadura, escudo, casco, anillo y amuleto que da la CA más alta a un personaje,
+respetando sus competencias, la Fuerza exigida por cada armadura, el límite de
+Destreza y el máximo de objetos sintonizados. Cada hueco se reduce primero a sus
+objetos no dominados y la búsqueda se poda con ramificación y acotación, así que
+el coste apenas depende del tamaño del catálogo.
+"""
+
+import os
+import sys
+from collections import namedtuple
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from conectores.items import load_all_items_by_type
+from utils.motor_ca import ca_armadura
+from utils.tablas_reglas import modificador
+
+# Huecos de equipo que afectan a la CA, en el orden en que se muestran
+HUECOS = ("armor", "shield", "helmet", "ring", "amulet")
+
+# Competencia necesaria para cada categoría de armadura
+COMPETENCIA_ARMADURA = {
+    "light": "Ligeras",
+    "medium": "Medias",
+    "heavy": "Pesadas"
+}
+COMPETENCIA_ESCUDO = "Escudos"
+
+# Objetos sintonizados a la vez como máximo (D&D 5e)
+LIMITE_SINTONIZACION = 3
+
+# Opción de un hueco: el objeto (None = hueco vacío) y sus valores ya decodificados.
+# En la armadura "ca" es la CA base; en el resto, el bonificador plano.
+Candidato = namedtuple("Candidato", ["objeto", "ca", "limite_des", "bono_des", "des_fija", "sintonia"])
+
+_SIN_ARMADURA = Candidato(None, 10, None, 0, 0, 0)
+_HUECO_VACIO = Candidato(None, 0, None, 0, 0, 0)
+
+
+def _categoria_armadura(objeto):
+    """Obtiene la categoría de una armadura, deduciéndola del límite de Destreza si falta"""
+    categoria = objeto.properties.get("category")
+    if categoria:
+        return categoria
+    if objeto.dex_bonus_limit is None:
+        return "light"
+    return "heavy" if objeto.dex_bonus_limit == 0 else "medium"
+
+
+def puede_usar(objeto, competencias, fuerza, evitar_desventaja_sigilo=False):
+    """
+    Comprueba si un personaje puede llevar un objeto sin penalizaciones
+    
+    Args:
+        objeto (Item): Objeto del catálogo
+        competencias (set): Competencias con armaduras del personaje
+        fuerza (int): Puntuación de Fuerza del personaje
+        evitar_desventaja_sigilo (bool): Descartar armaduras con desventaja en Sigilo
+    
+    Returns:
+        bool: True si el objeto es utilizable
+    """
+    if objeto.item_type == "armor":
+        competencia = COMPETENCIA_ARMADURA.get(_categoria_armadura(objeto))
+        if competencia and competencia not in competencias:
+            return False
+        try:
+            fuerza_requerida = int(objeto.properties.get("strength_required") or 0)
+        except (TypeError, ValueError):
+            fuerza_requerida = 0
+        if fuerza < fuerza_requerida:
+            return False
+        if evitar_desventaja_sigilo and objeto.properties.get("stealth_disadvantage"):
+            return False
+    elif objeto.item_type == "shield":
+        if COMPETENCIA_ESCUDO not in competencias:
+            return False
+    return True
+
+
+def _candidato(objeto):
+    """Decodifica los valores de un objeto que importan para la CA"""
+    override = objeto.properties.get("ability_override") or {}
+    return Candidato(
+        objeto,
+        objeto.ac_bonus,
+        objeto.dex_bonus_limit,
+        int((objeto.ability_bonus or {}).get("Destreza", 0) or 0),
+        int(override.get("Destreza", 0) or 0),
+        1 if objeto.properties.get("requires_attunement") else 0
+    )
+
+
+def _vector(candidato):
+    """Valores de un candidato orientados para que mayor sea siempre mejor"""
+    limite = float("inf") if candidato.limite_des is None else candidato.limite_des
+    return (candidato.ca, limite, candidato.bono_des, candidato.des_fija, -candidato.sintonia)
+
+
+def frente_no_dominado(candidatos):
+    """
+    Descarta los candidatos dominados por otro del mismo hueco
+    
+    Un candidato domina a otro si no es peor en CA, límite de Destreza, bonificador o
+    valor fijo de Destreza ni en sintonización. Con catálogos grandes quedan muy pocos
+    candidatos por hueco.
+    
+    Args:
+        candidatos (list): Candidatos de un hueco
+    
+    Returns:
+        list: Candidatos no dominados, de mayor a menor CA
+    """
+    ordenados = sorted(((_vector(c), c) for c in candidatos), key=lambda par: par[0], reverse=True)
+    frente = []
+    for vector, candidato in ordenados:
+        dominado = False
+        for vector_frente, _ in frente:
+            if all(a >= b for a, b in zip(vector_frente, vector)):
+                dominado = True
+                break
+        if not dominado:
+            frente.append((vector, candidato))
+    return [candidato for _, candidato in frente]
+
+
+def cargar_objetos_equipables():
+    """
+    Carga del catálogo los objetos de todos los huecos que afectan a la CA
+    
+    Returns:
+        dict: hueco -> lista de objetos
+    """
+    return {hueco: load_all_items_by_type(hueco) for hueco in HUECOS}
+
+
+def preparar_candidatos(objetos, competencias, fuerza, evitar_desventaja_sigilo=False):
+    """
+    Filtra los objetos utilizables y reduce cada hueco a su frente no dominado
+    
+    Args:
+        objetos (dict): hueco -> lista de objetos
+        competencias (set): Competencias con armaduras del personaje
+        fuerza (int): Puntuación de Fuerza
+        evitar_desventaja_sigilo (bool): Descartar armaduras con desventaja en Sigilo
+    
+    Returns:
+        dict: hueco -> candidatos (incluido el hueco vacío)
+    """
+    candidatos = {}
+    for hueco in HUECOS:
+        opciones = [_SIN_ARMADURA if hueco == "armor" else _HUECO_VACIO]
+        for objeto in objetos.get(hueco, []):
+            if puede_usar(objeto, competencias, fuerza, evitar_desventaja_sigilo):
+                opciones.append(_candidato(objeto))
+        candidatos[hueco] = frente_no_dominado(opciones)
+    return candidatos
+
+
+def _ca_armadura(candidato, mod_destreza):
+    """CA de la armadura (o sin armadura) con el modificador de Destreza aplicado"""
+    return ca_armadura(candidato.ca, candidato.limite_des, mod_destreza)
+
+
+def _buscar(candidatos, destreza_base, limite_sintonizacion):
+    """
+    Ramificación y acotación sobre los huecos
+    
+    Primero se eligen los objetos de los huecos distintos de la armadura, que pueden
+    cambiar la Destreza; la armadura se elige al final, cuando la Destreza ya es fija.
+    """
+    huecos = [hueco for hueco in HUECOS if hueco != "armor"]
+    armaduras = candidatos["armor"]
+    
+    # Máximos de lo que aún se puede ganar desde cada posición, para acotar
+    restante_ca = [0] * (len(huecos) + 1)
+    restante_bono = [0] * (len(huecos) + 1)
+    restante_fija = [0] * (len(huecos) + 1)
+    for i in range(len(huecos) - 1, -1, -1):
+        opciones = candidatos[huecos[i]]
+        restante_ca[i] = restante_ca[i + 1] + max(c.ca for c in opciones)
+        restante_bono[i] = restante_bono[i + 1] + max(c.bono_des for c in opciones)
+        restante_fija[i] = max(restante_fija[i + 1], max(c.des_fija for c in opciones))
+    
+    # La propia armadura también puede subir o fijar la Destreza
+    bono_armadura = max(c.bono_des for c in armaduras)
+    fija_armadura = max(c.des_fija for c in armaduras)
+    
+    mejor = {"clave": None, "eleccion": None}
+    eleccion = [None] * len(huecos)
+    
+    def mejor_armadura(bono, fija, sintonia):
+        """Elige la armadura con más CA que quepa en el límite de sintonización"""
+        resultado = None
+        for candidato in armaduras:
+            if sintonia + candidato.sintonia > limite_sintonizacion:
+                continue
+            destreza = max(destreza_base + bono + candidato.bono_des, fija, candidato.des_fija)
+            clave = (_ca_armadura(candidato, modificador(destreza)), -candidato.sintonia)
+            if resultado is None or clave > resultado[0]:
+                resultado = (clave, candidato, destreza)
+        return resultado
+    
+    def visitar(i, ca, bono, fija, sintonia, objetos):
+        if i == len(huecos):
+            armadura = mejor_armadura(bono, fija, sintonia)
+            if armadura is None:
+                return
+            (ca_armadura, _), candidato, destreza = armadura
+            total = ca_armadura + ca
+            # Desempate: menos objetos sintonizados y menos huecos ocupados
+            clave = (total, -(sintonia + candidato.sintonia), -(objetos + (candidato.objeto is not None)))
+            if mejor["clave"] is None or clave > mejor["clave"]:
+                mejor["clave"] = clave
+                mejor["eleccion"] = (list(eleccion), candidato, destreza)
+            return
+        
+        # Cota superior: lo ya elegido más lo mejor posible en cada hueco restante
+        if mejor["clave"] is not None:
+            destreza_maxima = max(destreza_base + bono + restante_bono[i] + bono_armadura,
+                                  fija, restante_fija[i], fija_armadura)
+            mod_maximo = modificador(destreza_maxima)
+            cota = ca + restante_ca[i] + max(_ca_armadura(c, mod_maximo) for c in armaduras)
+            if cota < mejor["clave"][0]:
+                return
+        
+        for candidato in candidatos[huecos[i]]:
+            if sintonia + candidato.sintonia > limite_sintonizacion:
+                continue
+            eleccion[i] = candidato
+            visitar(i + 1, ca + candidato.ca, bono + candidato.bono_des,
+                    max(fija, candidato.des_fija), sintonia + candidato.sintonia,
+                    objetos + (candidato.objeto is not None))
+        eleccion[i] = None
+    
+    visitar(0, 0, 0, 0, 0, 0)
+    
+    if mejor["eleccion"] is None:
+        return None
+    elegidos, armadura, destreza = mejor["eleccion"]
+    return dict(zip(huecos, elegidos), armor=armadura), destreza
+
+
+def _perfil(personaje):
+    """Obtiene los datos del personaje que influyen en la optimización"""
+    estadisticas = personaje.get("estadisticas", {}) or {}
+    try:
+        destreza = int(estadisticas.get("Destreza", 10))
+    except (TypeError, ValueError):
+        destreza = 10
+    try:
+        fuerza = int(estadisticas.get("Fuerza", 10))
+    except (TypeError, ValueError):
+        fuerza = 10
+    competencias = frozenset(personaje.get("comp_armaduras", []) or [])
+    return competencias, fuerza, destreza
+
+
+def _resultado(elegidos, destreza):
+    """Construye el resultado a partir de los candidatos elegidos"""
+    mod_destreza = modificador(destreza)
+    armadura = elegidos["armor"]
+    ca_armadura = _ca_armadura(armadura, mod_destreza)
+    bonos = {hueco: elegidos[hueco].ca for hueco in HUECOS
+             if hueco != "armor" and elegidos[hueco].objeto is not None}
+    return {
+        "equipo": {hueco: elegidos[hueco].objeto for hueco in HUECOS},
+        "ca_total": ca_armadura + sum(bonos.values()),
+        "ca_armadura": ca_armadura,
+        "bonos": bonos,
+        "destreza": destreza,
+        "mod_destreza": mod_destreza,
+        "sintonizaciones": sum(elegidos[hueco].sintonia for hueco in HUECOS)
+    }
+
+
+def optimizar_equipo(personaje, objetos=None, limite_sintonizacion=LIMITE_SINTONIZACION,
+                     evitar_desventaja_sigilo=False):
+    """
+    Busca el equipo que da la CA más alta a un personaje
+    
+    Args:
+        personaje (dict): Datos del personaje (estadísticas y comp_armaduras)
+        objetos (dict, optional): hueco -> objetos. Por defecto se carga el catálogo
+        limite_sintonizacion (int): Máximo de objetos sintonizados
+        evitar_desventaja_sigilo (bool): Descartar armaduras con desventaja en Sigilo
+    
+    Returns:
+        dict: Equipo por hueco (None = vacío), CA total y desglose
+    """
+    return optimizar_grupo([personaje], objetos, limite_sintonizacion, evitar_desventaja_sigilo)[0]
+
+
+def optimizar_grupo(personajes, objetos=None, limite_sintonizacion=LIMITE_SINTONIZACION,
+                    evitar_desventaja_sigilo=False):
+    """
+    Busca el mejor equipo para todos los personajes de un grupo en una sola llamada
+    
+    El catálogo se carga y se filtra una sola vez; los personajes con las mismas
+    competencias y Fuerza comparten candidatos, y los que además tienen la misma
+    Destreza comparten resultado. Los objetos del catálogo son modelos, no unidades,
+    así que dos personajes pueden recibir el mismo.
+    
+    Args:
+        personajes (list): Datos de cada personaje
+        objetos (dict, optional): hueco -> objetos. Por defecto se carga el catálogo
+        limite_sintonizacion (int): Máximo de objetos sintonizados por personaje
+        evitar_desventaja_sigilo (bool): Descartar armaduras con desventaja en Sigilo
+    
+    Returns:
+        list: Un resultado por personaje, en el mismo orden (ver optimizar_equipo)
+    """
+    if objetos is None:
+        objetos = cargar_objetos_equipables()
+    
+    candidatos_por_perfil = {}
+    resultados_por_perfil = {}
+    resultados = []
+    for personaje in personajes:
+        competencias, fuerza, destreza = _perfil(personaje)
+        clave = (competencias, fuerza, destreza)
+        if clave not in resultados_por_perfil:
+            if (competencias, fuerza) not in candidatos_por_perfil:
+                candidatos_por_perfil[(competencias, fuerza)] = preparar_candidatos(
+                    objetos, competencias, fuerza, evitar_desventaja_sigilo)
+            encontrado = _buscar(candidatos_por_perfil[(competencias, fuerza)], destreza, limite_sintonizacion)
+            resultados_por_perfil[clave] = _resultado(*encontrado) if encontrado else None
+        
+        resultado = resultados_por_perfil[clave]
+        resultados.append(dict(resultado, equipo=dict(resultado["equipo"]),
+                               bonos=dict(resultado["bonos"])) if resultado else None)
+    return resultados
+
+
+def sugerir_equipo(personaje, objetos=None):
+    """
+    Sugiere el mejor equipo del catálogo con una explicación legible
+    
+    Args:
+        personaje (dict): Datos del personaje
+        objetos (dict, optional): hueco -> objetos. Por defecto se carga el catálogo
+    
+    Returns:
+        dict: Equipo recomendado por hueco (nombres), CA resultante y explicación
+    """
+    resultado = optimizar_equipo(personaje, objetos)
+    equipo = {hueco: objeto.name if objeto else None for hueco, objeto in resultado["equipo"].items()}
+    nombres = [nombre for nombre in equipo.values() if nombre]
+    
+    explicacion = "Para maximizar tu CA, te recomendamos usar "
+    explicacion += ", ".join(nombres) if nombres else "ningún objeto"
+    mod = resultado["mod_destreza"]
+    explicacion += (f". Con tu modificador de Destreza de {'+' if mod >= 0 else ''}{mod}, "
+                    f"alcanzarás una CA total de {resultado['ca_total']}.")
+    
+    return {
+        "equipo_recomendado": equipo,
+        "ca_resultante": resultado["ca_total"],
+        "explicacion": explicacion
+    }
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    personaje_ejemplo = {
+        "nombre": "Thorin",
+        "estadisticas": {"Fuerza": 16, "Destreza": 14},
+        "comp_armaduras": ["Ligeras", "Medias", "Pesadas", "Escudos"]
+    }
+    sugerencia = sugerir_equipo(personaje_ejemplo)
+    for hueco, nombre in sugerencia["equipo_recomendado"].items():
+        print(f"{hueco}: {nombre or '-'}")
+    print(sugerencia["explicacion"])
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Recálculo y validación por lotes de los personajes de la aplicación D&D Combat Manager.
+Recorre la carpeta de personajes con un grupo de procesos, recalcula los campos
+derivados (bonificador de competencia, CD y ataque de conjuro, ataques de Fuerza y
+Destreza), valida los datos y reescribe sólo los archivos cuyo contenido cambió.
+
+Uso:
+    python utils/recalcular_personajes.py [--directorio personajes] [--procesos N] [--simular]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.tablas_reglas import (NIVEL_MAXIMO, nivel_desde_experiencia, bonificador_competencia,
+                                 modificador, atributo_conjuros)
+
+ESTADISTICAS = ["Fuerza", "Destreza", "Constitución", "Inteligencia", "Sabiduría", "Carisma"]
+
+# Campos que se recalculan a partir del resto de datos
+CAMPOS_DERIVADOS = ["bonif_comp", "cd_conjuro", "ataque_conjuro", "ataque_fuerza", "ataque_destreza"]
+
+# Estados posibles de un archivo tras procesarlo
+ACTUALIZADO = "actualizado"
+SIN_CAMBIOS = "sin_cambios"
+ERROR = "error"
+
+
+def _entero(valor):
+    """Convierte un valor a entero o devuelve None si no es posible"""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _formatear_bono(valor):
+    """Formatea un bonificador con signo, igual que el editor de personajes"""
+    return f"+{valor}" if valor >= 0 else str(valor)
+
+
+def calcular_campos_derivados(personaje):
+    """
+    Calcula los campos derivados de un personaje con las mismas reglas que el editor
+    
+    Args:
+        personaje (dict): Datos del personaje
+    
+    Returns:
+        dict: Valores de los campos derivados, formateados como se guardan en el archivo
+    """
+    estadisticas = personaje.get("estadisticas", {})
+    if not isinstance(estadisticas, dict):
+        estadisticas = {}
+    modificadores = {}
+    for stat in ESTADISTICAS:
+        valor = _entero(estadisticas.get(stat, 10))
+        modificadores[stat] = None if valor is None else modificador(valor)
+    
+    nivel = _entero(personaje.get("nivel", 1))
+    comp = 2 if nivel is None else bonificador_competencia(nivel)
+    
+    mod_conjuros = modificadores.get(atributo_conjuros(personaje.get("clase", ""))) or 0
+    
+    comp_armas = personaje.get("comp_armas", []) or []
+    comp_ataque = comp if ("Simples" in comp_armas or "Marciales" in comp_armas) else 0
+    
+    return {
+        "bonif_comp": f"+{comp}",
+        "cd_conjuro": str(8 + mod_conjuros + comp),
+        "ataque_conjuro": _formatear_bono(mod_conjuros + comp),
+        "ataque_fuerza": _formatear_bono((modificadores["Fuerza"] or 0) + comp_ataque),
+        "ataque_destreza": _formatear_bono((modificadores["Destreza"] or 0) + comp_ataque)
+    }
+
+
+def validar_personaje(personaje, nombre_archivo=None):
+    """
+    Valida los datos básicos de un personaje
+    
+    Args:
+        personaje (dict): Datos del personaje
+        nombre_archivo (str, optional): Nombre del archivo del que se leyó
+    
+    Returns:
+        list: Avisos encontrados (vacía si todo es correcto)
+    """
+    avisos = []
+    
+    if not str(personaje.get("nombre", "")).strip():
+        avisos.append("Falta el nombre del personaje")
+    
+    nivel = _entero(personaje.get("nivel", 1))
+    if nivel is None or not 1 <= nivel <= NIVEL_MAXIMO:
+        avisos.append(f"Nivel no válido: {personaje.get('nivel')!r}")
+    
+    experiencia = _entero(personaje.get("experiencia", 0))
+    if experiencia is None or experiencia < 0:
+        avisos.append(f"Experiencia no válida: {personaje.get('experiencia')!r}")
+    elif nivel is not None and nivel_desde_experiencia(experiencia) != nivel:
+        avisos.append(f"El nivel {nivel} no corresponde a {experiencia} XP "
+                      f"(nivel {nivel_desde_experiencia(experiencia)})")
+    
+    estadisticas = personaje.get("estadisticas")
+    if not isinstance(estadisticas, dict):
+        avisos.append("Faltan las estadísticas")
+    else:
+        for stat in ESTADISTICAS:
+            if stat not in estadisticas:
+                avisos.append(f"Falta la estadística {stat}")
+                continue
+            valor = _entero(estadisticas[stat])
+            if valor is None or not 1 <= valor <= 30:
+                avisos.append(f"Valor no válido para {stat}: {estadisticas[stat]!r}")
+    
+    if nombre_archivo and personaje.get("archivo") != nombre_archivo:
+        avisos.append(f"El campo 'archivo' ({personaje.get('archivo')!r}) no coincide con el archivo")
+    
+    return avisos
+
+
+def procesar_archivo(ruta_archivo, simular=False):
+    """
+    Recalcula, valida y, si hace falta, reescribe un archivo de personaje
+    
+    Args:
+        ruta_archivo (str): Ruta al archivo JSON del personaje
+        simular (bool): Si es True no se escribe nada en disco
+    
+    Returns:
+        tuple: (nombre del archivo, estado, lista de avisos, lista de campos modificados)
+    """
+    nombre_archivo = os.path.basename(ruta_archivo)
+    try:
+        with open(ruta_archivo, 'r', encoding='utf-8') as f:
+            personaje = json.load(f)
+    except Exception as e:
+        return nombre_archivo, ERROR, [f"No se pudo leer: {str(e)}"], []
+    
+    if not isinstance(personaje, dict):
+        return nombre_archivo, ERROR, ["El archivo no contiene un personaje"], []
+    
+    avisos = validar_personaje(personaje, nombre_archivo)
+    
+    try:
+        derivados = calcular_campos_derivados(personaje)
+    except Exception as e:
+        return nombre_archivo, ERROR, avisos + [f"No se pudieron calcular los campos derivados: {str(e)}"], []
+    cambiados = [campo for campo in CAMPOS_DERIVADOS if personaje.get(campo) != derivados[campo]]
+    if not cambiados:
+        return nombre_archivo, SIN_CAMBIOS, avisos, []
+    
+    if not simular:
+        personaje.update(derivados)
+        try:
+            # Escribir en un temporal y reemplazar para no dejar archivos a medias
+            ruta_temporal = ruta_archivo + ".tmp"
+            with open(ruta_temporal, 'w', encoding='utf-8') as f:
+                json.dump(personaje, f, ensure_ascii=False, indent=4)
+            os.replace(ruta_temporal, ruta_archivo)
+        except Exception as e:
+            return nombre_archivo, ERROR, avisos + [f"No se pudo guardar: {str(e)}"], cambiados
+    
+    return nombre_archivo, ACTUALIZADO, avisos, cambiados
+
+
+def _procesar_lote(rutas, simular):
+    """Procesa un lote de archivos dentro de un proceso trabajador"""
+    return [procesar_archivo(ruta, simular) for ruta in rutas]
+
+
+def _listar_personajes(directorio):
+    """Genera las rutas de los archivos de personaje del directorio"""
+    with os.scandir(directorio) as entradas:
+        for entrada in entradas:
+            if entrada.is_file() and entrada.name.endswith(".json"):
+                yield entrada.path
+
+
+def _lotes(rutas, tamaño):
+    """Agrupa un iterable de rutas en listas de un tamaño dado"""
+    lote = []
+    for ruta in rutas:
+        lote.append(ruta)
+        if len(lote) >= tamaño:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _acumular(resumen, resultados):
+    """Suma los resultados de un lote al resumen"""
+    for resultado in resultados:
+        _, estado, avisos, _ = resultado
+        resumen[estado] += 1
+        if avisos:
+            resumen["avisos"] += 1
+        resumen["resultados"].append(resultado)
+
+
+def recalcular_personajes(directorio, procesos=None, simular=False, tamaño_lote=64):
+    """
+    Recalcula y valida todos los personajes de un directorio en paralelo
+    
+    Args:
+        directorio (str): Carpeta con los archivos de personaje
+        procesos (int, optional): Número de procesos (por defecto, uno por CPU)
+        simular (bool): Si es True sólo informa, sin reescribir archivos
+        tamaño_lote (int): Archivos que procesa cada tarea
+    
+    Returns:
+        dict: Resumen con los contadores y los resultados por archivo
+    """
+    resumen = {ACTUALIZADO: 0, SIN_CAMBIOS: 0, ERROR: 0, "avisos": 0, "resultados": []}
+    if not os.path.isdir(directorio):
+        return resumen
+    
+    lotes = _lotes(_listar_personajes(directorio), tamaño_lote)
+    
+    if procesos == 1:
+        for lote in lotes:
+            _acumular(resumen, _procesar_lote(lote, simular))
+        return resumen
+    
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        futuros = [executor.submit(_procesar_lote, lote, simular) for lote in lotes]
+        for futuro in futuros:
+            _acumular(resumen, futuro.result())
+    
+    return resumen
+
+
+def main(argumentos=None):
+    """Punto de entrada de la línea de comandos"""
+    directorio_raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    parser = argparse.ArgumentParser(description="Recalcula y valida los campos derivados de todos los personajes")
+    parser.add_argument("--directorio", default=os.path.join(directorio_raiz, "personajes"),
+                        help="Carpeta con los archivos de personaje")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Número de procesos trabajadores (por defecto, uno por CPU)")
+    parser.add_argument("--simular", action="store_true",
+                        help="No reescribir archivos, sólo mostrar lo que cambiaría")
+    parser.add_argument("--detalle", action="store_true",
+                        help="Mostrar también los archivos sin cambios ni avisos")
+    args = parser.parse_args(argumentos)
+    
+    inicio = time.perf_counter()
+    resumen = recalcular_personajes(args.directorio, args.procesos, args.simular)
+    duracion = time.perf_counter() - inicio
+    
+    for nombre_archivo, estado, avisos, cambiados in sorted(resumen["resultados"]):
+        if estado == SIN_CAMBIOS and not avisos and not args.detalle:
+            continue
+        linea = f"{nombre_archivo}: {estado}"
+        if cambiados:
+            linea += f" ({', '.join(cambiados)})"
+        print(linea)
+        for aviso in avisos:
+            print(f"    - {aviso}")
+    
+    total = resumen[ACTUALIZADO] + resumen[SIN_CAMBIOS] + resumen[ERROR]
+    accion = "por actualizar" if args.simular else "actualizados"
+    print(f"\n{total} personajes procesados en {duracion:.2f} s: "
+          f"{resumen[ACTUALIZADO]} {accion}, {resumen[SIN_CAMBIOS]} sin cambios, "
+          f"{resumen[ERROR]} con errores, {resumen['avisos']} con avisos")
+    
+    return 1 if resumen[ERROR] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
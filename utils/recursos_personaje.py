@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Control de espacios de conjuro y recursos de clase de los personajes para la
+aplicación D&D Combat Manager.
+Los máximos salen de las tablas de reglas según clase y nivel; lo gastado se
+guarda en un array compacto de enteros sin signo, con un bitset de los niveles
+de conjuro que aún tienen espacios libres. Una instantánea son unos pocos bytes,
+así que una simulación puede ramificarse y volver atrás sin copiar diccionarios.
+Sólo lo gastado se guarda en el archivo del personaje, bajo la clave "recursos".
+"""
+
+import json
+import os
+import sys
+from array import array
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.cache_personajes import DIRECTORIO_PERSONAJES, cargar_personaje, invalidar_personaje
+from utils.indice_campanas import registrar_personaje_guardado
+from utils.tablas_reglas import espacios_conjuro, recursos_clase, tipo_lanzador
+
+# Posiciones 1-9: espacios de conjuro por nivel; desde la 10: recursos de clase
+NIVELES_CONJURO = 9
+PRIMER_RECURSO = NIVELES_CONJURO + 1
+
+
+class RecursosPersonaje:
+    """Espacios de conjuro y usos de recursos de clase gastados por un personaje"""
+    
+    def __init__(self, clase, nivel, estadisticas=None):
+        """
+        Inicializa los recursos con todo disponible
+        
+        Args:
+            clase (str): Nombre de la clase
+            nivel (int): Nivel del personaje
+            estadisticas (dict, optional): Puntuaciones de característica
+        """
+        self.clase = clase
+        self.nivel = nivel
+        
+        recursos = recursos_clase(clase, nivel, estadisticas)
+        self.nombres = [nombre for nombre, _, _ in recursos]
+        self._posiciones = {nombre: PRIMER_RECURSO + i for i, nombre in enumerate(self.nombres)}
+        
+        self._maximos = array("H", espacios_conjuro(clase, nivel))
+        self._maximos.extend(maximo for _, maximo, _ in recursos)
+        self._gastados = array("H", bytes(2 * len(self._maximos)))
+        
+        # Posiciones que se recuperan con un descanso corto
+        self._mascara_corto = 0
+        if tipo_lanzador(clase) == "pacto":
+            for nivel_conjuro in range(1, PRIMER_RECURSO):
+                self._mascara_corto |= 1 << nivel_conjuro
+        for i, (_, _, descanso) in enumerate(recursos):
+            if descanso == "corto":
+                self._mascara_corto |= 1 << (PRIMER_RECURSO + i)
+        
+        self._mascara = 0
+        self._actualizar_mascara()
+    
+    @classmethod
+    def desde_personaje(cls, personaje):
+        """
+        Crea los recursos de un personaje aplicando lo gastado que tenga guardado
+        
+        Args:
+            personaje (dict): Datos del personaje
+        
+        Returns:
+            RecursosPersonaje: Recursos del personaje
+        """
+        recursos = cls(personaje.get("clase", ""), personaje.get("nivel", 1), personaje.get("estadisticas"))
+        recursos.aplicar_dict(personaje.get("recursos", {}))
+        return recursos
+    
+    def _actualizar_mascara(self):
+        """Recalcula el bitset de niveles de conjuro con espacios libres"""
+        mascara = 0
+        for nivel_conjuro in range(1, PRIMER_RECURSO):
+            if self._gastados[nivel_conjuro] < self._maximos[nivel_conjuro]:
+                mascara |= 1 << nivel_conjuro
+        self._mascara = mascara
+    
+    def espacios(self, nivel_conjuro):
+        """
+        Obtiene los espacios libres de un nivel de conjuro
+        
+        Args:
+            nivel_conjuro (int): Nivel de conjuro (1-9)
+        
+        Returns:
+            int: Espacios libres
+        """
+        if not 1 <= nivel_conjuro <= NIVELES_CONJURO:
+            return 0
+        return self._maximos[nivel_conjuro] - self._gastados[nivel_conjuro]
+    
+    def espacios_maximos(self, nivel_conjuro):
+        """
+        Obtiene los espacios totales de un nivel de conjuro
+        
+        Args:
+            nivel_conjuro (int): Nivel de conjuro (1-9)
+        
+        Returns:
+            int: Espacios totales
+        """
+        if not 1 <= nivel_conjuro <= NIVELES_CONJURO:
+            return 0
+        return self._maximos[nivel_conjuro]
+    
+    def puede_lanzar(self, nivel_conjuro):
+        """
+        Indica si queda algún espacio de ese nivel o superior
+        
+        Args:
+            nivel_conjuro (int): Nivel del conjuro (0 para trucos)
+        
+        Returns:
+            bool: True si puede lanzarse
+        """
+        return nivel_conjuro <= 0 or (self._mascara >> nivel_conjuro) != 0
+    
+    def lanzar(self, nivel_conjuro, permitir_superior=True):
+        """
+        Gasta un espacio para lanzar un conjuro
+        
+        Args:
+            nivel_conjuro (int): Nivel del conjuro (0 para trucos, que no gastan espacio)
+            permitir_superior (bool): Si no quedan espacios de ese nivel, usar el
+                menor nivel superior disponible
+        
+        Returns:
+            int: Nivel del espacio gastado (0 para trucos) o None si no quedan espacios
+        """
+        if nivel_conjuro <= 0:
+            return 0
+        if nivel_conjuro > NIVELES_CONJURO:
+            return None
+        
+        libres = (self._mascara >> nivel_conjuro) << nivel_conjuro
+        if not permitir_superior:
+            libres &= 1 << nivel_conjuro
+        if not libres:
+            return None
+        
+        # El bit más bajo del bitset es el menor nivel disponible
+        nivel_espacio = (libres & -libres).bit_length() - 1
+        self._gastados[nivel_espacio] += 1
+        if self._gastados[nivel_espacio] >= self._maximos[nivel_espacio]:
+            self._mascara &= ~(1 << nivel_espacio)
+        return nivel_espacio
+    
+    def recuperar_espacio(self, nivel_conjuro, cantidad=1):
+        """
+        Recupera espacios gastados de un nivel (Recuperación arcana, pociones...)
+        
+        Args:
+            nivel_conjuro (int): Nivel de conjuro (1-9)
+            cantidad (int): Espacios a recuperar
+        """
+        if 1 <= nivel_conjuro <= NIVELES_CONJURO:
+            self._gastados[nivel_conjuro] = max(0, self._gastados[nivel_conjuro] - cantidad)
+            self._actualizar_mascara()
+    
+    def usos(self, recurso):
+        """
+        Obtiene los usos que le quedan a un recurso de clase
+        
+        Args:
+            recurso (str): Nombre del recurso
+        
+        Returns:
+            int: Usos restantes (0 si el personaje no tiene el recurso)
+        """
+        posicion = self._posiciones.get(recurso)
+        if posicion is None:
+            return 0
+        return self._maximos[posicion] - self._gastados[posicion]
+    
+    def usar(self, recurso, cantidad=1):
+        """
+        Gasta usos de un recurso de clase
+        
+        Args:
+            recurso (str): Nombre del recurso
+            cantidad (int): Usos a gastar
+        
+        Returns:
+            bool: True si había usos suficientes
+        """
+        if self.usos(recurso) < cantidad:
+            return False
+        self._gastados[self._posiciones[recurso]] += cantidad
+        return True
+    
+    def descanso_corto(self):
+        """Recupera los recursos de descanso corto (y los espacios de magia del pacto)"""
+        mascara = self._mascara_corto
+        while mascara:
+            posicion = (mascara & -mascara).bit_length() - 1
+            self._gastados[posicion] = 0
+            mascara &= mascara - 1
+        self._actualizar_mascara()
+    
+    def descanso_largo(self):
+        """Recupera todos los espacios de conjuro y recursos de clase"""
+        self._gastados = array("H", bytes(2 * len(self._maximos)))
+        self._actualizar_mascara()
+    
+    def instantanea(self):
+        """
+        Guarda el estado gastado actual
+        
+        Returns:
+            bytes: Estado compacto (inmutable, se puede usar como clave de diccionario)
+        """
+        return self._gastados.tobytes()
+    
+    def restaurar(self, instantanea):
+        """
+        Vuelve a un estado guardado con instantanea()
+        
+        Args:
+            instantanea (bytes): Estado guardado
+        """
+        gastados = array("H")
+        gastados.frombytes(instantanea)
+        self._gastados = gastados
+        self._actualizar_mascara()
+    
+    def a_dict(self):
+        """
+        Obtiene lo gastado en el formato que se guarda en el archivo del personaje
+        
+        Returns:
+            dict: {"espacios_gastados": [...], "usos_gastados": {recurso: usos}}
+        """
+        return {
+            "espacios_gastados": list(self._gastados[1:PRIMER_RECURSO]),
+            "usos_gastados": {
+                nombre: self._gastados[posicion]
+                for nombre, posicion in self._posiciones.items() if self._gastados[posicion]
+            }
+        }
+    
+    def aplicar_dict(self, datos):
+        """
+        Aplica lo gastado guardado en el archivo, ajustándolo a los máximos actuales
+        
+        Args:
+            datos (dict): Resultado de a_dict()
+        """
+        for i, gastados in enumerate(datos.get("espacios_gastados", [])[:NIVELES_CONJURO]):
+            nivel_conjuro = i + 1
+            self._gastados[nivel_conjuro] = max(0, min(int(gastados), self._maximos[nivel_conjuro]))
+        for nombre, gastados in datos.get("usos_gastados", {}).items():
+            posicion = self._posiciones.get(nombre)
+            if posicion is not None:
+                self._gastados[posicion] = max(0, min(int(gastados), self._maximos[posicion]))
+        self._actualizar_mascara()
+    
+    def resumen(self):
+        """
+        Obtiene los recursos disponibles para mostrarlos
+        
+        Returns:
+            dict: "espacios" (nivel -> (libres, totales)) y "recursos" (nombre -> (libres, totales))
+        """
+        return {
+            "espacios": {
+                nivel_conjuro: (self.espacios(nivel_conjuro), self._maximos[nivel_conjuro])
+                for nivel_conjuro in range(1, PRIMER_RECURSO) if self._maximos[nivel_conjuro]
+            },
+            "recursos": {
+                nombre: (self.usos(nombre), self._maximos[posicion])
+                for nombre, posicion in self._posiciones.items()
+            }
+        }
+
+
+def cargar_recursos(archivo):
+    """
+    Obtiene los recursos de un personaje guardado
+    
+    Args:
+        archivo (str): Nombre del archivo del personaje
+    
+    Returns:
+        RecursosPersonaje: Recursos del personaje o None si no existe
+    """
+    personaje = cargar_personaje(archivo)
+    if personaje is None:
+        return None
+    return RecursosPersonaje.desde_personaje(personaje)
+
+
+def guardar_recursos(archivo, recursos):
+    """
+    Guarda lo gastado en el archivo del personaje
+    
+    Args:
+        archivo (str): Nombre del archivo del personaje
+        recursos (RecursosPersonaje): Recursos a guardar
+    
+    Returns:
+        bool: True si se guardó correctamente
+    """
+    personaje = cargar_personaje(archivo)
+    if personaje is None:
+        return False
+    personaje["recursos"] = recursos.a_dict()
+    
+    ruta_archivo = os.path.join(DIRECTORIO_PERSONAJES, archivo)
+    try:
+        ruta_temporal = ruta_archivo + ".tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as f:
+            json.dump(personaje, f, ensure_ascii=False, indent=4)
+        os.replace(ruta_temporal, ruta_archivo)
+    except Exception as e:
+        print(f"Error al guardar los recursos de {archivo}: {str(e)}")
+        return False
+    invalidar_personaje(archivo)
+    registrar_personaje_guardado(archivo)
+    return True
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    recursos = RecursosPersonaje("Mago", 5, {"Inteligencia": 16})
+    print(recursos.resumen())
+    print("Bola de fuego con espacio de nivel", recursos.lanzar(3))
+    estado = recursos.instantanea()
+    print("Otra bola de fuego con espacio de nivel", recursos.lanzar(3))
+    print("Otra más:", recursos.lanzar(3))
+    recursos.restaurar(estado)
+    print("Tras restaurar:", recursos.espacios(3))
+    recursos.descanso_largo()
+    print(recursos.a_dict())
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro binario de eventos de combate para la aplicación D&D Combat Manager.
+Cada evento (tirada, impacto, daño, curación, cambio de PG...) ocupa 16 bytes de
+ancho fijo empaquetados con struct, y los nombres de actores y hechizos se guardan
+una sola vez en un archivo de nombres junto al registro. El escritor acumula los
+eventos en un buffer de tamaño fijo y lo vuelca al disco al llenarse, de modo que
+la memoria no crece con la sesión; el lector recorre el archivo por bloques o lo
+proyecta en memoria con NumPy para analizar millones de eventos.
+"""
+
+import os
+import struct
+import sys
+import time
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIRECTORIO_REGISTROS = os.path.join("data", "registros")
+EXTENSION_REGISTRO = ".dndlog"
+EXTENSION_NOMBRES = ".nombres"
+
+# Cabecera: firma, versión y tamaño de cada evento
+FIRMA = b"DNDLOG\0\0"
+VERSION = 1
+CABECERA = struct.Struct("<8sHH")
+
+# Evento: asalto, tipo, banderas, actor, objetivo, origen, valor, extra
+EVENTO = struct.Struct("<IBBHHHhh")
+CAMPOS_EVENTO = ("asalto", "tipo", "banderas", "actor", "objetivo", "origen", "valor", "extra")
+
+# Identificador para "sin actor / sin objetivo / sin origen"
+SIN_ID = 0xFFFF
+
+# Tipos de evento
+LANZAMIENTO = 1  # origen = hechizo, valor = nivel de lanzamiento
+ATAQUE = 2       # valor = total, extra = d20
+SALVACION = 3    # actor = quien salva, valor = total, extra = CD
+DAÑO = 4         # valor = daño recibido por el objetivo, origen = tipo de daño
+CURACION = 5     # valor = PG curados al objetivo
+PUNTOS_GOLPE = 6 # actor = criatura, valor = PG actuales, extra = PG máximos
+
+NOMBRES_TIPO = {
+    LANZAMIENTO: "lanzamiento",
+    ATAQUE: "ataque",
+    SALVACION: "salvacion",
+    DAÑO: "daño",
+    CURACION: "curacion",
+    PUNTOS_GOLPE: "puntos_golpe"
+}
+
+# Banderas
+IMPACTO = 1
+CRITICO = 2
+PIFIA = 4
+EXITO = 8
+
+# Límites de los campos de 16 bits con signo
+_VALOR_MIN = -32768
+_VALOR_MAX = 32767
+
+
+def _acotar(valor):
+    """Ajusta un valor al rango de un entero de 16 bits con signo"""
+    return max(_VALOR_MIN, min(_VALOR_MAX, int(valor)))
+
+
+def ruta_nombres(ruta):
+    """Ruta del archivo de nombres asociado a un registro"""
+    return os.path.splitext(ruta)[0] + EXTENSION_NOMBRES
+
+
+def nueva_ruta_registro(prefijo="sesion"):
+    """
+    Genera una ruta para un registro nuevo en el directorio de registros
+    
+    Args:
+        prefijo (str): Prefijo del nombre del archivo
+    
+    Returns:
+        str: Ruta del registro
+    """
+    os.makedirs(DIRECTORIO_REGISTROS, exist_ok=True)
+    marca = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(DIRECTORIO_REGISTROS, f"{prefijo}_{marca}{EXTENSION_REGISTRO}")
+
+
+class EscritorRegistro:
+    """Escribe eventos de combate en un registro binario con un buffer de tamaño fijo"""
+    
+    def __init__(self, ruta=None, eventos_buffer=4096):
+        """
+        Abre un registro nuevo (sobrescribe si ya existe)
+        
+        Args:
+            ruta (str, optional): Ruta del registro. Por defecto una nueva en DIRECTORIO_REGISTROS
+            eventos_buffer (int): Eventos que se acumulan antes de escribir al disco
+        """
+        self.ruta = ruta or nueva_ruta_registro()
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        
+        self.asalto = 0
+        self.total_eventos = 0
+        self._ids = {}
+        self._buffer = bytearray(EVENTO.size * max(1, eventos_buffer))
+        self._posicion = 0
+        
+        self._archivo = open(self.ruta, "wb")
+        self._archivo.write(CABECERA.pack(FIRMA, VERSION, EVENTO.size))
+        self._nombres = open(ruta_nombres(self.ruta), "w", encoding="utf-8")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+    
+    def id_nombre(self, nombre):
+        """
+        Obtiene el identificador de un nombre, dándolo de alta si es nuevo
+        
+        Args:
+            nombre (str): Nombre de un actor, hechizo o tipo de daño (None para SIN_ID)
+        
+        Returns:
+            int: Identificador de 16 bits
+        """
+        if nombre is None:
+            return SIN_ID
+        identificador = self._ids.get(nombre)
+        if identificador is None:
+            identificador = len(self._ids)
+            if identificador >= SIN_ID:
+                raise ValueError("El registro admite como máximo 65535 nombres distintos")
+            self._ids[nombre] = identificador
+            # Un nombre por línea: el identificador es el número de línea
+            self._nombres.write(nombre.replace("\n", " ") + "\n")
+        return identificador
+    
+    def nuevo_asalto(self, asalto=None):
+        """
+        Avanza al asalto siguiente (o al indicado)
+        
+        Args:
+            asalto (int, optional): Número de asalto
+        """
+        self.asalto = self.asalto + 1 if asalto is None else asalto
+    
+    def registrar(self, tipo, actor=None, objetivo=None, origen=None, valor=0, extra=0, banderas=0):
+        """
+        Añade un evento al registro
+        
+        Args:
+            tipo (int): Tipo de evento (LANZAMIENTO, ATAQUE, DAÑO...)
+            actor (str, optional): Nombre de quien realiza la acción
+            objetivo (str, optional): Nombre de quien la recibe
+            origen (str, optional): Hechizo, arma o tipo de daño
+            valor (int): Valor principal del evento
+            extra (int): Valor secundario del evento
+            banderas (int): Combinación de IMPACTO, CRITICO, PIFIA y EXITO
+        """
+        if self._posicion == len(self._buffer):
+            self.volcar()
+        EVENTO.pack_into(
+            self._buffer, self._posicion,
+            self.asalto, tipo, banderas,
+            self.id_nombre(actor), self.id_nombre(objetivo), self.id_nombre(origen),
+            _acotar(valor), _acotar(extra)
+        )
+        self._posicion += EVENTO.size
+        self.total_eventos += 1
+    
+    def registrar_lanzamiento(self, resultado, lanzador, objetivo=None):
+        """
+        Registra el resultado de simular_lanzamiento_hechizo como eventos
+        
+        Args:
+            resultado (dict): Resultado de la simulación del hechizo
+            lanzador (str): Nombre de quien lanza el hechizo
+            objetivo (str, optional): Nombre del objetivo
+        """
+        hechizo = resultado.get("nombre", "")
+        self.registrar(LANZAMIENTO, lanzador, objetivo, hechizo, resultado.get("nivel_lanzamiento", 0))
+        
+        ataque = resultado.get("tirada_ataque")
+        if ataque:
+            banderas = (CRITICO if ataque.get("critico") else 0) | (PIFIA if ataque.get("pifia") else 0)
+            self.registrar(ATAQUE, lanzador, objetivo, hechizo, ataque["total"], ataque["d20"], banderas)
+        
+        salvacion = resultado.get("exito_salvacion")
+        if salvacion:
+            banderas = EXITO if salvacion.get("exito") else 0
+            self.registrar(SALVACION, objetivo, lanzador, hechizo, salvacion["total"], salvacion["cd"], banderas)
+        
+        daño = resultado.get("daño", {})
+        if daño.get("resultado"):
+            self.registrar(DAÑO, lanzador, objetivo, daño.get("tipo"), daño["resultado"])
+        
+        curacion = resultado.get("curacion", {})
+        if curacion.get("resultado"):
+            self.registrar(CURACION, lanzador, objetivo, hechizo, curacion["resultado"])
+    
+    def volcar(self):
+        """Escribe al disco los eventos pendientes del buffer"""
+        if self._posicion:
+            self._archivo.write(memoryview(self._buffer)[:self._posicion])
+            self._posicion = 0
+        self._nombres.flush()
+    
+    def cerrar(self):
+        """Vuelca los eventos pendientes y cierra el registro"""
+        if self._archivo.closed:
+            return
+        self.volcar()
+        self._archivo.close()
+        self._nombres.close()
+
+
+class LectorRegistro:
+    """Lee y analiza un registro binario de eventos de combate"""
+    
+    def __init__(self, ruta):
+        """
+        Abre un registro y carga su tabla de nombres
+        
+        Args:
+            ruta (str): Ruta del registro
+        """
+        self.ruta = ruta
+        with open(ruta, "rb") as archivo:
+            firma, version, tamaño = CABECERA.unpack(archivo.read(CABECERA.size))
+        if firma != FIRMA or tamaño != EVENTO.size:
+            raise ValueError(f"{ruta} no es un registro de combate válido")
+        self.version = version
+        
+        self.nombres = []
+        if os.path.exists(ruta_nombres(ruta)):
+            with open(ruta_nombres(ruta), "r", encoding="utf-8") as archivo:
+                self.nombres = [linea.rstrip("\n") for linea in archivo]
+    
+    def __len__(self):
+        """Número de eventos completos del registro"""
+        return (os.path.getsize(self.ruta) - CABECERA.size) // EVENTO.size
+    
+    def nombre(self, identificador):
+        """
+        Obtiene el nombre de un identificador
+        
+        Args:
+            identificador (int): Identificador de 16 bits
+        
+        Returns:
+            str: Nombre (None para SIN_ID o identificadores desconocidos)
+        """
+        if 0 <= identificador < len(self.nombres):
+            return self.nombres[identificador]
+        return None
+    
+    def eventos(self, eventos_bloque=65536):
+        """
+        Recorre los eventos leyendo el archivo por bloques
+        
+        Args:
+            eventos_bloque (int): Eventos leídos en cada bloque
+        
+        Yields:
+            tuple: (asalto, tipo, banderas, actor, objetivo, origen, valor, extra) con ids numéricos
+        """
+        tamaño_bloque = EVENTO.size * eventos_bloque
+        with open(self.ruta, "rb") as archivo:
+            archivo.seek(CABECERA.size)
+            while True:
+                bloque = archivo.read(tamaño_bloque)
+                # Un evento a medio escribir al final del archivo se ignora
+                completo = len(bloque) - len(bloque) % EVENTO.size
+                if completo:
+                    yield from EVENTO.iter_unpack(memoryview(bloque)[:completo])
+                if len(bloque) < tamaño_bloque:
+                    break
+    
+    def eventos_legibles(self):
+        """
+        Recorre los eventos como diccionarios con nombres en lugar de ids
+        
+        Yields:
+            dict: Evento con los campos de CAMPOS_EVENTO
+        """
+        for evento in self.eventos():
+            datos = dict(zip(CAMPOS_EVENTO, evento))
+            datos["tipo"] = NOMBRES_TIPO.get(datos["tipo"], datos["tipo"])
+            for campo in ("actor", "objetivo", "origen"):
+                datos[campo] = self.nombre(datos[campo])
+            yield datos
+    
+    def tabla(self):
+        """
+        Proyecta el registro en memoria como un array estructurado de NumPy
+        
+        Returns:
+            numpy.ndarray: Array (memmap de sólo lectura) con un campo por columna
+        """
+        import numpy as np
+        
+        tipo = np.dtype([
+            ("asalto", "<u4"), ("tipo", "u1"), ("banderas", "u1"),
+            ("actor", "<u2"), ("objetivo", "<u2"), ("origen", "<u2"),
+            ("valor", "<i2"), ("extra", "<i2")
+        ])
+        total = len(self)
+        if total == 0:
+            return np.zeros(0, dtype=tipo)
+        return np.memmap(self.ruta, dtype=tipo, mode="r", offset=CABECERA.size, shape=(total,))
+    
+    def resumen(self):
+        """
+        Calcula estadísticas por actor: ataques, impactos, críticos, daño y curación
+        
+        Returns:
+            dict: Nombre -> diccionario con los totales
+        """
+        import numpy as np
+        
+        tabla = self.tabla()
+        n = len(self.nombres)
+        if n == 0 or len(tabla) == 0:
+            return {}
+        
+        tipos = tabla["tipo"]
+        actores = tabla["actor"]
+        valores = tabla["valor"].astype(np.int64)
+        conocido = actores < n
+        
+        def contar(mascara, pesos=None):
+            mascara = mascara & conocido
+            return np.bincount(actores[mascara], weights=None if pesos is None else pesos[mascara], minlength=n)
+        
+        ataques = tipos == ATAQUE
+        banderas = tabla["banderas"]
+        columnas = {
+            "ataques": contar(ataques),
+            "criticos": contar(ataques & ((banderas & CRITICO) != 0)),
+            "pifias": contar(ataques & ((banderas & PIFIA) != 0)),
+            "daño_infligido": contar(tipos == DAÑO, valores),
+            "curacion_realizada": contar(tipos == CURACION, valores),
+            "hechizos_lanzados": contar(tipos == LANZAMIENTO)
+        }
+        
+        resumen = {}
+        for identificador in np.flatnonzero(sum(columnas.values())):
+            resumen[self.nombres[identificador]] = {
+                clave: int(valores_actor[identificador]) for clave, valores_actor in columnas.items()
+            }
+        return resumen
+    
+    def reproducir(self, puntos_golpe):
+        """
+        Reproduce los cambios de PG del registro a partir de unos PG iniciales
+        
+        Args:
+            puntos_golpe (dict): Nombre -> PG al comienzo de la sesión
+        
+        Yields:
+            tuple: (asalto, nombre, PG tras el evento) por cada cambio de PG
+        """
+        pg = dict(puntos_golpe)
+        for asalto, tipo, banderas, actor, objetivo, origen, valor, extra in self.eventos():
+            if tipo == DAÑO:
+                nombre = self.nombre(objetivo)
+                if nombre is None:
+                    continue
+                pg[nombre] = max(0, pg.get(nombre, 0) - valor)
+            elif tipo == CURACION:
+                nombre = self.nombre(objetivo)
+                if nombre is None:
+                    continue
+                pg[nombre] = pg.get(nombre, 0) + valor
+            elif tipo == PUNTOS_GOLPE:
+                nombre = self.nombre(actor)
+                if nombre is None:
+                    continue
+                pg[nombre] = valor
+            else:
+                continue
+            yield asalto, nombre, pg[nombre]
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    from editores.gestor_hechizos import cargar_hechizos, simular_lanzamiento_hechizo
+    
+    hechizos = [hechizo for nivel in cargar_hechizos().values() for hechizo in nivel if hechizo.get("daño_base")]
+    if hechizos:
+        with EscritorRegistro() as escritor:
+            for _ in range(10):
+                escritor.nuevo_asalto()
+                for hechizo in hechizos:
+                    escritor.registrar_lanzamiento(simular_lanzamiento_hechizo(hechizo), "Mago", "Goblin")
+            ruta = escritor.ruta
+        
+        lector = LectorRegistro(ruta)
+        print(f"{len(lector)} eventos en {ruta}")
+        print(lector.resumen())
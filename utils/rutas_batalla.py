@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Movimiento y búsqueda de rutas sobre el mapa de batalla para la aplicación D&D
+Combat Manager.
+El terreno es una cuadrícula de NumPy (infranqueable, normal o difícil) y la
+ocupación de las criaturas se mantiene al día suscribiéndose al mapa. Para cada
+criatura se guarda un campo de distancias de movimiento (Dijkstra vectorizado
+hasta un límite de pies), así que preguntar si llega a una casilla es leer un
+array. Al mover una criatura o cambiar el terreno sólo se descartan los campos
+que llegaban hasta esas casillas. Las rutas más allá del campo usan A*.
+"""
+
+import heapq
+import os
+import sys
+
+# Añadir directorio raíz al path para poder ejecutarse como script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.mapa_batalla import PIES_POR_CASILLA
+
+# Coste en casillas de entrar en cada tipo de terreno (0: no se puede entrar)
+INFRANQUEABLE = 0
+NORMAL = 1
+DIFICIL = 2
+
+# Distancia hasta la que se calculan los campos (velocidad 60 pies con Carrera)
+LIMITE_CAMPO = 120
+
+# Cada paso, también en diagonal, cuesta una casilla (regla básica de 5 pies)
+VECINOS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+class RutasBatalla:
+    """Terreno, ocupación y campos de distancia de movimiento de un mapa de batalla"""
+    
+    def __init__(self, mapa, ancho, alto, terreno=None):
+        """
+        Inicializa el terreno y se suscribe a los movimientos del mapa
+        
+        Args:
+            mapa (MapaBatalla): Mapa con las criaturas
+            ancho (int): Casillas en x
+            alto (int): Casillas en y
+            terreno (array, optional): Coste de cada casilla (ancho x alto). Por defecto, todo normal
+        """
+        import numpy as np
+        
+        self.mapa = mapa
+        self.ancho = ancho
+        self.alto = alto
+        if terreno is None:
+            self.terreno = np.full((ancho, alto), NORMAL, dtype=np.int8)
+        else:
+            self.terreno = np.array(terreno, dtype=np.int8).reshape(ancho, alto)
+        self._ocupacion = np.zeros((ancho, alto), dtype=np.int16)
+        # criatura -> {"posicion", "limite", "campo", "coste"} (campo y coste en pies)
+        self._campos = {}
+        
+        for criatura in mapa:
+            self._ocupar(mapa.posicion(criatura), 1)
+        mapa.suscribir(self._al_mover)
+    
+    def _recorte(self, x, y, ancho, alto, margen=0):
+        """Recorte de la cuadrícula para un rectángulo ampliado con un margen"""
+        return (
+            slice(max(0, x - margen), max(0, min(self.ancho, x + ancho + margen))),
+            slice(max(0, y - margen), max(0, min(self.alto, y + alto + margen)))
+        )
+    
+    def _ocupar(self, posicion, incremento):
+        """Suma el incremento a la ocupación de las casillas de una criatura"""
+        x, y, lado = posicion
+        self._ocupacion[self._recorte(x, y, lado, lado)] += incremento
+    
+    def _invalidar(self, x, y, ancho, alto):
+        """Descarta los campos que llegaban a un rectángulo que ha cambiado"""
+        import numpy as np
+        
+        for criatura in list(self._campos):
+            datos = self._campos[criatura]
+            # Una criatura grande se apoya en casillas a lado - 1 de su esquina
+            margen = datos["posicion"][2] + 1
+            if np.isfinite(datos["campo"][self._recorte(x, y, ancho, alto, margen)]).any():
+                del self._campos[criatura]
+    
+    def _al_mover(self, criatura, anterior, nueva):
+        """Actualiza la ocupación y los campos al colocar o quitar una criatura"""
+        self._campos.pop(criatura, None)
+        for posicion, incremento in ((anterior, -1), (nueva, 1)):
+            if posicion is not None:
+                self._ocupar(posicion, incremento)
+                self._invalidar(posicion[0], posicion[1], posicion[2], posicion[2])
+    
+    def fijar_terreno(self, x, y, coste, ancho=1, alto=1):
+        """
+        Cambia el terreno de un rectángulo de casillas
+        
+        Args:
+            x (int): Primera casilla en x
+            y (int): Primera casilla en y
+            coste (int): INFRANQUEABLE, NORMAL o DIFICIL
+            ancho (int): Casillas en x
+            alto (int): Casillas en y
+        """
+        self.terreno[self._recorte(x, y, ancho, alto)] = coste
+        self._invalidar(x, y, ancho, alto)
+    
+    def _costes(self, criatura, x0, x1, y0, y1):
+        """
+        Coste en pies de que la criatura ocupe cada posición de un rectángulo
+        
+        Args:
+            criatura: Identificador de la criatura (sus propias casillas no la bloquean)
+            x0, x1, y0, y1 (int): Posiciones de la esquina, ambos extremos incluidos
+        
+        Returns:
+            numpy.ndarray: Coste por posición (inf si no cabe)
+        """
+        import numpy as np
+        
+        x, y, lado = self.mapa.posicion(criatura)
+        celdas = (slice(x0, x1 + lado), slice(y0, y1 + lado))
+        coste = self.terreno[celdas].astype(np.float32) * PIES_POR_CASILLA
+        coste[coste == 0] = np.inf
+        
+        ocupacion = self._ocupacion[celdas].copy()
+        propias = self._recorte(x - x0, y - y0, lado, lado)
+        ocupacion[propias] -= 1
+        coste[ocupacion > 0] = np.inf
+        
+        # Una criatura de varias casillas paga el terreno más caro que pisa
+        n, m = x1 - x0 + 1, y1 - y0 + 1
+        return np.maximum.reduce([coste[i:i + n, j:j + m] for i in range(lado) for j in range(lado)])
+    
+    def campo(self, criatura, limite=LIMITE_CAMPO):
+        """
+        Obtiene el campo de distancias de movimiento de una criatura (guardado hasta que cambie)
+        
+        Args:
+            criatura: Identificador de la criatura
+            limite (int): Distancia máxima en pies que debe cubrir el campo
+        
+        Returns:
+            numpy.ndarray: Pies para llevar su esquina a cada casilla (inf si no llega)
+        """
+        import numpy as np
+        
+        posicion = self.mapa.posicion(criatura)
+        datos = self._campos.get(criatura)
+        if datos is not None and datos["posicion"] == posicion and datos["limite"] >= limite:
+            return datos["campo"]
+        
+        limite = max(limite, LIMITE_CAMPO)
+        x, y, lado = posicion
+        campo = np.full((self.ancho, self.alto), np.inf, dtype=np.float32)
+        coste_total = np.full((self.ancho, self.alto), np.inf, dtype=np.float32)
+        if not (0 <= x <= self.ancho - lado and 0 <= y <= self.alto - lado):
+            return campo
+        
+        # Cada paso cuesta al menos una casilla: el campo no sale de este rectángulo
+        pasos = limite // PIES_POR_CASILLA
+        x0, x1 = max(0, x - pasos), min(self.ancho - lado, x + pasos)
+        y0, y1 = max(0, y - pasos), min(self.alto - lado, y + pasos)
+        coste = self._costes(criatura, x0, x1, y0, y1)
+        n, m = coste.shape
+        
+        distancia = np.full((n, m), np.inf, dtype=np.float32)
+        distancia[x - x0, y - y0] = 0
+        # Relajación de Dijkstra sobre todo el rectángulo a la vez; converge en tantas
+        # iteraciones como pasos tenga el camino más largo
+        for _ in range(pasos + 1):
+            borde = np.pad(distancia, 1, constant_values=np.inf)
+            vecinos = np.minimum.reduce([borde[1 + dx:1 + dx + n, 1 + dy:1 + dy + m] for dx, dy in VECINOS])
+            nueva = np.minimum(distancia, vecinos + coste)
+            nueva[nueva > limite] = np.inf
+            if np.array_equal(nueva, distancia):
+                break
+            distancia = nueva
+        
+        campo[x0:x1 + 1, y0:y1 + 1] = distancia
+        coste_total[x0:x1 + 1, y0:y1 + 1] = coste
+        self._campos[criatura] = {"posicion": posicion, "limite": limite, "campo": campo, "coste": coste_total}
+        return campo
+    
+    def distancia_movimiento(self, criatura, x, y, limite=LIMITE_CAMPO):
+        """
+        Obtiene los pies de movimiento que necesita una criatura para llegar a una casilla
+        
+        Args:
+            criatura: Identificador de la criatura
+            x (int): Casilla de destino de su esquina
+            y (int): Casilla de destino de su esquina
+            limite (int): Distancia máxima en pies a considerar
+        
+        Returns:
+            float: Pies de movimiento o None si no llega dentro del límite
+        """
+        if not (0 <= x < self.ancho and 0 <= y < self.alto):
+            return None
+        distancia = self.campo(criatura, limite)[x, y]
+        if distancia > limite:
+            return None
+        return float(distancia)
+    
+    def puede_alcanzar(self, criatura, x, y, movimiento):
+        """
+        Indica si una criatura puede llegar a una casilla con su movimiento
+        
+        Args:
+            criatura: Identificador de la criatura
+            x (int): Casilla de destino de su esquina
+            y (int): Casilla de destino de su esquina
+            movimiento (int): Pies de movimiento disponibles
+        
+        Returns:
+            bool: True si llega
+        """
+        return self.distancia_movimiento(criatura, x, y, movimiento) is not None
+    
+    def alcanzables(self, criatura, movimiento):
+        """
+        Obtiene las casillas a las que puede llegar una criatura
+        
+        Args:
+            criatura: Identificador de la criatura
+            movimiento (int): Pies de movimiento disponibles
+        
+        Returns:
+            numpy.ndarray: Casillas (x, y) de su esquina, de forma (n, 2)
+        """
+        import numpy as np
+        
+        return np.argwhere(self.campo(criatura, movimiento) <= movimiento)
+    
+    def ruta(self, criatura, x, y):
+        """
+        Obtiene el camino más corto de una criatura hasta una casilla
+        
+        Args:
+            criatura: Identificador de la criatura
+            x (int): Casilla de destino de su esquina
+            y (int): Casilla de destino de su esquina
+        
+        Returns:
+            list: Casillas (x, y) desde la posición actual hasta el destino, o None si no hay camino
+        """
+        import numpy as np
+        
+        inicio_x, inicio_y, lado = self.mapa.posicion(criatura)
+        if not (0 <= x <= self.ancho - lado and 0 <= y <= self.alto - lado):
+            return None
+        
+        # Dentro del campo guardado basta con bajar por las distancias
+        datos = self._campos.get(criatura)
+        if datos is not None and datos["posicion"] == (inicio_x, inicio_y, lado) and np.isfinite(datos["campo"][x, y]):
+            campo = datos["campo"]
+            camino = [(x, y)]
+            actual = (x, y)
+            while actual != (inicio_x, inicio_y):
+                cx, cy = actual
+                anterior = min(
+                    ((cx + dx, cy + dy) for dx, dy in VECINOS
+                     if 0 <= cx + dx < self.ancho and 0 <= cy + dy < self.alto),
+                    key=lambda casilla: campo[casilla]
+                )
+                camino.append(anterior)
+                actual = anterior
+            return camino[::-1]
+        return self._a_estrella(criatura, (x, y))
+    
+    def _a_estrella(self, criatura, destino):
+        """A* sobre todo el mapa (heurística: distancia en casillas por el coste mínimo)"""
+        import numpy as np
+        
+        x, y, lado = self.mapa.posicion(criatura)
+        if (x, y) == destino:
+            return [destino]
+        coste = self._costes(criatura, 0, self.ancho - lado, 0, self.alto - lado)
+        n, m = coste.shape
+        if not (0 <= x < n and 0 <= y < m) or not np.isfinite(coste[destino]):
+            return None
+        
+        def heuristica(casilla):
+            return max(abs(casilla[0] - destino[0]), abs(casilla[1] - destino[1])) * PIES_POR_CASILLA
+        
+        origen = (x, y)
+        distancias = {origen: 0.0}
+        anteriores = {}
+        abiertos = [(heuristica(origen), 0.0, origen)]
+        while abiertos:
+            _, distancia, actual = heapq.heappop(abiertos)
+            if actual == destino:
+                camino = [actual]
+                while actual in anteriores:
+                    actual = anteriores[actual]
+                    camino.append(actual)
+                return camino[::-1]
+            if distancia > distancias.get(actual, np.inf):
+                continue
+            cx, cy = actual
+            for dx, dy in VECINOS:
+                vecino = (cx + dx, cy + dy)
+                if not (0 <= vecino[0] < n and 0 <= vecino[1] < m):
+                    continue
+                nueva = distancia + float(coste[vecino])
+                if nueva < distancias.get(vecino, np.inf):
+                    distancias[vecino] = nueva
+                    anteriores[vecino] = actual
+                    heapq.heappush(abiertos, (nueva + heuristica(vecino), nueva, vecino))
+        return None
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    from utils.mapa_batalla import MapaBatalla
+    
+    mapa = MapaBatalla()
+    mapa.colocar("Guerrero", 1, 1)
+    mapa.colocar("Ogro", 10, 1, "Grande")
+    rutas = RutasBatalla(mapa, 20, 12)
+    rutas.fijar_terreno(5, 0, INFRANQUEABLE, 1, 8)
+    rutas.fijar_terreno(3, 8, DIFICIL, 6, 4)
+    
+    print("Guerrero hasta (8, 2):", rutas.distancia_movimiento("Guerrero", 8, 2), "pies")
+    print("Ruta:", rutas.ruta("Guerrero", 8, 2))
+    print("Casillas a 30 pies:", len(rutas.alcanzables("Guerrero", 30)))
+    mapa.mover("Ogro", 6, 9)
+    print("Tras mover al ogro:", rutas.distancia_movimiento("Guerrero", 8, 2), "pies")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servicio de números aleatorios para las simulaciones de la aplicación D&D Combat Manager.
+Parte de una única semilla y entrega flujos independientes (Philox, un generador
+basado en contador, con SeedSequence de NumPy) identificados por claves como
+("combate", 3, "goblin_2"). Cada clave produce siempre la misma secuencia y las
+secuencias de claves distintas no están correlacionadas, así que una simulación
+repartida entre varios procesos es reproducible bit a bit con la misma semilla.
+"""
+
+import random
+import threading
+import zlib
+
+
+def _clave_numerica(clave):
+    """
+    Convierte una clave (entero o texto) en enteros estables entre procesos y ejecuciones
+    
+    El primer entero indica el tipo, para que el entero 5 y un texto cuyo crc32 sea 5
+    no den el mismo flujo.
+    """
+    if isinstance(clave, int) and clave >= 0:
+        return (0, clave)
+    # hash() cambia en cada ejecución de Python; crc32 no
+    return (1, zlib.crc32(str(clave).encode("utf-8")))
+
+
+def _spawn_key(claves):
+    """Construye la spawn_key de SeedSequence a partir de una secuencia de claves"""
+    return tuple(parte for clave in claves for parte in _clave_numerica(clave))
+
+
+class ServicioAleatorio:
+    """Reparte flujos aleatorios independientes y reproducibles a partir de una semilla"""
+    
+    def __init__(self, semilla=None):
+        """
+        Inicializa el servicio
+        
+        Args:
+            semilla (int, optional): Semilla raíz. Si es None se toma entropía del sistema
+                y se guarda en self.semilla para poder repetir la ejecución
+        """
+        if semilla is None:
+            import numpy as np
+            semilla = np.random.SeedSequence().entropy
+        self.semilla = semilla
+        self._generadores = {}
+        self._cerrojo = threading.Lock()
+    
+    def secuencia(self, *claves):
+        """
+        Obtiene la SeedSequence de un flujo
+        
+        Args:
+            *claves: Identificadores del flujo (simulación, trabajador, entidad...)
+        
+        Returns:
+            numpy.random.SeedSequence: Secuencia derivada de la semilla y las claves
+        """
+        import numpy as np
+        
+        return np.random.SeedSequence(self.semilla, spawn_key=_spawn_key(claves))
+    
+    def nuevo_generador(self, *claves):
+        """
+        Crea un generador que empieza desde el principio del flujo de las claves
+        
+        Args:
+            *claves: Identificadores del flujo
+        
+        Returns:
+            numpy.random.Generator: Generador Philox nuevo
+        """
+        import numpy as np
+        
+        return np.random.Generator(np.random.Philox(self.secuencia(*claves)))
+    
+    def generador(self, *claves):
+        """
+        Obtiene el generador compartido de un flujo (continúa donde se quedó)
+        
+        Args:
+            *claves: Identificadores del flujo
+        
+        Returns:
+            numpy.random.Generator: Generador del flujo
+        """
+        with self._cerrojo:
+            generador = self._generadores.get(claves)
+            if generador is None:
+                generador = self.nuevo_generador(*claves)
+                self._generadores[claves] = generador
+            return generador
+    
+    def aleatorio(self, *claves):
+        """
+        Crea un random.Random sembrado con el siguiente valor del flujo de las claves
+        
+        Para bucles que piden números sueltos, donde las llamadas de NumPy de uno en
+        uno son más lentas que el módulo random.
+        
+        Args:
+            *claves: Identificadores del flujo
+        
+        Returns:
+            random.Random: Generador de Python reproducible
+        """
+        estado = self.generador(*claves).integers(0, 2 ** 63, size=2)
+        return random.Random(int.from_bytes(estado.tobytes(), "little"))
+    
+    def repartir(self, cantidad, *claves):
+        """
+        Obtiene secuencias independientes para trabajadores en otros procesos
+        
+        Las SeedSequence se pueden enviar a un ProcessPoolExecutor; cada trabajador
+        crea su generador con numpy.random.Generator(numpy.random.Philox(secuencia)).
+        
+        Args:
+            cantidad (int): Número de trabajadores
+            *claves: Identificadores de la simulación
+        
+        Returns:
+            list: Una numpy.random.SeedSequence por trabajador
+        """
+        import numpy as np
+        
+        base = _spawn_key(claves)
+        return [np.random.SeedSequence(self.semilla, spawn_key=base + (i,)) for i in range(cantidad)]
+
+
+# Servicio compartido por toda la aplicación
+_servicio = None
+
+
+def obtener_servicio():
+    """
+    Obtiene el servicio compartido (con semilla del sistema si no se fijó ninguna)
+    
+    Returns:
+        ServicioAleatorio: Servicio compartido
+    """
+    if _servicio is None:
+        fijar_semilla(None)
+    return _servicio
+
+
+def fijar_semilla(semilla):
+    """
+    Reinicia el servicio compartido con una semilla
+    
+    Args:
+        semilla (int): Semilla raíz (None para tomarla del sistema)
+    """
+    global _servicio
+    _servicio = ServicioAleatorio(semilla)
+
+
+def generador(*claves):
+    """
+    Obtiene un generador del servicio compartido
+    
+    Args:
+        *claves: Identificadores del flujo
+    
+    Returns:
+        numpy.random.Generator: Generador del flujo
+    """
+    return obtener_servicio().generador(*claves)
+
+
+def generador_para(semilla, *claves):
+    """
+    Obtiene un generador para una simulación con semilla opcional
+    
+    Args:
+        semilla (int): Si es None se usa el flujo del servicio compartido; si no, un
+            flujo nuevo derivado de esa semilla (misma semilla, mismos resultados)
+        *claves: Identificadores del flujo
+    
+    Returns:
+        numpy.random.Generator: Generador
+    """
+    if semilla is None:
+        return generador(*claves)
+    return ServicioAleatorio(semilla).nuevo_generador(*claves)
@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tablas de reglas precalculadas de D&D 5e para la aplicación D&D Combat Manager.
+Centraliza experiencia por nivel, bonificador de competencia, espacios de conjuro
+por tipo de lanzador y modificadores de característica, con búsquedas en O(1) o
+O(log n) y variantes por lotes con NumPy para procesar muchos personajes a la vez.
+"""
+
+from bisect import bisect_right
+
+NIVEL_MAXIMO = 20
+
+# Tabla de experiencia necesaria para cada nivel según D&D 5e
+TABLA_EXPERIENCIA = {
+    1: 0,
+    2: 300,
+    3: 900,
+    4: 2700,
+    5: 6500,
+    6: 14000,
+    7: 23000,
+    8: 34000,
+    9: 48000,
+    10: 64000,
+    11: 85000,
+    12: 100000,
+    13: 120000,
+    14: 140000,
+    15: 165000,
+    16: 195000,
+    17: 225000,
+    18: 265000,
+    19: 305000,
+    20: 355000
+}
+
+# Umbrales ordenados: UMBRALES_EXPERIENCIA[nivel - 1] es la experiencia mínima del nivel
+UMBRALES_EXPERIENCIA = tuple(TABLA_EXPERIENCIA[nivel] for nivel in range(1, NIVEL_MAXIMO + 1))
+
+# Bonificador de competencia indexado directamente por nivel (el índice 0 no se usa)
+BONIF_COMPETENCIA = (2,) + tuple(2 + ((nivel - 1) // 4) for nivel in range(1, NIVEL_MAXIMO + 1))
+
+# Modificador de característica indexado por puntuación (0-30)
+MODIFICADORES = tuple((valor - 10) // 2 for valor in range(0, 31))
+
+# Tipo de lanzador por clase
+TIPOS_LANZADOR = {
+    "Bardo": "completo",
+    "Clérigo": "completo",
+    "Druida": "completo",
+    "Hechicero": "completo",
+    "Mago": "completo",
+    "Paladín": "medio",
+    "Explorador": "medio",
+    "Brujo": "pacto"
+}
+
+# Característica de lanzamiento de conjuros por clase (Inteligencia por defecto)
+ATRIBUTO_CONJUROS = {
+    "Clérigo": "Sabiduría",
+    "Druida": "Sabiduría",
+    "Explorador": "Sabiduría",
+    "Bardo": "Carisma",
+    "Brujo": "Carisma",
+    "Paladín": "Carisma",
+    "Hechicero": "Carisma"
+}
+
+# Ataques por acción (Ataque extra) por clase: nivel a partir del que se obtiene cada número de ataques
+ATAQUES_POR_ACCION = {
+    "Guerrero": ((5, 2), (11, 3), (20, 4)),
+    "Bárbaro": ((5, 2),),
+    "Explorador": ((5, 2),),
+    "Monje": ((5, 2),),
+    "Paladín": ((5, 2),)
+}
+
+# Experiencia que otorga un monstruo según su valor de desafío (VD)
+EXPERIENCIA_POR_VD = {
+    0: 10, 0.125: 25, 0.25: 50, 0.5: 100,
+    1: 200, 2: 450, 3: 700, 4: 1100, 5: 1800, 6: 2300, 7: 2900, 8: 3900, 9: 5000, 10: 5900,
+    11: 7200, 12: 8400, 13: 10000, 14: 11500, 15: 13000, 16: 15000, 17: 18000, 18: 20000,
+    19: 22000, 20: 25000, 21: 33000, 22: 41000, 23: 50000, 24: 62000, 25: 75000,
+    26: 90000, 27: 105000, 28: 120000, 29: 135000, 30: 155000
+}
+
+# Dificultades de encuentro y umbrales de experiencia por personaje según su nivel
+DIFICULTADES_ENCUENTRO = ("Fácil", "Media", "Difícil", "Mortal")
+UMBRALES_ENCUENTRO = (
+    (0, 0, 0, 0),
+    (25, 50, 75, 100), (50, 100, 150, 200), (75, 150, 225, 400), (125, 250, 375, 500),
+    (250, 500, 750, 1100), (300, 600, 900, 1400), (350, 750, 1100, 1700), (450, 900, 1400, 2100),
+    (550, 1100, 1600, 2400), (600, 1200, 1900, 2800), (800, 1600, 2400, 3600), (1000, 2000, 3000, 4500),
+    (1100, 2200, 3400, 5100), (1250, 2500, 3800, 5700), (1400, 2800, 4300, 6400), (1600, 3200, 4800, 7200),
+    (2000, 3900, 5900, 8800), (2100, 4200, 6300, 9500), (2400, 4900, 7300, 10900), (2800, 5700, 8500, 12700)
+)
+
+# Multiplicador de experiencia por número de monstruos: (mínimo de monstruos, escalón)
+_ESCALONES_ENCUENTRO = ((1, 1), (2, 2), (3, 3), (7, 4), (11, 5), (15, 6))
+MULTIPLICADORES_ENCUENTRO = (0.5, 1, 1.5, 2, 2.5, 3, 4, 5)
+
+# Recursos de clase que se recuperan con descansos. "niveles" son pares (nivel mínimo,
+# usos); "por_nivel" da usos proporcionales al nivel desde el nivel "desde"; "atributo"
+# da tantos usos como el modificador de esa característica (mínimo 1).
+# "corto_desde" indica el nivel a partir del cual también se recupera con descanso corto.
+RECURSOS_CLASE = {
+    "Bárbaro": (
+        {"nombre": "Furia", "descanso": "largo", "niveles": ((1, 2), (3, 3), (6, 4), (12, 5), (17, 6))},
+    ),
+    "Bardo": (
+        {"nombre": "Inspiración bárdica", "descanso": "largo", "atributo": "Carisma", "corto_desde": 5},
+    ),
+    "Clérigo": (
+        {"nombre": "Canalizar divinidad", "descanso": "corto", "niveles": ((2, 1), (6, 2), (18, 3))},
+    ),
+    "Druida": (
+        {"nombre": "Forma salvaje", "descanso": "corto", "niveles": ((2, 2),)},
+    ),
+    "Guerrero": (
+        {"nombre": "Segundo aliento", "descanso": "corto", "niveles": ((1, 1),)},
+        {"nombre": "Oleada de acción", "descanso": "corto", "niveles": ((2, 1), (17, 2))}
+    ),
+    "Hechicero": (
+        {"nombre": "Puntos de hechicería", "descanso": "largo", "por_nivel": 1, "desde": 2},
+    ),
+    "Mago": (
+        {"nombre": "Recuperación arcana", "descanso": "largo", "niveles": ((1, 1),)},
+    ),
+    "Monje": (
+        {"nombre": "Puntos de ki", "descanso": "corto", "por_nivel": 1, "desde": 2},
+    ),
+    "Paladín": (
+        {"nombre": "Imposición de manos", "descanso": "largo", "por_nivel": 5, "desde": 1},
+        {"nombre": "Canalizar divinidad", "descanso": "corto", "niveles": ((3, 1),)}
+    )
+}
+
+# Trucos y conjuros de nivel 1+ por clase. "trucos" son pares (nivel mínimo, trucos conocidos);
+# las clases con "preparados" preparan modificador + nivel / divisor (mínimo 1) desde el nivel
+# "desde"; las demás conocen un número fijo por nivel de personaje ("conocidos", niveles 1-20).
+CONJUROS_CLASE = {
+    "Bardo": {
+        "trucos": ((1, 2), (4, 3), (10, 4)),
+        "conocidos": (4, 5, 6, 7, 8, 9, 10, 11, 12, 14, 15, 15, 16, 18, 19, 19, 20, 22, 22, 22)
+    },
+    "Brujo": {
+        "trucos": ((1, 2), (4, 3), (10, 4)),
+        "conocidos": (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 11, 11, 12, 12, 13, 13, 14, 14, 15, 15)
+    },
+    "Clérigo": {"trucos": ((1, 3), (4, 4), (10, 5)), "preparados": 1, "desde": 1},
+    "Druida": {"trucos": ((1, 2), (4, 3), (10, 4)), "preparados": 1, "desde": 1},
+    "Explorador": {
+        "trucos": (),
+        "conocidos": (0, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11)
+    },
+    "Hechicero": {
+        "trucos": ((1, 4), (4, 5), (10, 6)),
+        "conocidos": (2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 12, 13, 13, 14, 14, 15, 15, 15, 15)
+    },
+    "Mago": {"trucos": ((1, 3), (4, 4), (10, 5)), "preparados": 1, "desde": 1},
+    "Paladín": {"trucos": (), "preparados": 2, "desde": 2}
+}
+
+# Espacios de conjuro de un lanzador completo por nivel de personaje (niveles de conjuro 1-9)
+_ESPACIOS_COMPLETO = {
+    1: (2,),
+    2: (3,),
+    3: (4, 2),
+    4: (4, 3),
+    5: (4, 3, 2),
+    6: (4, 3, 3),
+    7: (4, 3, 3, 1),
+    8: (4, 3, 3, 2),
+    9: (4, 3, 3, 3, 1),
+    10: (4, 3, 3, 3, 2),
+    11: (4, 3, 3, 3, 2, 1),
+    12: (4, 3, 3, 3, 2, 1),
+    13: (4, 3, 3, 3, 2, 1, 1),
+    14: (4, 3, 3, 3, 2, 1, 1),
+    15: (4, 3, 3, 3, 2, 1, 1, 1),
+    16: (4, 3, 3, 3, 2, 1, 1, 1),
+    17: (4, 3, 3, 3, 2, 1, 1, 1, 1),
+    18: (4, 3, 3, 3, 3, 1, 1, 1, 1),
+    19: (4, 3, 3, 3, 3, 2, 1, 1, 1),
+    20: (4, 3, 3, 3, 3, 2, 2, 1, 1)
+}
+
+
+def _fila(espacios):
+    """Normaliza una fila de espacios a 10 posiciones (índice = nivel de conjuro)"""
+    fila = [0] * 10
+    for i, cantidad in enumerate(espacios):
+        fila[i + 1] = cantidad
+    return tuple(fila)
+
+
+def _construir_espacios():
+    """Construye las tablas de espacios de conjuro para cada tipo de lanzador"""
+    vacia = (0,) * 10
+    completo = [vacia] + [_fila(_ESPACIOS_COMPLETO[nivel]) for nivel in range(1, NIVEL_MAXIMO + 1)]
+    
+    # Un lanzador medio equivale a un completo de la mitad de nivel (redondeando hacia arriba) desde nivel 2
+    medio = [vacia, vacia] + [completo[(nivel + 1) // 2] for nivel in range(2, NIVEL_MAXIMO + 1)]
+    
+    # Magia del pacto: pocos espacios, todos del mismo nivel
+    pacto = [vacia]
+    for nivel in range(1, NIVEL_MAXIMO + 1):
+        if nivel >= 17:
+            cantidad = 4
+        elif nivel >= 11:
+            cantidad = 3
+        elif nivel >= 2:
+            cantidad = 2
+        else:
+            cantidad = 1
+        nivel_espacio = min(5, (nivel + 1) // 2)
+        fila = [0] * 10
+        fila[nivel_espacio] = cantidad
+        pacto.append(tuple(fila))
+    
+    return {
+        "completo": tuple(completo),
+        "medio": tuple(medio),
+        "pacto": tuple(pacto),
+        "ninguno": (vacia,) * (NIVEL_MAXIMO + 1)
+    }
+
+
+# ESPACIOS_CONJURO[tipo][nivel][nivel_conjuro] -> número de espacios
+ESPACIOS_CONJURO = _construir_espacios()
+
+
+def _acotar_nivel(nivel):
+    """Limita un nivel de personaje al rango 1-20"""
+    return min(NIVEL_MAXIMO, max(1, int(nivel)))
+
+
+def nivel_desde_experiencia(experiencia):
+    """
+    Obtiene el nivel correspondiente a una cantidad de experiencia (búsqueda binaria)
+    
+    Args:
+        experiencia (int): Puntos de experiencia
+    
+    Returns:
+        int: Nivel entre 1 y 20
+    """
+    return max(1, bisect_right(UMBRALES_EXPERIENCIA, experiencia))
+
+
+def experiencia_para_nivel(nivel):
+    """
+    Obtiene la experiencia mínima de un nivel
+    
+    Args:
+        nivel (int): Nivel del personaje
+    
+    Returns:
+        int: Experiencia mínima requerida
+    """
+    return UMBRALES_EXPERIENCIA[_acotar_nivel(nivel) - 1]
+
+
+def experiencia_siguiente_nivel(nivel):
+    """
+    Obtiene la experiencia necesaria para el siguiente nivel
+    
+    Args:
+        nivel (int): Nivel actual del personaje
+    
+    Returns:
+        Optional[int]: Experiencia del siguiente nivel o None si ya es nivel máximo
+    """
+    nivel = _acotar_nivel(nivel)
+    if nivel >= NIVEL_MAXIMO:
+        return None
+    return UMBRALES_EXPERIENCIA[nivel]
+
+
+def bonificador_competencia(nivel):
+    """
+    Obtiene el bonificador de competencia de un nivel
+    
+    Args:
+        nivel (int): Nivel del personaje
+    
+    Returns:
+        int: Bonificador de competencia
+    """
+    return BONIF_COMPETENCIA[_acotar_nivel(nivel)]
+
+
+def modificador(valor):
+    """
+    Obtiene el modificador de una puntuación de característica
+    
+    Args:
+        valor (int): Puntuación de característica
+    
+    Returns:
+        int: Modificador correspondiente
+    """
+    if 0 <= valor <= 30:
+        return MODIFICADORES[valor]
+    return (valor - 10) // 2
+
+
+def tipo_lanzador(clase):
+    """
+    Obtiene el tipo de lanzador de una clase
+    
+    Args:
+        clase (str): Nombre de la clase
+    
+    Returns:
+        str: "completo", "medio", "pacto" o "ninguno"
+    """
+    return TIPOS_LANZADOR.get(clase, "ninguno")
+
+
+def atributo_conjuros(clase):
+    """
+    Obtiene la característica de lanzamiento de conjuros de una clase
+    
+    Args:
+        clase (str): Nombre de la clase
+    
+    Returns:
+        str: Nombre de la característica (Inteligencia por defecto)
+    """
+    return ATRIBUTO_CONJUROS.get(clase, "Inteligencia")
+
+
+def ataques_por_accion(clase, nivel):
+    """
+    Obtiene el número de ataques que hace una clase con la acción de Atacar
+    
+    Args:
+        clase (str): Nombre de la clase
+        nivel (int): Nivel del personaje
+    
+    Returns:
+        int: Número de ataques (1 sin Ataque extra)
+    """
+    nivel = _acotar_nivel(nivel)
+    ataques = 1
+    for nivel_minimo, cantidad in ATAQUES_POR_ACCION.get(clase, ()):
+        if nivel >= nivel_minimo:
+            ataques = cantidad
+    return ataques
+
+
+def espacios_conjuro(clase, nivel):
+    """
+    Obtiene los espacios de conjuro de una clase a un nivel
+    
+    Args:
+        clase (str): Nombre de la clase
+        nivel (int): Nivel del personaje
+    
+    Returns:
+        tuple: 10 posiciones con los espacios por nivel de conjuro (la posición 0 no se usa)
+    """
+    return ESPACIOS_CONJURO[tipo_lanzador(clase)][_acotar_nivel(nivel)]
+
+
+def nivel_maximo_conjuro(clase, nivel):
+    """
+    Obtiene el nivel de conjuro más alto que puede lanzar una clase a un nivel
+    
+    Args:
+        clase (str): Nombre de la clase
+        nivel (int): Nivel del personaje
+    
+    Returns:
+        int: Nivel de conjuro máximo (0 si no tiene espacios)
+    """
+    espacios = espacios_conjuro(clase, nivel)
+    for nivel_conjuro in range(9, 0, -1):
+        if espacios[nivel_conjuro]:
+            return nivel_conjuro
+    return 0
+
+
+def valor_vd(vd):
+    """
+    Convierte un valor de desafío a número
+    
+    Args:
+        vd (str | int | float): Valor de desafío ("1/4", "2", 0.5...)
+    
+    Returns:
+        float: Valor numérico (0 si no es válido)
+    """
+    if isinstance(vd, (int, float)):
+        return float(vd)
+    try:
+        texto = str(vd).strip()
+        if "/" in texto:
+            numerador, denominador = texto.split("/", 1)
+            return int(numerador) / int(denominador)
+        return float(texto)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def experiencia_por_vd(vd):
+    """
+    Obtiene la experiencia que otorga un monstruo
+    
+    Args:
+        vd (str | int | float): Valor de desafío
+    
+    Returns:
+        int: Puntos de experiencia
+    """
+    return EXPERIENCIA_POR_VD.get(valor_vd(vd), 0)
+
+
+def umbrales_encuentro(niveles):
+    """
+    Suma los umbrales de experiencia de un grupo de personajes
+    
+    Args:
+        niveles (list): Nivel de cada personaje
+    
+    Returns:
+        tuple: Experiencia ajustada para encuentros Fácil, Media, Difícil y Mortal
+    """
+    totales = [0, 0, 0, 0]
+    for nivel in niveles:
+        for i, umbral in enumerate(UMBRALES_ENCUENTRO[_acotar_nivel(nivel)]):
+            totales[i] += umbral
+    return tuple(totales)
+
+
+def multiplicador_encuentro(num_monstruos, tamaño_grupo=4):
+    """
+    Obtiene el multiplicador de experiencia por número de monstruos
+    
+    Los grupos de menos de 3 personajes usan el escalón superior y los de 6 o más el inferior.
+    
+    Args:
+        num_monstruos (int): Número de monstruos del encuentro
+        tamaño_grupo (int): Número de personajes
+    
+    Returns:
+        float: Multiplicador
+    """
+    if num_monstruos <= 0:
+        return 0
+    escalon = 1
+    for minimo, valor in _ESCALONES_ENCUENTRO:
+        if num_monstruos >= minimo:
+            escalon = valor
+    if tamaño_grupo < 3:
+        escalon += 1
+    elif tamaño_grupo >= 6:
+        escalon -= 1
+    return MULTIPLICADORES_ENCUENTRO[escalon]
+
+
+def recursos_clase(clase, nivel, estadisticas=None):
+    """
+    Obtiene los recursos de clase que se recuperan con descansos
+    
+    Args:
+        clase (str): Nombre de la clase
+        nivel (int): Nivel del personaje
+        estadisticas (dict, optional): Puntuaciones de característica (para recursos que dependen de ellas)
+    
+    Returns:
+        tuple: Tuplas (nombre, usos máximos, descanso) con descanso "corto" o "largo"
+    """
+    nivel = _acotar_nivel(nivel)
+    recursos = []
+    for recurso in RECURSOS_CLASE.get(clase, ()):
+        if "por_nivel" in recurso:
+            maximo = recurso["por_nivel"] * nivel if nivel >= recurso["desde"] else 0
+        elif "atributo" in recurso:
+            valor = (estadisticas or {}).get(recurso["atributo"], 10)
+            maximo = max(1, modificador(int(valor)))
+        else:
+            maximo = 0
+            for nivel_minimo, usos in recurso["niveles"]:
+                if nivel >= nivel_minimo:
+                    maximo = usos
+        if maximo <= 0:
+            continue
+        descanso = recurso["descanso"]
+        if nivel >= recurso.get("corto_desde", NIVEL_MAXIMO + 1):
+            descanso = "corto"
+        recursos.append((recurso["nombre"], maximo, descanso))
+    return tuple(recursos)
+
+
+def conjuros_clase(clase, nivel, estadisticas=None):
+    """
+    Obtiene cuántos trucos y conjuros de nivel 1+ puede tener un personaje a la vez
+    
+    Args:
+        clase (str): Nombre de la clase
+        nivel (int): Nivel del personaje
+        estadisticas (dict, optional): Puntuaciones de característica (para los conjuros preparados)
+    
+    Returns:
+        tuple: (trucos conocidos, conjuros preparados o conocidos, True si la clase los prepara)
+    """
+    nivel = _acotar_nivel(nivel)
+    datos = CONJUROS_CLASE.get(clase)
+    if datos is None:
+        return 0, 0, False
+    
+    trucos = 0
+    for nivel_minimo, cantidad in datos["trucos"]:
+        if nivel >= nivel_minimo:
+            trucos = cantidad
+    
+    if "preparados" not in datos:
+        return trucos, datos["conocidos"][nivel - 1], False
+    if nivel < datos["desde"]:
+        return trucos, 0, True
+    valor = (estadisticas or {}).get(atributo_conjuros(clase), 10)
+    return trucos, max(1, modificador(int(valor)) + nivel // datos["preparados"]), True
+
+
+# ----- Variantes por lotes con NumPy -----
+
+_TABLAS_NUMPY = {}
+
+
+def _tabla_numpy(nombre):
+    """Convierte (una sola vez) una tabla precalculada a array de NumPy"""
+    import numpy as np
+    
+    if nombre not in _TABLAS_NUMPY:
+        if nombre == "umbrales":
+            _TABLAS_NUMPY[nombre] = np.array(UMBRALES_EXPERIENCIA, dtype=np.int64)
+        elif nombre == "competencia":
+            _TABLAS_NUMPY[nombre] = np.array(BONIF_COMPETENCIA, dtype=np.int8)
+        else:
+            _TABLAS_NUMPY[nombre] = np.array(ESPACIOS_CONJURO[nombre], dtype=np.int8)
+    return _TABLAS_NUMPY[nombre]
+
+
+def nivel_desde_experiencia_lote(experiencias):
+    """
+    Calcula el nivel de muchos personajes a la vez
+    
+    Args:
+        experiencias (array-like): Puntos de experiencia
+    
+    Returns:
+        numpy.ndarray: Niveles entre 1 y 20
+    """
+    import numpy as np
+    
+    niveles = np.searchsorted(_tabla_numpy("umbrales"), np.asarray(experiencias), side="right")
+    return np.maximum(niveles, 1)
+
+
+def bonificador_competencia_lote(niveles):
+    """
+    Calcula el bonificador de competencia de muchos niveles a la vez
+    
+    Args:
+        niveles (array-like): Niveles de personaje
+    
+    Returns:
+        numpy.ndarray: Bonificadores de competencia
+    """
+    import numpy as np
+    
+    niveles = np.clip(np.asarray(niveles), 1, NIVEL_MAXIMO)
+    return _tabla_numpy("competencia")[niveles]
+
+
+def modificador_lote(valores):
+    """
+    Calcula los modificadores de muchas puntuaciones a la vez
+    
+    Args:
+        valores (array-like): Puntuaciones de característica (cualquier forma)
+    
+    Returns:
+        numpy.ndarray: Modificadores con la misma forma
+    """
+    import numpy as np
+    
+    return np.floor_divide(np.asarray(valores) - 10, 2)
+
+
+def espacios_conjuro_lote(clase, niveles):
+    """
+    Obtiene los espacios de conjuro de muchos personajes de la misma clase
+    
+    Args:
+        clase (str): Nombre de la clase
+        niveles (array-like): Niveles de personaje
+    
+    Returns:
+        numpy.ndarray: Matriz (personajes x 10) con espacios por nivel de conjuro
+    """
+    import numpy as np
+    
+    niveles = np.clip(np.asarray(niveles), 1, NIVEL_MAXIMO)
+    return _tabla_numpy(tipo_lanzador(clase))[niveles]
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vigilante de cambios en los directorios de datos de la aplicación D&D Combat Manager.
+Usa inotify (Linux) cuando está disponible y, si no, compara periódicamente fechas de
+modificación. Emite eventos por archivo para que cada caché invalide sólo las entradas
+afectadas, de modo que varios DM puedan compartir la misma carpeta de datos.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from collections import namedtuple
+
+# Tipos de evento
+CREADO = "creado"
+MODIFICADO = "modificado"
+ELIMINADO = "eliminado"
+# Se han podido perder eventos (desbordamiento o directorio recreado): invalidar todo
+REINICIADO = "reiniciado"
+
+Evento = namedtuple("Evento", ["ruta", "tipo"])
+
+# Directorios de datos vigilados por defecto
+DIRECTORIOS_DATOS = ["personajes", "campanas", "data/hechizos", "data/objetos"]
+
+# Constantes de inotify (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_MASCARA = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE |
+            _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_CABECERA_EVENTO = struct.Struct("iIII")
+
+# Sistemas de archivos de red: inotify no ve los cambios hechos desde otras máquinas
+_SISTEMAS_RED = ("nfs", "nfs4", "cifs", "smb", "smb2", "smb3", "smbfs", "9p", "afs",
+                 "ceph", "glusterfs", "lustre", "davfs", "fuse.sshfs", "fuse.rclone")
+
+
+def _normalizar(ruta):
+    """Normaliza una ruta para poder comparar prefijos"""
+    return os.path.normpath(os.path.abspath(ruta))
+
+
+def _es_local(ruta):
+    """
+    Indica si una ruta está en un sistema de archivos local según /proc/mounts
+    
+    Args:
+        ruta (str): Ruta normalizada
+    
+    Returns:
+        bool: False si está en un montaje de red (o no se puede saber)
+    """
+    ruta = os.path.realpath(ruta)
+    punto, tipo = "", None
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            for linea in f:
+                campos = linea.split()
+                if len(campos) < 3:
+                    continue
+                # Los espacios en los puntos de montaje vienen escapados como \040
+                montaje = campos[1].replace("\\040", " ")
+                dentro = ruta == montaje or ruta.startswith(montaje.rstrip(os.sep) + os.sep)
+                if dentro and len(montaje) >= len(punto):
+                    punto, tipo = montaje, campos[2]
+    except OSError:
+        return False
+    return tipo is not None and tipo not in _SISTEMAS_RED
+
+
+def _cargar_inotify():
+    """Obtiene las funciones de inotify de la libc o None si no están disponibles"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class VigilanteArchivos:
+    """Servicio que vigila directorios y notifica los cambios a los suscriptores"""
+    
+    def __init__(self, intervalo=1.0):
+        """
+        Inicializa el vigilante (sin arrancarlo)
+        
+        Args:
+            intervalo (float): Segundos entre comprobaciones en modo sondeo, y tiempo
+                máximo de espera entre lecturas en modo inotify
+        """
+        self.intervalo = intervalo
+        self.modo = None
+        self._raices = []
+        # Raíces locales con los watches ya añadidos (sólo estas cuentan como vigiladas)
+        self._cubiertas = set()
+        self._suscriptores = []
+        self._cerrojo = threading.Lock()
+        self._hilo = None
+        self._detener = threading.Event()
+    
+    # ----- Suscripciones -----
+    
+    def suscribir(self, directorio, callback):
+        """
+        Registra una función que recibirá los eventos de un directorio
+        
+        El callback se ejecuta en el hilo del vigilante: sólo debe invalidar datos,
+        nunca tocar widgets de Tk.
+        
+        Args:
+            directorio (str): Directorio (o prefijo de ruta) de interés
+            callback (callable): Función que recibe un Evento
+        """
+        with self._cerrojo:
+            self._suscriptores.append((_normalizar(directorio), callback))
+    
+    def cancelar_suscripcion(self, callback):
+        """
+        Elimina todas las suscripciones de una función
+        
+        Args:
+            callback (callable): Función registrada con suscribir
+        """
+        with self._cerrojo:
+            self._suscriptores = [(d, c) for d, c in self._suscriptores if c is not callback]
+    
+    def _emitir(self, ruta, tipo):
+        """Envía un evento a los suscriptores cuyo directorio lo contiene"""
+        ruta = _normalizar(ruta)
+        evento = Evento(ruta, tipo)
+        with self._cerrojo:
+            suscriptores = list(self._suscriptores)
+        for directorio, callback in suscriptores:
+            if ruta == directorio or ruta.startswith(directorio + os.sep) or directorio.startswith(ruta + os.sep):
+                try:
+                    callback(evento)
+                except Exception as e:
+                    print(f"Error en un suscriptor del vigilante: {str(e)}")
+    
+    # ----- Ciclo de vida -----
+    
+    def iniciar(self, directorios=None, usar_inotify=True):
+        """
+        Arranca la vigilancia en un hilo en segundo plano
+        
+        Args:
+            directorios (list, optional): Directorios a vigilar (por defecto los de datos)
+            usar_inotify (bool): Si es False se fuerza el modo sondeo
+        """
+        if self.activo():
+            return
+        self._raices = [_normalizar(d) for d in (directorios or DIRECTORIOS_DATOS)]
+        self._cubiertas = set()
+        self._detener.clear()
+        
+        libc = _cargar_inotify() if usar_inotify else None
+        descriptor = -1
+        if libc is not None:
+            descriptor = libc.inotify_init1(os.O_CLOEXEC)
+        if descriptor >= 0:
+            self.modo = "inotify"
+            objetivo = lambda: self._bucle_inotify(libc, descriptor)
+        else:
+            self.modo = "sondeo"
+            objetivo = self._bucle_sondeo
+        
+        self._hilo = threading.Thread(target=objetivo, name="VigilanteArchivos", daemon=True)
+        self._hilo.start()
+    
+    def detener(self):
+        """Detiene la vigilancia y espera a que termine el hilo"""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=self.intervalo * 2 + 1)
+        self._hilo = None
+        self.modo = None
+        self._cubiertas = set()
+    
+    def activo(self):
+        """
+        Indica si el vigilante está en marcha
+        
+        Returns:
+            bool: True si el hilo de vigilancia está activo
+        """
+        return self._hilo is not None and self._hilo.is_alive()
+    
+    def vigila(self, directorio):
+        """
+        Indica si un directorio está cubierto por el vigilante en marcha con inotify
+        
+        En modo sondeo los eventos llegan con retraso, y en montajes de red (NFS, SMB...)
+        inotify no ve lo que escriben otras máquinas, así que en esos casos las cachés
+        deben seguir comprobando la fecha de modificación en cada lectura. Tampoco se da
+        por cubierto un directorio hasta que sus watches están añadidos.
+        
+        Args:
+            directorio (str): Directorio a comprobar
+        
+        Returns:
+            bool: True si los cambios en el directorio se notifican al instante
+        """
+        if not self.activo() or self.modo != "inotify":
+            return False
+        directorio = _normalizar(directorio)
+        return any(directorio == raiz or directorio.startswith(raiz + os.sep) for raiz in list(self._cubiertas))
+    
+    # ----- Modo inotify -----
+    
+    def _bucle_inotify(self, libc, descriptor):
+        """Bucle principal usando inotify"""
+        rutas_por_watch = {}
+        pendientes = set(self._raices)
+        
+        def vigilar_arbol(raiz, emitir_existentes):
+            """Añade watches a un directorio y sus subdirectorios"""
+            for actual, subdirectorios, archivos in os.walk(raiz):
+                watch = libc.inotify_add_watch(descriptor, os.fsencode(actual), _MASCARA)
+                if watch >= 0:
+                    rutas_por_watch[watch] = actual
+                if emitir_existentes:
+                    for nombre in archivos:
+                        self._emitir(os.path.join(actual, nombre), CREADO)
+        
+        try:
+            while not self._detener.is_set():
+                # Directorios raíz que aún no existen (o se han borrado): reintentar
+                for raiz in list(pendientes):
+                    if os.path.isdir(raiz):
+                        pendientes.discard(raiz)
+                        vigilar_arbol(raiz, False)
+                        if _es_local(raiz):
+                            self._cubiertas.add(raiz)
+                        self._emitir(raiz, REINICIADO)
+                
+                listos, _, _ = select.select([descriptor], [], [], self.intervalo)
+                if not listos:
+                    continue
+                
+                try:
+                    datos = os.read(descriptor, 64 * 1024)
+                except OSError:
+                    continue
+                
+                desplazamiento = 0
+                while desplazamiento + _CABECERA_EVENTO.size <= len(datos):
+                    watch, mascara, _, longitud = _CABECERA_EVENTO.unpack_from(datos, desplazamiento)
+                    inicio = desplazamiento + _CABECERA_EVENTO.size
+                    nombre = datos[inicio:inicio + longitud].rstrip(b"\0")
+                    desplazamiento = inicio + longitud
+                    
+                    if mascara & _IN_Q_OVERFLOW:
+                        for raiz in self._raices:
+                            self._emitir(raiz, REINICIADO)
+                        continue
+                    
+                    base = rutas_por_watch.get(watch)
+                    if base is None:
+                        continue
+                    
+                    if mascara & _IN_IGNORED:
+                        del rutas_por_watch[watch]
+                        if base in self._raices:
+                            self._cubiertas.discard(base)
+                            pendientes.add(base)
+                        continue
+                    
+                    if mascara & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                        if base in self._raices:
+                            self._cubiertas.discard(base)
+                            pendientes.add(base)
+                            self._emitir(base, REINICIADO)
+                        continue
+                    
+                    ruta = os.path.join(base, os.fsdecode(nombre))
+                    if mascara & _IN_ISDIR:
+                        if mascara & (_IN_CREATE | _IN_MOVED_TO):
+                            vigilar_arbol(ruta, True)
+                        elif mascara & (_IN_DELETE | _IN_MOVED_FROM):
+                            self._emitir(ruta, REINICIADO)
+                        continue
+                    
+                    if mascara & _IN_CREATE:
+                        self._emitir(ruta, CREADO)
+                    elif mascara & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                        self._emitir(ruta, MODIFICADO)
+                    elif mascara & (_IN_DELETE | _IN_MOVED_FROM):
+                        self._emitir(ruta, ELIMINADO)
+        finally:
+            os.close(descriptor)
+    
+    # ----- Modo sondeo -----
+    
+    def _instantanea(self):
+        """Obtiene la firma de todos los archivos vigilados"""
+        firmas = {}
+        for raiz in self._raices:
+            for actual, _, archivos in os.walk(raiz):
+                for nombre in archivos:
+                    ruta = os.path.join(actual, nombre)
+                    try:
+                        estado = os.stat(ruta)
+                    except OSError:
+                        continue
+                    firmas[ruta] = (estado.st_mtime_ns, estado.st_size)
+        return firmas
+    
+    def _bucle_sondeo(self):
+        """Bucle principal comparando fechas de modificación"""
+        anterior = self._instantanea()
+        while not self._detener.wait(self.intervalo):
+            actual = self._instantanea()
+            for ruta, firma in actual.items():
+                previa = anterior.get(ruta)
+                if previa is None:
+                    self._emitir(ruta, CREADO)
+                elif previa != firma:
+                    self._emitir(ruta, MODIFICADO)
+            for ruta in anterior.keys() - actual.keys():
+                self._emitir(ruta, ELIMINADO)
+            anterior = actual
+
+
+# Vigilante compartido por toda la aplicación
+_vigilante = VigilanteArchivos()
+
+
+def obtener_vigilante():
+    """
+    Obtiene el vigilante compartido de la aplicación
+    
+    Returns:
+        VigilanteArchivos: Instancia compartida (puede no estar iniciada)
+    """
+    return _vigilante
+
+
+def suscribir(directorio, callback):
+    """
+    Suscribe una función a los cambios de un directorio en el vigilante compartido
+    
+    Args:
+        directorio (str): Directorio de interés
+        callback (callable): Función que recibe un Evento
+    """
+    _vigilante.suscribir(directorio, callback)
+
+
+def vigilando(directorio):
+    """
+    Indica si el vigilante compartido está notificando los cambios de un directorio
+    
+    Args:
+        directorio (str): Directorio a comprobar
+    
+    Returns:
+        bool: True si las cachés pueden confiar en los eventos en lugar de comprobar fechas
+    """
+    return _vigilante.vigila(directorio)